@@ -0,0 +1,246 @@
+import ast
+import weakref
+
+from symbols import SymbolStore
+
+SYMBOL_COLUMNS = ['Symbol', 'Type', 'Scope', 'Line', 'ID']
+
+# Nodes that add decision points to cyclomatic complexity; see decision_points
+COMPLEXITY_NODES = (ast.If, ast.IfExp, ast.While, ast.For, ast.AsyncFor, ast.ExceptHandler, ast.BoolOp,
+                    ast.comprehension) + ((ast.match_case,) if hasattr(ast, 'match_case') else ())
+
+_analysis_cache = weakref.WeakKeyDictionary()
+
+
+def decision_points(node):
+    """Decision points ``node`` adds to cyclomatic complexity (0 for nodes outside COMPLEXITY_NODES).
+
+    Branches, loops, conditional expressions, except handlers and match cases add one each; a
+    boolean chain adds one per extra operand; a comprehension adds one for its loop and one per
+    ``if`` clause.
+    """
+    if isinstance(node, ast.BoolOp):
+        return len(node.values) - 1
+    if isinstance(node, ast.comprehension):
+        return 1 + len(node.ifs)
+    return 1 if isinstance(node, COMPLEXITY_NODES) else 0
+
+
+class ModuleAnalysis:
+    def __init__(self):
+        self.symbol_table = SymbolStore()
+        self.docstrings = {}
+        self.classes = []
+        self.functions = []
+        self.variables = []
+        self.complexity = 1
+        self.num_functions = 0
+        self.num_classes = 0
+        self.num_imports = 0
+        self.lines_of_code = None
+        self.nodes_visited = 0
+
+    def metrics(self):
+        return {
+            'Cyclomatic Complexity': self.complexity,
+            'Lines of Code': self.lines_of_code,
+            'Number of Functions': self.num_functions,
+            'Number of Classes': self.num_classes,
+            'Number of Imports': self.num_imports
+        }
+
+
+class ModuleAnalyzer:
+    """Collects symbols, metrics, docstrings and names in one pass over a tree."""
+
+    def __init__(self):
+        self.result = ModuleAnalysis()
+        self._import_scopes = {}
+
+    def analyze(self, tree):
+        self.result = ModuleAnalysis()
+        self.process_node(tree)
+        self.result.symbol_table.compact()
+        return self.result
+
+    def process_node(self, node, scope='Global'):
+        result = self.result
+        add_symbol = self.add_symbol
+        stack = [(child, scope) for child in reversed(list(ast.iter_child_nodes(node)))]
+        visited = 0
+        while stack:
+            child, scope = stack.pop()
+            visited += 1
+            child_scope = scope
+            if isinstance(child, COMPLEXITY_NODES):
+                result.complexity += decision_points(child)
+            if isinstance(child, ast.Name):
+                result.variables.append(child.id)
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                add_symbol(child.name, 'Function', scope, child.lineno)
+                child_scope = child.name
+                if isinstance(child, ast.FunctionDef):
+                    result.num_functions += 1
+                    result.functions.append(child.name)
+                    result.docstrings[child.name] = ast.get_docstring(child) or "No docstring available"
+            elif isinstance(child, ast.ClassDef):
+                add_symbol(child.name, 'Class', scope, child.lineno)
+                child_scope = child.name
+                result.num_classes += 1
+                result.classes.append(child.name)
+                result.docstrings[child.name] = ast.get_docstring(child) or "No docstring available"
+            elif isinstance(child, ast.Assign):
+                for target in child.targets:
+                    if isinstance(target, ast.Name):
+                        add_symbol(target.id, 'Variable', scope, child.lineno)
+            elif isinstance(child, ast.Import):
+                result.num_imports += 1
+                for name in child.names:
+                    add_symbol(name.name, 'Import', scope, child.lineno)
+            elif isinstance(child, ast.ImportFrom):
+                result.num_imports += 1
+                import_scope = self._import_scopes.get((scope, child.module))
+                if import_scope is None:
+                    import_scope = self._import_scopes[scope, child.module] = f"{scope} (from {child.module})"
+                for name in child.names:
+                    add_symbol(name.name, 'Import', import_scope, child.lineno)
+            grandchildren = list(ast.iter_child_nodes(child))
+            for grandchild in reversed(grandchildren):
+                stack.append((grandchild, child_scope))
+        result.nodes_visited += visited
+
+    def add_symbol(self, name, typ, scope, line):
+        self.result.symbol_table.append(name, typ, scope, line)
+
+
+def cached_analysis(tree):
+    return _analysis_cache.get(tree)
+
+
+def analyze_tree(tree):
+    analysis = _analysis_cache.get(tree)
+    if analysis is None:
+        analysis = ModuleAnalyzer().analyze(tree)
+        _analysis_cache[tree] = analysis
+    return analysis
+
+
+def extract_symbols(tree):
+    return analyze_tree(tree).symbol_table
+
+
+def analyze_source(content, filename='<unknown>'):
+    tree = ast.parse(content, filename)
+    analysis = analyze_tree(tree)
+    analysis.lines_of_code = len(content.splitlines())
+    return analysis
+
+
+def analyze_file(file_path):
+    with open(file_path, 'rb') as file:
+        content = file.read()
+    return analyze_source(content, file_path)
+
+
+class _Segment:
+    __slots__ = ('start', 'end', 'rows')
+
+    def __init__(self, start, end, rows):
+        self.start = start
+        self.end = end
+        self.rows = rows
+
+    def shifted(self, delta):
+        if not delta:
+            return self
+        return _Segment(self.start + delta, self.end + delta, self.rows.shifted(delta))
+
+
+class IncrementalAnalyzer:
+    """Caches symbol rows per top-level statement and re-analyzes only the edited ones.
+
+    The statements on either side of an edit are re-parsed too, so edits that extend or merge
+    them are picked up. If that span does not parse (usually a statement still being typed) the
+    previous rows are kept and ``stale`` is set; the next update diffs against the last text
+    that parsed, so the whole pending edit is picked up once it does.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.segments = []
+        self.symbol_table = SymbolStore()
+        self.reparsed_lines = 0
+        self.stale = False
+
+    def reset(self, content, tree=None):
+        if tree is None:
+            tree = ast.parse(content)
+        self.lines = content.splitlines()
+        self.segments = self._build_segments(tree.body, 0)
+        self.symbol_table = self._collect_rows()
+        self.reparsed_lines = len(self.lines)
+        self.stale = False
+        return self.symbol_table
+
+    def update(self, content):
+        new_lines = content.splitlines()
+        old_lines = self.lines
+        if new_lines == old_lines:
+            self.reparsed_lines = 0
+            self.stale = False
+            return self.symbol_table
+
+        prefix = 0
+        limit = min(len(old_lines), len(new_lines))
+        while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+            prefix += 1
+        suffix = 0
+        limit -= prefix
+        while suffix < limit and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+            suffix += 1
+        delta = len(new_lines) - len(old_lines)
+        changed_first = prefix + 1
+        changed_last = len(old_lines) - suffix
+
+        before = [i for i, seg in enumerate(self.segments) if seg.end < changed_first]
+        after = [i for i, seg in enumerate(self.segments) if seg.start > changed_last]
+        keep_before = before[:-1]
+        keep_after = after[1:]
+
+        span_first = self.segments[keep_before[-1]].end + 1 if keep_before else 1
+        span_last = self.segments[keep_after[0]].start - 1 + delta if keep_after else len(new_lines)
+        span_text = "\n".join(new_lines[span_first - 1:span_last])
+        try:
+            span_tree = ast.parse(span_text)
+        except SyntaxError:
+            self.reparsed_lines = 0
+            self.stale = True
+            return self.symbol_table
+
+        segments = [self.segments[i] for i in keep_before]
+        segments.extend(self._build_segments(span_tree.body, span_first - 1))
+        segments.extend(self.segments[i].shifted(delta) for i in keep_after)
+        self.lines = new_lines
+        self.segments = segments
+        self.symbol_table = self._collect_rows()
+        self.reparsed_lines = span_last - span_first + 1
+        self.stale = False
+        return self.symbol_table
+
+    def _build_segments(self, body, offset):
+        groups = []
+        for stmt in body:
+            start = min([stmt.lineno] + [dec.lineno for dec in getattr(stmt, 'decorator_list', ())])
+            if groups and start <= groups[-1][1]:
+                groups[-1][1] = max(groups[-1][1], stmt.end_lineno)
+                groups[-1][2].append(stmt)
+            else:
+                groups.append([start, stmt.end_lineno, [stmt]])
+        segments = []
+        for start, end, stmts in groups:
+            rows = ModuleAnalyzer().analyze(ast.Module(body=stmts, type_ignores=[])).symbol_table
+            segments.append(_Segment(start, end, rows).shifted(offset))
+        return segments
+
+    def _collect_rows(self):
+        return SymbolStore.concat(segment.rows for segment in self.segments)
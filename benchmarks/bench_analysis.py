@@ -0,0 +1,99 @@
+import os
+import sys
+import ast
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import ModuleAnalyzer, decision_points
+
+
+def make_module(num_classes):
+    parts = ["import os", "from typing import List, Dict"]
+    for i in range(num_classes):
+        parts.append(f'''
+class Generated{i}:
+    """Generated class {i}."""
+    limit = {i}
+
+    def method_a(self, items: List[int]) -> int:
+        total = 0
+        for item in items:
+            if item > self.limit and item % 2 or item < 0:
+                total += item
+        return total
+
+    def method_b(self, mapping: Dict[str, int]) -> None:
+        while mapping:
+            key, value = mapping.popitem()
+            if value:
+                result = key
+
+
+def helper_{i}(value):
+    return value and value > 0
+''')
+    return "\n".join(parts)
+
+
+def legacy_analysis(tree):
+    symbol_table = []
+
+    def process_node(node, scope='Global'):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                symbol_table.append((child.name, 'Function', scope, child.lineno, id(child)))
+                process_node(child, child.name)
+            elif isinstance(child, ast.ClassDef):
+                symbol_table.append((child.name, 'Class', scope, child.lineno, id(child)))
+                process_node(child, child.name)
+            elif isinstance(child, ast.Assign):
+                for target in child.targets:
+                    if isinstance(target, ast.Name):
+                        symbol_table.append((target.id, 'Variable', scope, child.lineno, id(target)))
+            elif isinstance(child, ast.Import):
+                for name in child.names:
+                    symbol_table.append((name.name, 'Import', scope, child.lineno, id(name)))
+            elif isinstance(child, ast.ImportFrom):
+                for name in child.names:
+                    symbol_table.append((name.name, 'Import', f"{scope} (from {child.module})", child.lineno, id(name)))
+            else:
+                process_node(child, scope)
+
+    process_node(tree)
+    complexity = sum(decision_points(node) for node in ast.walk(tree)) + 1
+    functions = len([node for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)])
+    classes = len([node for node in ast.walk(tree) if isinstance(node, ast.ClassDef)])
+    imports = len([node for node in ast.walk(tree) if isinstance(node, (ast.Import, ast.ImportFrom))])
+    docstrings = {node.name: ast.get_docstring(node) for node in ast.walk(tree)
+                  if isinstance(node, (ast.FunctionDef, ast.ClassDef))}
+    return symbol_table, complexity, functions, classes, imports, docstrings
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare per-metric AST walks with the single-pass analyzer.')
+    parser.add_argument('--classes', type=int, default=1000, help='generated classes (about 20 lines each)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    source = make_module(args.classes)
+    tree = ast.parse(source)
+    legacy = best_of(lambda: legacy_analysis(tree), args.repeat)
+    single = best_of(lambda: ModuleAnalyzer().analyze(tree), args.repeat)
+    print(f"{len(source.splitlines())} lines")
+    print(f"per-metric walks: {legacy * 1000:.1f} ms")
+    print(f"single pass:      {single * 1000:.1f} ms ({legacy / single:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
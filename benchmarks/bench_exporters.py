@@ -0,0 +1,77 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exporters import EXPORT_FORMATS, export_symbols
+from bench_table_model import make_symbol_table
+
+
+def legacy_csv(rows, file_path):
+    with open(file_path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['Symbol', 'Type', 'Scope', 'Line', 'Address'])
+        for row in rows:
+            writer.writerow(row)
+
+
+def legacy_json(rows, file_path):
+    with open(file_path, 'w') as jsonfile:
+        json.dump(rows, jsonfile, indent=4)
+
+
+def legacy_xml(rows, file_path):
+    root = ET.Element("SymbolTable")
+    for name, typ, scope, line, address in rows:
+        symbol_element = ET.SubElement(root, "Symbol")
+        ET.SubElement(symbol_element, "Name").text = name
+        ET.SubElement(symbol_element, "Type").text = typ
+        ET.SubElement(symbol_element, "Scope").text = scope
+        ET.SubElement(symbol_element, "Line").text = str(line)
+        ET.SubElement(symbol_element, "Address").text = str(address)
+    ET.ElementTree(root).write(file_path, encoding='utf-8', xml_declaration=True)
+
+
+LEGACY = {'.csv': legacy_csv, '.json': legacy_json, '.xml': legacy_xml}
+
+
+def measure(func, rows, file_path):
+    start = time.perf_counter()
+    func(rows, file_path)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(rows, file_path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    size = os.path.getsize(file_path)
+    return elapsed, size, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Throughput and peak memory of each symbol table export format.')
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--no-legacy', action='store_true', help='skip the old whole-table exporters')
+    args = parser.parse_args(argv)
+
+    rows = make_symbol_table(args.rows)
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'format':20} {'MB/s':>8} {'size MB':>8} {'peak MB':>8}")
+        for extension in EXPORT_FORMATS:
+            file_path = os.path.join(directory, 'symbols' + extension)
+            runs = [('streaming', lambda rows, path: export_symbols(iter(rows), path))]
+            if extension in LEGACY and not args.no_legacy:
+                runs.append(('legacy', LEGACY[extension]))
+            for label, func in runs:
+                elapsed, size, peak = measure(func, rows, file_path)
+                print(f"{extension + ' ' + label:20} {size / elapsed / 1e6:8.1f} {size / 1e6:8.1f} {peak / 1e6:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
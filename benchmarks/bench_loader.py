@@ -0,0 +1,103 @@
+import os
+import sys
+import ast
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from corpus import iter_corpus
+from indexer import peak_rss_kb
+from loader import load_source
+
+STRATEGIES = ('legacy', 'loader')
+
+
+def write_large_file(path, megabytes, encoding='utf-8'):
+    """Concatenate synthetic modules into one file of about ``megabytes`` MB."""
+    target = int(megabytes * 1024 * 1024)
+    written = 0
+    with open(path, 'w', encoding=encoding) as file:
+        if encoding != 'utf-8':
+            file.write(f"# -*- coding: {encoding} -*-\n")
+        file.write("NAME = 'café'\n")
+        for _, source in iter_corpus(files=100000, functions=20, seed=1):
+            file.write(source)
+            written += len(source)
+            if written >= target:
+                break
+    return os.path.getsize(path)
+
+
+def read_legacy(path):
+    with open(path, 'r') as file:
+        return file.read()
+
+
+def read_loader(path):
+    return load_source(path).text
+
+
+def measure(strategy, path):
+    """Child process: Python heap peak of the read, then peak RSS of read plus parse."""
+    import tracemalloc
+    read = read_legacy if strategy == 'legacy' else read_loader
+    baseline = peak_rss_kb()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        text = read(path)
+    except (UnicodeDecodeError, SyntaxError) as e:
+        tracemalloc.stop()
+        return {'error': f"{type(e).__name__}: {e}"}
+    read_seconds = time.perf_counter() - start
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    read_rss = peak_rss_kb()
+    start = time.perf_counter()
+    tree = ast.parse(text, path)
+    parse_seconds = time.perf_counter() - start
+    return {'read_ms': round(read_seconds * 1000, 2), 'parse_ms': round(parse_seconds * 1000, 1),
+            'heap_peak_kb': heap_peak // 1024, 'read_rss_kb': read_rss - baseline,
+            'total_rss_kb': peak_rss_kb() - baseline, 'chars': len(text), 'statements': len(tree.body)}
+
+
+def run_child(strategy, path):
+    process = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', strategy, path],
+                             stdout=subprocess.PIPE, check=True, universal_newlines=True)
+    return json.loads(process.stdout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare peak memory of the legacy text read and the loader.')
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1, 4, 8], help='file sizes in MB')
+    parser.add_argument('--encoding', default='utf-8', help='encoding of the generated files (declared by cookie)')
+    parser.add_argument('--child', nargs=2, metavar=('STRATEGY', 'FILE'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure(*args.child)))
+        return 0
+
+    print(f"{'size':>8} {'strategy':>8} {'read ms':>9} {'heap peak':>10} {'read RSS':>9} "
+          f"{'total RSS':>10} {'parse ms':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for megabytes in args.sizes:
+            path = os.path.join(directory, f"large_{megabytes:g}.py")
+            size = write_large_file(path, megabytes, args.encoding)
+            for strategy in STRATEGIES:
+                result = run_child(strategy, path)
+                if 'error' in result:
+                    print(f"{size / 1e6:7.1f}M {strategy:>8}  {result['error']}")
+                    continue
+                print(f"{size / 1e6:7.1f}M {strategy:>8} {result['read_ms']:9.1f} {result['heap_peak_kb']:8d}KB "
+                      f"{result['read_rss_kb']:7d}KB {result['total_rss_kb']:8d}KB {result['parse_ms']:9.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
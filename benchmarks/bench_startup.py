@@ -0,0 +1,61 @@
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules the headless path must not pull in
+FORBIDDEN = ('PyQt5', 'exporters', 'csv', 'json', 'xml', 'subprocess', 'sqlite3', 'multiprocessing', 'gui', 'jobs')
+
+
+def import_times(command):
+    """``(module, self us, cumulative us, depth)`` from ``python -X importtime``, in import order."""
+    process = subprocess.run([sys.executable, '-X', 'importtime'] + command, cwd=ROOT,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    if process.returncode:
+        raise RuntimeError(process.stderr)
+    rows = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the import-time budget of the headless entry point.')
+    parser.add_argument('--budget-ms', type=float, default=40.0,
+                        help='maximum total import time of the headless command (default 40)')
+    parser.add_argument('--file', default='lol.py', help='file to analyze (default: lol.py)')
+    parser.add_argument('--repeat', type=int, default=5, help='best of N runs')
+    parser.add_argument('--top', type=int, default=10, help='show the N slowest top-level imports')
+    args = parser.parse_args(argv)
+
+    command = ['main.py', '--symbols', args.file, '-o', os.devnull]
+    best = None
+    for _ in range(args.repeat):
+        rows = import_times(command)
+        total = sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000
+        if best is None or total < best[0]:
+            best = (total, rows)
+    total, rows = best
+    top_level = sorted((row for row in rows if row[3] == 0), key=lambda row: -row[2])
+    for name, _, cumulative, _ in top_level[:args.top]:
+        print(f"{cumulative / 1000:8.2f} ms  {name}")
+    print(f"{total:8.2f} ms  total ({len(rows)} modules), budget {args.budget_ms:.0f} ms")
+
+    failed = False
+    forbidden = sorted({name for name, _, _, _ in rows if name.split('.')[0] in FORBIDDEN})
+    if forbidden:
+        print(f"FAIL headless path imported {', '.join(forbidden)}", file=sys.stderr)
+        failed = True
+    if total > args.budget_ms:
+        print(f"FAIL import time {total:.2f} ms is over the {args.budget_ms:.0f} ms budget", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
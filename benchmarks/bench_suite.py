@@ -0,0 +1,277 @@
+import os
+import io
+import sys
+import ast
+import json
+import time
+import platform
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import ModuleAnalyzer
+from exporters import EXPORT_FORMATS, export_symbols
+from search import SubstringIndex, SymbolIndex
+from symbols import SymbolStore
+from metrics import ProjectMetrics, module_metrics
+from corpus import iter_corpus, add_corpus_arguments, corpus_options
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+FILTER_QUERIES = ['helper', 'value_1', 'total', 'zz_missing']
+CALIBRATION_SOURCE = "def f(a, b=1):\n    if a:\n        return [x * b for x in a]\n    return {'a': a}\n" * 50
+
+
+class Corpus:
+    """Sources of a synthetic corpus plus the parse, extraction and unit metrics later stages reuse."""
+
+    def __init__(self, sources):
+        self.sources = sources
+        self.data = [source.encode('utf-8') for _, source in sources]
+        self.bytes = sum(len(data) for data in self.data)
+        self.trees = [ast.parse(source, path) for path, source in sources]
+        self.analyses = [ModuleAnalyzer().analyze(tree) for tree in self.trees]
+        self.symbols = SymbolStore.concat([analysis.symbol_table for analysis in self.analyses])
+        self.unit_metrics = {path: module_metrics(tree, data, path)
+                             for (path, _), data, tree in zip(sources, self.data, self.trees)}
+
+
+def bench_parse(corpus):
+    for path, source in corpus.sources:
+        ast.parse(source, path)
+    return corpus.bytes, 'bytes'
+
+
+def bench_extract(corpus):
+    for tree in corpus.trees:
+        ModuleAnalyzer().analyze(tree)
+    return corpus.bytes, 'bytes'
+
+
+def bench_metrics(corpus):
+    totals = {}
+    for (_, source), tree in zip(corpus.sources, corpus.trees):
+        metrics = ModuleAnalyzer().analyze(tree).metrics()
+        metrics['Lines of Code'] = len(source.splitlines())
+        for key, value in metrics.items():
+            totals[key] = totals.get(key, 0) + value
+    return len(corpus.trees), 'files'
+
+
+def bench_units(corpus):
+    units = 0
+    for (path, _), data, tree in zip(corpus.sources, corpus.data, corpus.trees):
+        units += len(module_metrics(tree, data, path))
+    return units, 'units'
+
+
+def bench_aggregate(corpus):
+    project = ProjectMetrics('.')
+    project.files = corpus.unit_metrics
+    project.finalize()
+    project.report()
+    return len(project), 'units'
+
+
+def bench_filter(corpus):
+    index = SubstringIndex(corpus.symbols.iter_names())
+    for query in FILTER_QUERIES:
+        for _ in index.iter_matches(query):
+            pass
+    return len(corpus.symbols), 'symbols'
+
+
+def bench_search(corpus):
+    index = SymbolIndex()
+    for (path, _), analysis in zip(corpus.sources, corpus.analyses):
+        index.add_file(path, analysis.symbol_table)
+    index.finalize()
+    for query in FILTER_QUERIES:
+        index.search(query)
+    return len(corpus.symbols), 'symbols'
+
+
+def export_benchmark(extension):
+    def bench(corpus):
+        with tempfile.TemporaryDirectory() as directory:
+            export_symbols(corpus.symbols, os.path.join(directory, 'symbols' + extension))
+        return len(corpus.symbols), 'symbols'
+    bench.__name__ = f"bench_export{extension.replace('.', '_')}"
+    return bench
+
+
+# name: function(corpus) -> (work units, unit name)
+BENCHMARKS = {
+    'parse': bench_parse,
+    'extract': bench_extract,
+    'metrics': bench_metrics,
+    'units': bench_units,
+    'aggregate': bench_aggregate,
+    'filter': bench_filter,
+    'search': bench_search,
+}
+for _extension in EXPORT_FORMATS:
+    BENCHMARKS['export' + _extension] = export_benchmark(_extension)
+
+
+def best_of(func, corpus, repeat, min_time):
+    # At least ``repeat`` runs and ``min_time`` seconds in total, so short benchmarks are not one noisy sample
+    timings = []
+    while len(timings) < repeat or sum(timings) < min_time:
+        start = time.perf_counter()
+        units, unit = func(corpus)
+        timings.append(time.perf_counter() - start)
+    return min(timings), units, unit
+
+
+def calibrate(repeat=5):
+    """Best time of a fixed parse-and-loop workload, the yardstick timings are divided by.
+
+    Baselines store it next to their results, so a run on a faster or slower machine (or a
+    busier one) is compared in units of this loop rather than in seconds.
+    """
+    def workload(_):
+        total = 0
+        for _ in range(20):
+            tree = ast.parse(CALIBRATION_SOURCE)
+            for node in ast.walk(tree):
+                total += len(node._fields)
+        return total, 'nodes'
+    return best_of(workload, None, repeat, 0.2)[0]
+
+
+def run(corpus, names, repeat, min_time=0.5):
+    results = {}
+    for name in names:
+        seconds, units, unit = best_of(BENCHMARKS[name], corpus, repeat, min_time)
+        results[name] = {'seconds': round(seconds, 6), 'units': units, 'unit': unit,
+                         'per_second': round(units / seconds, 1) if seconds else None}
+    return results
+
+
+def machine_scale(document, baseline):
+    # How much slower this run's calibration loop was than the baseline's; 1.0 if either lacks one
+    current = document.get('calibration')
+    previous = (baseline or {}).get('calibration')
+    return current / previous if current and previous else 1.0
+
+
+def compare(results, baseline, threshold, overrides, noise=0.002, scale=1.0):
+    """Regressions as ``(name, current seconds, expected seconds, allowed ratio)``.
+
+    The expected time is the baseline's scaled by ``scale`` (see ``machine_scale``). A benchmark
+    regresses when it is slower than that by more than its threshold and by more than ``noise``
+    seconds; the baseline file's own ``thresholds`` are used before the command-line default.
+    """
+    thresholds = dict(baseline.get('thresholds', {}))
+    thresholds.update(overrides)
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        allowed = 1 + thresholds.get(name, threshold)
+        expected = previous['seconds'] * scale
+        if result['seconds'] > expected * allowed and result['seconds'] - expected > noise:
+            regressions.append((name, result['seconds'], expected, allowed))
+    return regressions
+
+
+def report(results, baseline=None, scale=1.0):
+    out = io.StringIO()
+    previous = (baseline or {}).get('results', {})
+    out.write(f"{'Benchmark':14} {'Seconds':>10} {'Throughput':>22} {'vs baseline':>12}\n")
+    for name, result in results.items():
+        rate = f"{result['per_second']:,.0f} {result['unit']}/s" if result['per_second'] else '-'
+        change = ''
+        if name in previous and previous[name]['seconds']:
+            change = f"{result['seconds'] / (previous[name]['seconds'] * scale) - 1:+.1%}"
+        out.write(f"{name:14} {result['seconds']:10.4f} {rate:>22} {change:>12}\n")
+    return out.getvalue()
+
+
+def parse_overrides(values):
+    overrides = {}
+    for value in values:
+        name, _, ratio = value.partition('=')
+        if name not in BENCHMARKS or not ratio:
+            raise argparse.ArgumentTypeError(f"expected BENCHMARK=RATIO, got {value!r}")
+        overrides[name] = float(ratio)
+    return overrides
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Time parsing, extraction, metrics, filtering and exports on a synthetic corpus.')
+    add_corpus_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=5, help='best of at least N runs per benchmark')
+    parser.add_argument('--min-time', type=float, default=0.5, help='keep repeating until this many seconds')
+    parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS), help='run only these benchmarks')
+    parser.add_argument('-o', '--output', help='write results as JSON')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='baseline JSON to compare against; timings are scaled by the calibration loop, '
+                             'but regenerate it with --save-baseline when changing machine or Python')
+    parser.add_argument('--save-baseline', action='store_true', help='overwrite the baseline with these results')
+    parser.add_argument('--check', action='store_true',
+                        help='exit non-zero when a benchmark regresses against the baseline (otherwise only report)')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown as a fraction of the baseline time (default 0.25)')
+    parser.add_argument('--noise', type=float, default=0.002,
+                        help='ignore slowdowns smaller than this many seconds (default 0.002)')
+    parser.add_argument('--threshold-for', action='append', default=[], metavar='BENCHMARK=RATIO',
+                        help='per-benchmark threshold, e.g. export.xml=0.5')
+    args = parser.parse_args(argv)
+    try:
+        overrides = parse_overrides(args.threshold_for)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    options = corpus_options(args)
+    corpus = Corpus(list(iter_corpus(**options)))
+    names = args.only or list(BENCHMARKS)
+    calibration = calibrate(args.repeat)
+    results = run(corpus, names, args.repeat, args.min_time)
+    # Calibrate again afterwards and keep the best, so a burst of load during either one is absorbed
+    calibration = min(calibration, calibrate(args.repeat))
+    document = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'calibration': round(calibration, 6),
+        'corpus': dict(options, bytes=corpus.bytes, symbols=len(corpus.symbols)),
+        'results': results,
+    }
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline.get('corpus', {}).get('bytes') != corpus.bytes:
+            print('warning: baseline was recorded on a different corpus', file=sys.stderr)
+        if 'calibration' not in baseline:
+            print('warning: baseline has no calibration; comparing raw seconds', file=sys.stderr)
+    scale = machine_scale(document, baseline)
+    print(report(results, baseline, scale), end='')
+    if scale != 1.0:
+        print(f"machine scale x{scale:.2f} (calibration {calibration:.4f}s vs {baseline['calibration']:.4f}s)")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(document, file, indent=2)
+    if args.save_baseline:
+        document['thresholds'] = overrides
+        with open(args.baseline, 'w') as file:
+            json.dump(document, file, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if baseline is not None and args.check:
+        regressions = compare(results, baseline, args.threshold, overrides, args.noise, scale)
+        for name, seconds, expected, allowed in regressions:
+            print(f"REGRESSION {name}: {seconds:.4f}s vs {expected:.4f}s expected (allowed x{allowed:.2f})",
+                  file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+import os
+import sys
+import ast
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import ModuleAnalyzer
+from bench_analysis import make_module, legacy_analysis
+
+
+def retained(func):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memory held by the symbol store versus a list of tuples.')
+    parser.add_argument('--classes', type=int, default=5000, help='generated classes (about 10 symbols each)')
+    args = parser.parse_args(argv)
+
+    tree = ast.parse(make_module(args.classes))
+    # Intern the strings up front so the store is measured in its steady state
+    ModuleAnalyzer().analyze(tree)
+    rows, tuple_bytes, tuple_time = retained(lambda: legacy_analysis(tree)[0])
+    store, store_bytes, store_time = retained(lambda: ModuleAnalyzer().analyze(tree).symbol_table)
+    print(f"{len(rows)} symbols")
+    print(f"list of tuples: {tuple_bytes / len(rows):6.1f} bytes/symbol, {tuple_bytes / 1e6:6.2f} MB")
+    print(f"symbol store:   {store_bytes / len(store):6.1f} bytes/symbol, {store_bytes / 1e6:6.2f} MB "
+          f"({store.nbytes() / 1e6:.2f} MB in columns)")
+    view = store[len(store) // 2:]
+    print(f"half-table slice shares {view.nbytes() / 1e6:.2f} MB without copying")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search import SubstringIndex
+
+WORDS = ['get', 'set', 'value', 'name', 'data', 'process', 'handle', 'config', 'item', 'node',
+         'parse', 'init', 'load', 'save', 'user']
+TYPES = ['Function', 'Class', 'Variable', 'Import']
+FETCH_SIZE = 2000
+
+
+def make_symbol_table(rows, seed=0):
+    rng = random.Random(seed)
+    return [(f"{rng.choice(WORDS)}_{rng.choice(WORDS)}{rng.randrange(1000)}", rng.choice(TYPES),
+             rng.choice(['Global', 'Handler', 'Parser']), i + 1, 140000000000000 + i * 48)
+            for i in range(rows)]
+
+
+def rss_kb():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except OSError:
+        return None
+
+
+def measure_widget(symbol_table):
+    try:
+        from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem, QTableView
+        from models import SymbolTableModel
+    except ImportError:
+        print("PyQt5 not available: skipping QTableWidget/QTableView comparison")
+        return
+    app = QApplication.instance() or QApplication(['bench'])
+    before = rss_kb()
+    view = QTableView()
+    model = SymbolTableModel()
+    model.setSymbols(symbol_table)
+    view.setModel(model)
+    after_model = rss_kb()
+    table = QTableWidget()
+    table.setColumnCount(5)
+    table.setRowCount(len(symbol_table))
+    for i, (name, typ, scope, line, address) in enumerate(symbol_table):
+        table.setItem(i, 0, QTableWidgetItem(name))
+        table.setItem(i, 1, QTableWidgetItem(typ))
+        table.setItem(i, 2, QTableWidgetItem(scope))
+        table.setItem(i, 3, QTableWidgetItem(str(line)))
+        table.setItem(i, 4, QTableWidgetItem(str(address)))
+    after_widget = rss_kb()
+    print(f"RSS model/view:      +{after_model - before} KB")
+    print(f"RSS QTableWidget:    +{after_widget - after_model} KB")
+    app.processEvents()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memory and per-keystroke filter cost of the symbol table model.')
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--query', default='process_name', help='typed one character at a time')
+    args = parser.parse_args(argv)
+
+    symbol_table = make_symbol_table(args.rows)
+    tracemalloc.start()
+    snapshot = tracemalloc.get_traced_memory()[0]
+    index = SubstringIndex([row[0] for row in symbol_table])
+    print(f"{args.rows} rows, name index: {(tracemalloc.get_traced_memory()[0] - snapshot) // 1024} KB")
+    tracemalloc.stop()
+
+    for length in range(1, len(args.query) + 1):
+        needle = args.query[:length]
+        start = time.perf_counter()
+        first_batch = list(islice(index.iter_matches(needle), FETCH_SIZE))
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        total = sum(1 for _ in index.iter_matches(needle))
+        full = time.perf_counter() - start
+        print(f"{needle!r:16} first batch {first * 1000:6.2f} ms ({len(first_batch)} rows), "
+              f"all {total} rows {full * 1000:7.1f} ms")
+
+    measure_widget(symbol_table)
+
+
+if __name__ == '__main__':
+    main()
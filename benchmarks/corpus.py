@@ -0,0 +1,121 @@
+import os
+import sys
+import random
+import argparse
+
+STDLIB_IMPORTS = ['os', 'sys', 're', 'json', 'itertools', 'functools', 'collections', 'typing', 'pathlib']
+
+
+def _block(rng, depth, indent, counter):
+    """Nested control flow ``depth`` levels deep; returns source lines."""
+    pad = '    ' * indent
+    counter[0] += 1
+    n = counter[0]
+    if depth <= 0:
+        return [f"{pad}value_{n} = [item * 2 for item in items if item]",
+                f"{pad}total += len(value_{n}) or 1"]
+    kind = rng.randrange(4)
+    if kind == 0:
+        head = [f"{pad}for index_{n} in range(total + {n}):"]
+    elif kind == 1:
+        head = [f"{pad}if total > {n} and items or not mapping:"]
+    elif kind == 2:
+        head = [f"{pad}while total < {n}:", f"{pad}    total += 1"]
+    else:
+        body = _block(rng, depth - 1, indent + 1, counter)
+        return ([f"{pad}try:"] + body +
+                [f"{pad}except (KeyError, ValueError) as error_{n}:", f"{pad}    total -= 1"])
+    return head + _block(rng, depth - 1, indent + 1, counter)
+
+
+def make_module(rng, index, num_files, functions=20, depth=3, import_density=0.3, package='corpus'):
+    """Source of one synthetic module.
+
+    ``functions`` is the number of functions and methods, ``depth`` the nesting depth of their
+    bodies, and ``import_density`` the chance of importing each of a handful of sibling modules.
+    """
+    lines = [f'"""Synthetic module {index}."""']
+    for name in rng.sample(STDLIB_IMPORTS, 3):
+        lines.append(f"import {name}")
+    for other in rng.sample(range(num_files), min(num_files, 10)):
+        if other != index and rng.random() < import_density:
+            lines.append(f"from {package}.module_{other} import helper_{other}_0")
+    lines.append(f"LIMIT_{index} = {index}")
+    counter = [0]
+    emitted = 0
+    class_index = 0
+    while emitted < functions:
+        methods = min(rng.randint(1, 4), functions - emitted)
+        if rng.random() < 0.5:
+            lines.append('')
+            lines.append(f"class Generated{index}_{class_index}(object):")
+            lines.append(f'    """Generated class {class_index}."""')
+            lines.append(f"    limit = {class_index}")
+            for method in range(methods):
+                lines.append('')
+                lines.append(f"    def method_{method}(self, items, mapping=None):")
+                lines.append('        total = 0')
+                lines.extend(_block(rng, depth, 2, counter))
+                lines.append('        return total')
+            class_index += 1
+        else:
+            for _ in range(methods):
+                lines.append('')
+                lines.append(f"def helper_{index}_{emitted}(items, mapping=None):")
+                lines.append('    total = 0')
+                lines.extend(_block(rng, depth, 1, counter))
+                lines.append('    return total')
+                emitted += 1
+            continue
+        emitted += methods
+    lines.append('')
+    return "\n".join(lines)
+
+
+def iter_corpus(files=50, functions=20, depth=3, import_density=0.3, seed=0, package='corpus'):
+    """Yield ``(relative path, source)`` for a deterministic synthetic package."""
+    rng = random.Random(seed)
+    for index in range(files):
+        yield (os.path.join(package, f"module_{index}.py"),
+               make_module(rng, index, files, functions, depth, import_density, package))
+
+
+def write_corpus(root, **options):
+    package = options.get('package', 'corpus')
+    os.makedirs(os.path.join(root, package), exist_ok=True)
+    with open(os.path.join(root, package, '__init__.py'), 'w') as file:
+        file.write('')
+    total = 0
+    for path, source in iter_corpus(**options):
+        with open(os.path.join(root, path), 'w') as file:
+            file.write(source)
+        total += len(source)
+    return total
+
+
+def add_corpus_arguments(parser):
+    parser.add_argument('--files', type=int, default=50, help='number of modules')
+    parser.add_argument('--functions', type=int, default=20, help='functions and methods per module')
+    parser.add_argument('--depth', type=int, default=3, help='nesting depth of function bodies')
+    parser.add_argument('--import-density', type=float, default=0.3,
+                        help='chance of importing each of up to 10 sibling modules')
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def corpus_options(args):
+    return {'files': args.files, 'functions': args.functions, 'depth': args.depth,
+            'import_density': args.import_density, 'seed': args.seed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic Python package for benchmarking.')
+    parser.add_argument('root')
+    add_corpus_arguments(parser)
+    args = parser.parse_args(argv)
+    total = write_corpus(args.root, **corpus_options(args))
+    print(f"wrote {args.files} modules, {total / 1e6:.2f} MB, to {args.root}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    symbols BLOB NOT NULL,
+    metrics TEXT NOT NULL,
+    nbytes INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_last_used ON files (last_used);
+"""
+
+
+def content_digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class CacheEntry:
+    __slots__ = ('symbols', 'metrics')
+
+    def __init__(self, symbols, metrics):
+        self.symbols = symbols
+        self.metrics = metrics
+
+
+class SymbolCache:
+    """SQLite store of extracted symbol rows and metrics, keyed by path and content digest.
+
+    A file whose mtime and size match its entry is served without being read; otherwise its
+    content is hashed and the entry is kept only if the digest still matches.
+    Entries are evicted least recently used first once the stored payload exceeds ``max_bytes``.
+    """
+
+    def __init__(self, db_path, max_bytes=DEFAULT_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            self.connection.execute('DROP TABLE IF EXISTS files')
+            self.connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.connection.executescript(SCHEMA)
+        self.total_bytes = self.connection.execute('SELECT COALESCE(SUM(nbytes), 0) FROM files').fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self._touched = []
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def lookup(self, path, stat=None):
+        path = os.path.abspath(path)
+        row = self.connection.execute(
+            'SELECT mtime_ns, size, digest, symbols, metrics FROM files WHERE path = ?', (path,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        mtime_ns, size, stored_digest, symbols, metrics = row
+        if stat is None:
+            stat = os.stat(path)
+        if (mtime_ns, size) != (stat.st_mtime_ns, stat.st_size):
+            with open(path, 'rb') as file:
+                digest = content_digest(file.read())
+            if digest != stored_digest:
+                self.misses += 1
+                return None
+            self.connection.execute('UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?',
+                                    (stat.st_mtime_ns, stat.st_size, path))
+        self.hits += 1
+        self._touched.append((time.time(), path))
+        return CacheEntry([tuple(row) for row in json.loads(zlib.decompress(symbols))], json.loads(metrics))
+
+    def store(self, path, mtime_ns, size, digest, symbols, metrics):
+        path = os.path.abspath(path)
+        payload = zlib.compress(json.dumps(symbols, separators=(',', ':')).encode('utf-8'))
+        metrics = json.dumps(metrics)
+        nbytes = len(payload) + len(metrics) + len(path)
+        previous = self.connection.execute('SELECT nbytes FROM files WHERE path = ?', (path,)).fetchone()
+        if previous is not None:
+            self.total_bytes -= previous[0]
+        self.connection.execute(
+            'INSERT OR REPLACE INTO files (path, mtime_ns, size, digest, symbols, metrics, nbytes, last_used) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (path, mtime_ns, size, digest, payload, metrics, nbytes, time.time()))
+        self.total_bytes += nbytes
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def invalidate(self, path):
+        path = os.path.abspath(path)
+        row = self.connection.execute('SELECT nbytes FROM files WHERE path = ?', (path,)).fetchone()
+        if row is not None:
+            self.connection.execute('DELETE FROM files WHERE path = ?', (path,))
+            self.total_bytes -= row[0]
+
+    def prune(self, root):
+        root = os.path.join(os.path.abspath(root), '')
+        paths = [path for (path,) in self.connection.execute(
+            'SELECT path FROM files WHERE substr(path, 1, ?) = ?', (len(root), root))]
+        removed = 0
+        for path in paths:
+            if not os.path.exists(path):
+                self.invalidate(path)
+                removed += 1
+        return removed
+
+    def evict(self):
+        self.flush()
+        target = self.max_bytes * 0.9
+        cursor = self.connection.execute('SELECT path, nbytes FROM files ORDER BY last_used')
+        doomed = []
+        for path, nbytes in cursor:
+            if self.total_bytes <= target:
+                break
+            doomed.append((path,))
+            self.total_bytes -= nbytes
+        self.connection.executemany('DELETE FROM files WHERE path = ?', doomed)
+
+    def flush(self):
+        if self._touched:
+            self.connection.executemany('UPDATE files SET last_used = ? WHERE path = ?', self._touched)
+            self._touched = []
+        self.connection.commit()
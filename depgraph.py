@@ -0,0 +1,491 @@
+import os
+import sys
+import ast
+import time
+import pickle
+import argparse
+import multiprocessing
+from array import array
+from collections import deque
+from functools import lru_cache
+
+from indexer import iter_python_files
+
+GRAPH_VERSION = 2
+STATEMENT_FIELDS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+
+
+@lru_cache(maxsize=64)
+def _name_root(root):
+    root = os.path.abspath(root)
+    return os.path.dirname(root) if os.path.isfile(os.path.join(root, '__init__.py')) else root
+
+
+def module_name(file_path, root):
+    """Dotted name of ``file_path``; when ``root`` is itself a package its name is the first part.
+
+    So ``root/__init__.py`` is the package named after the directory rather than an empty
+    name, and relative imports inside it resolve against that name.
+    """
+    relative = os.path.relpath(os.path.abspath(file_path), _name_root(root))
+    parts = relative[:-3].split(os.sep)
+    if parts[-1] == '__init__':
+        parts.pop()
+    return '.'.join(parts)
+
+
+def resolve_import(package, imported, level):
+    """Absolute module named by ``from <level dots><imported> import ...`` inside ``package``.
+
+    None when the dots climb above the top of the project, which is not a module at all.
+    """
+    if not level:
+        return imported
+    base = package.split('.') if package else []
+    if level - 1 > len(base):
+        return None
+    base = base[:len(base) - (level - 1)]
+    return '.'.join(base + ([imported] if imported else []))
+
+
+def iter_imports(tree):
+    """Yield ``(module, names, level, at_import_time)`` for every import statement in a tree.
+
+    Imports inside function bodies only run when the function is called, so they are reported
+    with ``at_import_time`` false; everything else runs when the module is imported.
+    """
+    stack = [(child, True) for child in reversed(tree.body)]
+    while stack:
+        node, eager = stack.pop()
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.name, (), 0, eager
+            continue
+        if isinstance(node, ast.ImportFrom):
+            yield node.module or '', tuple(alias.name for alias in node.names), node.level, eager
+            continue
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            eager = False
+        # Imports are statements, so only statement blocks need to be searched
+        for field in STATEMENT_FIELDS:
+            block = getattr(node, field, None)
+            if block:
+                stack.extend((child, eager) for child in reversed(block))
+
+
+def read_imports(file_path):
+    try:
+        with open(file_path, 'rb') as file:
+            tree = ast.parse(file.read(), file_path)
+        mtime = os.stat(file_path).st_mtime_ns
+    except (SyntaxError, ValueError, OSError):
+        return file_path, None, None
+    return file_path, list(iter_imports(tree)), mtime
+
+
+class ImportGraph:
+    """Module import graph of a project with a CSR adjacency index.
+
+    Module ``i`` imports ``targets[offsets[i]:offsets[i + 1]]``; ``eager`` holds a 1 for edges
+    taken at import time. A reverse index built the same way answers "who imports this". When a
+    single module changes, its new edges go to an overlay that queries consult before the CSR
+    arrays, and the arrays are only rebuilt once the overlay grows past ``compact_ratio`` of
+    the modules, so updates stay cheap on large trees.
+    """
+
+    def __init__(self, root, compact_ratio=0.05):
+        self.root = os.path.abspath(root)
+        self.compact_ratio = compact_ratio
+        self.names = []
+        self.ids = {}
+        self.paths = []
+        self.mtimes = []
+        self.raw = []
+        # imported absolute name -> ids of modules whose import of it did not resolve in the project
+        self.unresolved = {}
+        self._build_csr([])
+
+    def __len__(self):
+        return len(self.names)
+
+    # Construction
+
+    @classmethod
+    def build(cls, root, workers=None, chunksize=32):
+        graph = cls(root)
+        files = list(iter_python_files(graph.root))
+        for file_path in files:
+            graph._add_module(file_path)
+        if workers == 1:
+            results = map(read_imports, files)
+            graph._set_all(results)
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                graph._set_all(pool.imap_unordered(read_imports, files, chunksize))
+        return graph
+
+    def _set_all(self, results):
+        edges = [None] * len(self.names)
+        for file_path, imports, mtime in results:
+            module = self.ids[module_name(file_path, self.root)]
+            self.raw[module] = imports or []
+            self.mtimes[module] = mtime
+            edges[module] = self._resolve_all(module, self.raw[module])
+        self._build_csr(edges)
+
+    def _add_module(self, file_path):
+        name = module_name(file_path, self.root)
+        module = self.ids.get(name)
+        if module is None:
+            module = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.paths.append(file_path)
+            self.mtimes.append(None)
+            self.raw.append([])
+        return module
+
+    def _package(self, module):
+        name = self.names[module]
+        if os.path.basename(self.paths[module]) == '__init__.py':
+            return name
+        return name.rpartition('.')[0]
+
+    def _lookup(self, module, name):
+        # Deepest project module named by ``name``; ``import a.b.c`` with no a/b/c.py resolves to a.b
+        while name:
+            target = self.ids.get(name)
+            if target is not None:
+                return target
+            self.unresolved.setdefault(name, set()).add(module)
+            name = name.rpartition('.')[0]
+        return None
+
+    def _resolve(self, module, imported, names, level):
+        imported = resolve_import(self._package(module), imported, level)
+        if imported is None:
+            return []
+        targets = []
+        for name in names:
+            if name != '*':
+                submodule = f"{imported}.{name}" if imported else name
+                target = self.ids.get(submodule)
+                if target is None:
+                    self.unresolved.setdefault(submodule, set()).add(module)
+                else:
+                    targets.append(target)
+        if not targets and imported:
+            target = self._lookup(module, imported)
+            if target is not None:
+                targets.append(target)
+        return targets
+
+    def _resolve_all(self, module, imports):
+        edges = {}
+        for imported, names, level, eager in imports:
+            for target in self._resolve(module, imported, names, level):
+                if target != module:
+                    edges[target] = edges.get(target, False) or eager
+        return sorted(edges.items())
+
+    def _build_csr(self, edges):
+        offsets = array('L', [0])
+        targets = array('L')
+        eager = bytearray()
+        for module_edges in edges:
+            for target, at_import_time in module_edges or ():
+                targets.append(target)
+                eager.append(at_import_time)
+            offsets.append(len(targets))
+        self.offsets, self.targets, self.eager = offsets, targets, eager
+
+        counts = array('L', [0]) * (len(edges) + 1)
+        for target in targets:
+            counts[target + 1] += 1
+        for i in range(len(edges)):
+            counts[i + 1] += counts[i]
+        sources = array('L', [0]) * len(targets)
+        fill = array('L', counts[:-1])
+        for source in range(len(edges)):
+            for position in range(offsets[source], offsets[source + 1]):
+                target = targets[position]
+                sources[fill[target]] = source
+                fill[target] += 1
+        self.reverse_offsets, self.sources = counts, sources
+        self._overlay = {}
+        self._reverse_added = {}
+        self._reverse_removed = {}
+
+    def compact(self):
+        self._build_csr([self.edges(module) for module in range(len(self.names))])
+
+    # Incremental updates
+
+    def update_file(self, file_path, source=None):
+        """Re-read one file's imports and patch the index; returns the module id.
+
+        ``source`` may be given to use unsaved editor text instead of the file on disk.
+        """
+        file_path = os.path.abspath(file_path)
+        is_new = module_name(file_path, self.root) not in self.ids
+        module = self._add_module(file_path)
+        try:
+            if source is None:
+                _, imports, mtime = read_imports(file_path)
+            else:
+                imports, mtime = list(iter_imports(ast.parse(source, file_path))), None
+        except (SyntaxError, ValueError):
+            imports, mtime = None, None
+        if imports is None:
+            # Keep the last good edges while the file does not parse
+            return module
+        for modules in self.unresolved.values():
+            modules.discard(module)
+        self.raw[module] = imports
+        self.mtimes[module] = mtime
+        self._set_edges(module, self._resolve_all(module, imports))
+        if is_new:
+            self._reresolve_importers_of(self.names[module])
+        return module
+
+    def remove_file(self, file_path):
+        module = self.ids.get(module_name(os.path.abspath(file_path), self.root))
+        if module is None:
+            return
+        self.raw[module] = []
+        self.mtimes[module] = None
+        self._set_edges(module, [])
+        importers = list(self.importers(module))
+        # The id stays allocated so existing ids remain valid; the name no longer resolves
+        del self.ids[self.names[module]]
+        for importer in importers:
+            self._set_edges(importer, self._resolve_all(importer, self.raw[importer]))
+
+    def _reresolve_importers_of(self, name):
+        affected = set()
+        for imported, modules in self.unresolved.items():
+            if imported == name or imported.startswith(name + '.') or name.startswith(imported + '.'):
+                affected.update(modules)
+        for importer in affected:
+            self._set_edges(importer, self._resolve_all(importer, self.raw[importer]))
+
+    def _set_edges(self, module, edges):
+        old = {target for target, _ in self.edges(module)}
+        new = {target for target, _ in edges}
+        for target in old - new:
+            self._reverse_removed.setdefault(target, set()).add(module)
+            self._reverse_added.get(target, set()).discard(module)
+        for target in new - old:
+            self._reverse_added.setdefault(target, set()).add(module)
+            self._reverse_removed.get(target, set()).discard(module)
+        self._overlay[module] = edges
+        if len(self._overlay) > self.compact_ratio * len(self.names):
+            self.compact()
+
+    def refresh(self):
+        """Bring the graph up to date with the files under the root by modification time."""
+        seen = set()
+        changed = 0
+        for file_path in iter_python_files(self.root):
+            name = module_name(file_path, self.root)
+            seen.add(name)
+            module = self.ids.get(name)
+            if module is not None:
+                try:
+                    if os.stat(file_path).st_mtime_ns == self.mtimes[module]:
+                        continue
+                except OSError:
+                    continue
+            self.update_file(file_path)
+            changed += 1
+        for name in [name for name in self.ids if name not in seen]:
+            self.remove_file(self.paths[self.ids[name]])
+            changed += 1
+        return changed
+
+    # Queries
+
+    def module(self, name):
+        return self.ids[name]
+
+    def edges(self, module):
+        edges = self._overlay.get(module)
+        if edges is not None:
+            return edges
+        if module + 1 >= len(self.offsets):
+            return []
+        start, end = self.offsets[module], self.offsets[module + 1]
+        return list(zip(self.targets[start:end], self.eager[start:end]))
+
+    def imports(self, module, at_import_time=False):
+        if module in self._overlay:
+            return [target for target, eager in self._overlay[module] if eager or not at_import_time]
+        if module + 1 >= len(self.offsets):
+            return []
+        start, end = self.offsets[module], self.offsets[module + 1]
+        if not at_import_time:
+            return self.targets[start:end]
+        return [self.targets[i] for i in range(start, end) if self.eager[i]]
+
+    def importers(self, module):
+        if module + 1 < len(self.reverse_offsets):
+            base = self.sources[self.reverse_offsets[module]:self.reverse_offsets[module + 1]]
+        else:
+            base = ()
+        removed = self._reverse_removed.get(module)
+        added = self._reverse_added.get(module)
+        if not removed and not added:
+            return base
+        result = [source for source in base if not removed or source not in removed]
+        if added:
+            result.extend(source for source in added if source not in result)
+        return result
+
+    def _reachable(self, start, neighbours):
+        seen = bytearray(len(self.names))
+        seen[start] = 1
+        queue = deque([start])
+        order = []
+        while queue:
+            for neighbour in neighbours(queue.popleft()):
+                if not seen[neighbour]:
+                    seen[neighbour] = 1
+                    order.append(neighbour)
+                    queue.append(neighbour)
+        return order
+
+    def dependencies(self, module):
+        return self._reachable(module, self.imports)
+
+    def dependents(self, module):
+        """Every module that imports ``module`` directly or transitively."""
+        return self._reachable(module, self.importers)
+
+    def fan_out(self, module):
+        """Number of project modules executed when ``module`` is imported."""
+        return len(self._reachable(module, lambda source: self.imports(source, at_import_time=True)))
+
+    def cycles(self, at_import_time=False):
+        """Strongly connected components with more than one module, largest first (Tarjan, iterative)."""
+        count = len(self.names)
+        index = array('l', [-1]) * count
+        low = array('L', [0]) * count
+        on_stack = bytearray(count)
+        stack = []
+        components = []
+        counter = 0
+        for root in range(count):
+            if index[root] != -1:
+                continue
+            work = [(root, iter(self.imports(root, at_import_time)))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            while work:
+                node, neighbours = work[-1]
+                for neighbour in neighbours:
+                    if index[neighbour] == -1:
+                        index[neighbour] = low[neighbour] = counter
+                        counter += 1
+                        stack.append(neighbour)
+                        on_stack[neighbour] = 1
+                        work.append((neighbour, iter(self.imports(neighbour, at_import_time))))
+                        break
+                    if on_stack[neighbour]:
+                        low[node] = min(low[node], index[neighbour])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = 0
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1:
+                            components.append(component)
+        components.sort(key=len, reverse=True)
+        return components
+
+    # Persistence
+
+    def save(self, file_path):
+        self.compact()
+        state = {
+            'version': GRAPH_VERSION, 'root': self.root, 'names': self.names, 'paths': self.paths,
+            'mtimes': self.mtimes, 'raw': self.raw, 'removed': [name for name in self.names if name not in self.ids],
+            'offsets': self.offsets, 'targets': self.targets, 'eager': self.eager,
+        }
+        with open(file_path, 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, 'rb') as file:
+            state = pickle.load(file)
+        if state.get('version') != GRAPH_VERSION:
+            raise ValueError('import graph cache was written by an incompatible version')
+        graph = cls(state['root'])
+        graph.names, graph.paths, graph.mtimes, graph.raw = state['names'], state['paths'], state['mtimes'], state['raw']
+        removed = set(state['removed'])
+        graph.ids = {name: module for module, name in enumerate(graph.names) if name not in removed}
+        offsets, targets, eager = state['offsets'], state['targets'], state['eager']
+        graph._build_csr([list(zip(targets[offsets[i]:offsets[i + 1]], eager[offsets[i]:offsets[i + 1]]))
+                          for i in range(len(graph.names))])
+        # Unresolved names are only needed for incremental updates; recompute them from the raw imports
+        for module, imports in enumerate(graph.raw):
+            if graph.names[module] in graph.ids:
+                graph._resolve_all(module, imports)
+        return graph
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import graph queries over a Python project.')
+    parser.add_argument('root', help='project directory; module names are relative to it')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--graph-cache', help='pickle file to load, refresh and save the graph')
+    parser.add_argument('--cycles', action='store_true', help='list import cycles')
+    parser.add_argument('--eager', action='store_true', help='only follow imports executed at import time')
+    parser.add_argument('--dependents', metavar='MODULE', help='modules that import MODULE transitively')
+    parser.add_argument('--dependencies', metavar='MODULE', help='modules MODULE imports transitively')
+    parser.add_argument('--fan-out', type=int, metavar='N', help='the N modules that execute the most project modules on import')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.graph_cache and os.path.exists(args.graph_cache):
+        graph = ImportGraph.load(args.graph_cache)
+        changed = graph.refresh()
+        print(f"Loaded {len(graph)} modules, {changed} changed", file=sys.stderr)
+    else:
+        graph = ImportGraph.build(args.root, args.workers)
+    if args.graph_cache:
+        graph.save(args.graph_cache)
+    print(f"Graph of {len(graph.ids)} modules and {len(graph.targets)} imports ready in "
+          f"{time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+    try:
+        if args.cycles:
+            for component in graph.cycles(args.eager):
+                print(f"{len(component)}: " + ' '.join(sorted(graph.names[module] for module in component)))
+        if args.dependents:
+            for module in graph.dependents(graph.module(args.dependents)):
+                print(graph.names[module])
+        if args.dependencies:
+            for module in graph.dependencies(graph.module(args.dependencies)):
+                print(graph.names[module])
+        if args.fan_out:
+            counts = sorted(((graph.fan_out(graph.ids[name]), name) for name in graph.ids), reverse=True)
+            for count, name in counts[:args.fan_out]:
+                print(f"{count:6d} {name}")
+    except KeyError as e:
+        print(f"unknown module {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+import os
+import sys
+import ast
+import json
+import time
+import hashlib
+import argparse
+import multiprocessing
+from html import escape
+
+from indexer import iter_python_files
+from depgraph import module_name
+
+DOCS_VERSION = 1
+MANIFEST = '.docs-manifest.json'
+EXTENSIONS = {'markdown': '.md', 'html': '.html'}
+HTML_STYLE = ('body{font-family:sans-serif;max-width:60em;margin:auto;padding:1em}'
+              'code,pre{background:#f4f4f4}pre{padding:.5em;white-space:pre-wrap}'
+              '.sig{font-family:monospace;font-weight:bold}.item{margin-left:2em}')
+
+
+class DocItem:
+    __slots__ = ('qualname', 'name', 'kind', 'signature', 'docstring', 'line', 'depth')
+
+    def __init__(self, qualname, name, kind, signature, docstring, line, depth):
+        self.qualname = qualname
+        self.name = name
+        self.kind = kind
+        self.signature = signature
+        self.docstring = docstring
+        self.line = line
+        self.depth = depth
+
+    def __reduce__(self):
+        return DocItem, (self.qualname, self.name, self.kind, self.signature, self.docstring, self.line, self.depth)
+
+
+def _argument(arg, default=None):
+    text = arg.arg
+    if arg.annotation is not None:
+        text += f": {ast.unparse(arg.annotation)}"
+    if default is not None:
+        text += f" = {ast.unparse(default)}" if arg.annotation is not None else f"={ast.unparse(default)}"
+    return text
+
+
+def format_arguments(args):
+    positional = args.posonlyargs + args.args
+    defaults = [None] * (len(positional) - len(args.defaults)) + args.defaults
+    parts = []
+    for position, (arg, default) in enumerate(zip(positional, defaults)):
+        parts.append(_argument(arg, default))
+        if args.posonlyargs and position == len(args.posonlyargs) - 1:
+            parts.append('/')
+    if args.vararg is not None:
+        parts.append('*' + _argument(args.vararg))
+    elif args.kwonlyargs:
+        parts.append('*')
+    parts.extend(_argument(arg, default) for arg, default in zip(args.kwonlyargs, args.kw_defaults))
+    if args.kwarg is not None:
+        parts.append('**' + _argument(args.kwarg))
+    return ', '.join(parts)
+
+
+def _signature(node):
+    decorators = ''.join(f"@{ast.unparse(decorator)}\n" for decorator in node.decorator_list)
+    if isinstance(node, ast.ClassDef):
+        bases = [ast.unparse(base) for base in node.bases] + [ast.unparse(keyword) for keyword in node.keywords]
+        return f"{decorators}class {node.name}" + (f"({', '.join(bases)})" if bases else '')
+    prefix = 'async def' if isinstance(node, ast.AsyncFunctionDef) else 'def'
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns is not None else ''
+    return f"{decorators}{prefix} {node.name}({format_arguments(node.args)}){returns}"
+
+
+def iter_docs(tree, module):
+    """Yield the module, then its classes, functions and methods in source order, keyed by qualified name.
+
+    Functions defined inside other functions are implementation details and are skipped, as
+    pydoc does.
+    """
+    yield DocItem(module, module, 'module', '', ast.get_docstring(tree) or '', 1, 0)
+    stack = [(node, module, 'module', 1) for node in reversed(tree.body)]
+    while stack:
+        node, prefix, parent_kind, depth = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            qualname = f"{prefix}.{node.name}"
+            if isinstance(node, ast.ClassDef):
+                kind = 'class'
+            else:
+                kind = 'method' if parent_kind == 'class' else 'function'
+            yield DocItem(qualname, node.name, kind, _signature(node), ast.get_docstring(node) or '', node.lineno, depth)
+            if kind == 'class':
+                stack.extend((child, qualname, kind, depth + 1) for child in reversed(node.body))
+            continue
+        # Definitions under if/try at module or class level are still public API
+        for field in ('body', 'orelse', 'finalbody', 'handlers'):
+            block = getattr(node, field, None)
+            if block:
+                stack.extend((child, prefix, parent_kind, depth) for child in reversed(block))
+
+
+def module_docs(tree, module):
+    return list(iter_docs(tree, module))
+
+
+def render_markdown(items):
+    lines = []
+    for item in items:
+        if item.kind == 'module':
+            lines.append(f"# Module `{item.qualname}`")
+        else:
+            heading = '#' * min(2 + item.depth, 6)
+            lines.append(f"{heading} {item.kind} `{item.qualname}`")
+            lines.append('')
+            lines.append('```python')
+            lines.append(item.signature)
+            lines.append('```')
+        lines.append('')
+        if item.docstring:
+            lines.append(item.docstring)
+            lines.append('')
+    return "\n".join(lines)
+
+
+def render_html(items, title=None):
+    title = title or (items[0].qualname if items else 'Documentation')
+    parts = [f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{escape(title)}</title>'
+             f'<style>{HTML_STYLE}</style></head><body>']
+    for item in items:
+        docstring = f"<pre>{escape(item.docstring)}</pre>" if item.docstring else ''
+        if item.kind == 'module':
+            parts.append(f'<h1 id="{escape(item.qualname)}">Module {escape(item.qualname)}</h1>{docstring}')
+            continue
+        level = min(2 + item.depth, 6)
+        parts.append(f'<div class="item" id="{escape(item.qualname)}"><h{level}>{escape(item.kind)} '
+                     f'{escape(item.qualname)}</h{level}><div class="sig">{escape(item.signature).replace(chr(10), "<br>")}'
+                     f'</div>{docstring}</div>')
+    parts.append('</body></html>')
+    return "\n".join(parts) + "\n"
+
+
+def render(items, output_format):
+    if output_format == 'html':
+        return render_html(items)
+    return render_markdown(items)
+
+
+def source_digest(data, output_format):
+    return hashlib.blake2b(data + f"\0{output_format}\0{DOCS_VERSION}".encode('ascii'), digest_size=16).hexdigest()
+
+
+def document_file(file_path, root, output_format):
+    """Worker entry point: ``(path, module, rendered text or None, error)``."""
+    module = module_name(file_path, root)
+    try:
+        with open(file_path, 'rb') as file:
+            tree = ast.parse(file.read(), file_path)
+    except (SyntaxError, ValueError, OSError) as e:
+        return file_path, module, None, f"{type(e).__name__}: {e}"
+    return file_path, module, render(module_docs(tree, module), output_format), None
+
+
+def _document_in_root(args):
+    return document_file(*args)
+
+
+class DocBuilder:
+    """Renders documentation for every module under a root into one file per module.
+
+    Only modules whose source hash (plus output format) differs from the manifest written by
+    the previous run are parsed and rendered, in a process pool; an index page links them all.
+    """
+
+    def __init__(self, root, output_dir, output_format='html'):
+        self.root = os.path.abspath(root)
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.extension = EXTENSIONS[output_format]
+        self.manifest_path = os.path.join(output_dir, MANIFEST)
+        try:
+            with open(self.manifest_path) as file:
+                self.manifest = json.load(file)
+        except (OSError, ValueError):
+            self.manifest = {}
+        self.written = 0
+        self.skipped = 0
+        self.errors = []
+
+    def output_path(self, module):
+        return os.path.join(self.output_dir, module + self.extension)
+
+    def build(self, workers=None, chunksize=8):
+        os.makedirs(self.output_dir, exist_ok=True)
+        modules = {}
+        pending = []
+        for file_path in iter_python_files(self.root):
+            module = module_name(file_path, self.root)
+            try:
+                with open(file_path, 'rb') as file:
+                    digest = source_digest(file.read(), self.output_format)
+            except OSError:
+                continue
+            modules[module] = digest
+            if self.manifest.get(module) == digest and os.path.exists(self.output_path(module)):
+                self.skipped += 1
+            else:
+                pending.append((file_path, self.root, self.output_format))
+
+        if pending:
+            with multiprocessing.Pool(workers) as pool:
+                for file_path, module, text, error in pool.imap_unordered(_document_in_root, pending, chunksize):
+                    if text is None:
+                        self.errors.append((file_path, error))
+                        modules.pop(module, None)
+                        continue
+                    with open(self.output_path(module), 'w', encoding='utf-8') as file:
+                        file.write(text)
+                    self.written += 1
+
+        for module in set(self.manifest) - set(modules):
+            try:
+                os.remove(self.output_path(module))
+            except OSError:
+                pass
+        self.manifest = modules
+        self.write_index(sorted(modules))
+        with open(self.manifest_path, 'w') as file:
+            json.dump(self.manifest, file, indent=1, sort_keys=True)
+        return self
+
+    def write_index(self, modules):
+        if self.output_format == 'html':
+            links = "\n".join(f'<li><a href="{escape(module + self.extension)}">{escape(module)}</a></li>'
+                              for module in modules)
+            text = (f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Modules</title>'
+                    f'<style>{HTML_STYLE}</style></head><body><h1>Modules</h1><ul>\n{links}\n</ul></body></html>\n')
+        else:
+            text = "# Modules\n\n" + "".join(f"- [{module}]({module}{self.extension})\n" for module in modules)
+        with open(os.path.join(self.output_dir, 'index' + self.extension), 'w', encoding='utf-8') as file:
+            file.write(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render API documentation from source without importing it.')
+    parser.add_argument('root', help='project directory; module names are relative to it')
+    parser.add_argument('-o', '--output', default='docs', help='output directory (default: docs)')
+    parser.add_argument('--format', choices=sorted(EXTENSIONS), default='html')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='number of worker processes')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    builder = DocBuilder(args.root, args.output, args.format).build(args.workers)
+    for file_path, error in builder.errors:
+        print(f"{file_path}: {error}", file=sys.stderr)
+    print(f"{builder.written} modules rendered, {builder.skipped} unchanged, {len(builder.errors)} errors "
+          f"in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,272 @@
+import sys
+import csv
+import json
+import struct
+from array import array
+from itertools import islice
+from xml.sax.saxutils import XMLGenerator
+
+from analysis import SYMBOL_COLUMNS
+from symbols import STRINGS, SymbolStore
+
+CHUNK_SIZE = 4096
+COLUMNAR_MAGIC = b'STBL'
+COLUMNAR_VERSION = 1
+TABLE_MAGIC = b'MTBL'
+TABLE_VERSION = 1
+TABLE_ROW_GROUP = 65536
+
+_quote = json.encoder.encode_basestring_ascii
+
+
+def _chunks(rows, size=CHUNK_SIZE):
+    if isinstance(rows, SymbolStore):
+        yield from rows.chunks(size)
+        return
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_csv(rows, file):
+    writer = csv.writer(file)
+    writer.writerow(SYMBOL_COLUMNS)
+    for chunk in _chunks(rows):
+        writer.writerows(chunk)
+
+
+def write_json(rows, file):
+    # Same layout as json.dump(rows, file, indent=4), one row at a time
+    separator = '\n'
+    file.write('[')
+    for chunk in _chunks(rows):
+        parts = []
+        for name, typ, scope, line, symbol_id in chunk:
+            parts.append(f'{separator}    [\n        {_quote(name)},\n        {_quote(typ)},\n        {_quote(scope)},'
+                         f'\n        {line:d},\n        {symbol_id:d}\n    ]')
+            separator = ',\n'
+        file.write(''.join(parts))
+    file.write('\n]' if separator != '\n' else ']')
+
+
+def write_ndjson(rows, file):
+    for chunk in _chunks(rows):
+        file.write(''.join(f'{{"symbol":{_quote(name)},"type":{_quote(typ)},"scope":{_quote(scope)},'
+                           f'"line":{line:d},"id":{symbol_id:d}}}\n'
+                           for name, typ, scope, line, symbol_id in chunk))
+
+
+def write_xml(rows, file):
+    generator = XMLGenerator(file, encoding='utf-8', short_empty_elements=True)
+    generator.startDocument()
+    generator.startElement('SymbolTable', {})
+    for name, typ, scope, line, symbol_id in rows:
+        generator.startElement('Symbol', {})
+        for tag, value in (('Name', name), ('Type', typ), ('Scope', scope), ('Line', str(line)), ('ID', str(symbol_id))):
+            generator.startElement(tag, {})
+            generator.characters(value)
+            generator.endElement(tag)
+        generator.endElement('Symbol')
+    generator.endElement('SymbolTable')
+    generator.endDocument()
+
+
+def _little_endian(values):
+    if sys.byteorder != 'little':
+        values = array(values.format if isinstance(values, memoryview) else values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _pack_strings(values, strings=None):
+    codes = array('I')
+    ids = {}
+    for value in values:
+        code = ids.get(value)
+        if code is None:
+            code = ids[value] = len(ids)
+        codes.append(code)
+    parts = [struct.pack('<I', len(ids))]
+    for value in ids:
+        if strings is not None:
+            value = strings[value]
+        encoded = value.encode('utf-8')
+        parts.append(struct.pack('<I', len(encoded)))
+        parts.append(encoded)
+    parts.append(_little_endian(codes))
+    return b''.join(parts)
+
+
+def write_columnar(rows, file):
+    """Binary column store: a header, then row groups of dictionary-encoded strings and fixed-width ints.
+
+    Each row group holds up to CHUNK_SIZE rows: ``uint32 rows`` followed by the name, type and
+    scope columns (``uint32 dictionary size``, length-prefixed UTF-8 strings, ``uint32`` codes),
+    ``uint32`` lines and ``uint64`` symbol ids, all little-endian. A zero row count ends the file.
+    """
+    file.write(COLUMNAR_MAGIC + struct.pack('<HH', COLUMNAR_VERSION, len(SYMBOL_COLUMNS)))
+    for column in SYMBOL_COLUMNS:
+        encoded = column.encode('utf-8')
+        file.write(struct.pack('<H', len(encoded)) + encoded)
+    for chunk in _chunks(rows):
+        file.write(struct.pack('<I', len(chunk)))
+        if isinstance(chunk, SymbolStore):
+            # Re-code the interned columns straight from the store's memoryviews
+            file.write(_pack_strings(chunk.names, STRINGS))
+            file.write(_pack_strings(chunk.types, STRINGS))
+            file.write(_pack_strings(chunk.scopes, STRINGS))
+            file.write(_little_endian(chunk.lines))
+            file.write(_little_endian(chunk.ids))
+            continue
+        names, types, scopes, lines, symbol_ids = zip(*chunk)
+        file.write(_pack_strings(names))
+        file.write(_pack_strings(types))
+        file.write(_pack_strings(scopes))
+        file.write(_little_endian(array('I', lines)))
+        file.write(_little_endian(array('Q', symbol_ids)))
+    file.write(struct.pack('<I', 0))
+
+
+def _read_exact(file, size):
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError('truncated columnar symbol table')
+    return data
+
+
+def _read_array(file, typecode, count):
+    values = array(typecode)
+    values.frombytes(_read_exact(file, values.itemsize * count))
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def _read_strings(file, count):
+    (size,) = struct.unpack('<I', _read_exact(file, 4))
+    dictionary = []
+    for _ in range(size):
+        (length,) = struct.unpack('<I', _read_exact(file, 4))
+        dictionary.append(_read_exact(file, length).decode('utf-8'))
+    return [dictionary[code] for code in _read_array(file, 'I', count)]
+
+
+def read_columnar(file):
+    if _read_exact(file, 4) != COLUMNAR_MAGIC:
+        raise ValueError('not a columnar symbol table')
+    version, column_count = struct.unpack('<HH', _read_exact(file, 4))
+    if version != COLUMNAR_VERSION:
+        raise ValueError(f'unsupported columnar symbol table version {version}')
+    for _ in range(column_count):
+        (length,) = struct.unpack('<H', _read_exact(file, 2))
+        _read_exact(file, length)
+    while True:
+        (count,) = struct.unpack('<I', _read_exact(file, 4))
+        if not count:
+            return
+        names = _read_strings(file, count)
+        types = _read_strings(file, count)
+        scopes = _read_strings(file, count)
+        lines = _read_array(file, 'I', count)
+        symbol_ids = _read_array(file, 'Q', count)
+        yield from zip(names, types, scopes, lines, symbol_ids)
+
+
+def write_table_csv(columns, file):
+    """``columns`` is a list of ``(name, values)``; strings are lists, numbers any sequence of ints."""
+    writer = csv.writer(file)
+    writer.writerow([name for name, _ in columns])
+    count = len(columns[0][1]) if columns else 0
+    for start in range(0, count, CHUNK_SIZE):
+        writer.writerows(zip(*(values[start:start + CHUNK_SIZE] for _, values in columns)))
+
+
+def write_table_columnar(columns, file):
+    """Binary column store for arbitrary tables, laid out like ``write_columnar``.
+
+    The header lists each column's name and type: ``s`` for dictionary-encoded strings or an
+    ``array`` typecode for integers, which are written as fixed-width little-endian values.
+    Row groups of up to TABLE_ROW_GROUP rows follow, each column contiguous within the group,
+    so a reader can load one column without decoding the others' strings.
+    """
+    file.write(TABLE_MAGIC + struct.pack('<HH', TABLE_VERSION, len(columns)))
+    for name, values in columns:
+        encoded = name.encode('utf-8')
+        # Integer columns are declared by width so 'L' columns read back the same on every platform
+        typecode = {4: 'I', 8: 'Q'}[values.itemsize] if isinstance(values, array) else 's'
+        file.write(struct.pack('<H', len(encoded)) + encoded + typecode.encode('ascii'))
+    count = len(columns[0][1]) if columns else 0
+    for start in range(0, count, TABLE_ROW_GROUP):
+        end = min(start + TABLE_ROW_GROUP, count)
+        file.write(struct.pack('<I', end - start))
+        for _, values in columns:
+            if isinstance(values, array):
+                file.write(_little_endian(memoryview(values)[start:end]))
+            else:
+                file.write(_pack_strings(values[start:end]))
+    file.write(struct.pack('<I', 0))
+
+
+def read_table_columnar(file):
+    """``{name: values}`` from ``write_table_columnar`` output: lists of strings, ``array`` columns of ints."""
+    if _read_exact(file, 4) != TABLE_MAGIC:
+        raise ValueError('not a columnar table')
+    version, column_count = struct.unpack('<HH', _read_exact(file, 4))
+    if version != TABLE_VERSION:
+        raise ValueError(f'unsupported columnar table version {version}')
+    header = []
+    for _ in range(column_count):
+        (length,) = struct.unpack('<H', _read_exact(file, 2))
+        name = _read_exact(file, length).decode('utf-8')
+        header.append((name, _read_exact(file, 1).decode('ascii')))
+    columns = {name: [] if typecode == 's' else array(typecode) for name, typecode in header}
+    while True:
+        (count,) = struct.unpack('<I', _read_exact(file, 4))
+        if not count:
+            return columns
+        for name, typecode in header:
+            if typecode == 's':
+                columns[name].extend(_read_strings(file, count))
+            else:
+                columns[name].extend(_read_array(file, typecode, count))
+
+
+# extension: (writer, open mode, open keyword arguments)
+EXPORT_FORMATS = {
+    '.csv': (write_csv, 'w', {'newline': ''}),
+    '.json': (write_json, 'w', {}),
+    '.ndjson': (write_ndjson, 'w', {}),
+    '.xml': (write_xml, 'wb', {}),
+    '.stbl': (write_columnar, 'wb', {}),
+}
+
+
+TABLE_EXPORT_FORMATS = {
+    '.csv': (write_table_csv, 'w', {'newline': ''}),
+    '.mtbl': (write_table_columnar, 'wb', {}),
+}
+
+
+def export_format(file_path):
+    for extension in EXPORT_FORMATS:
+        if file_path.endswith(extension):
+            return extension
+    return None
+
+
+def export_symbols(rows, file_path, extension=None):
+    writer, mode, options = EXPORT_FORMATS[extension or export_format(file_path)]
+    with open(file_path, mode, **options) as file:
+        writer(rows, file)
+
+
+def export_table(columns, file_path):
+    for extension, (writer, mode, options) in TABLE_EXPORT_FORMATS.items():
+        if file_path.endswith(extension):
+            with open(file_path, mode, **options) as file:
+                writer(columns, file)
+            return
+    raise ValueError(f"unsupported table format: {file_path} (use {' or '.join(TABLE_EXPORT_FORMATS)})")
@@ -0,0 +1,943 @@
+import os
+import sys
+import ast
+import traceback
+from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                             QFileDialog, QMessageBox, QTableView, QHeaderView, QDialog, QTextEdit,
+                             QLineEdit, QTreeView, QInputDialog, QToolBar,
+                             QProgressBar, QComboBox, QTableWidget, QTableWidgetItem)
+from PyQt5.Qsci import QsciScintilla, QsciLexerPython
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import QTimer
+
+from analysis import analyze_tree, cached_analysis, IncrementalAnalyzer
+from jobs import JobRunner
+from models import SymbolTableModel, ASTTreeModel, MetricsTableModel
+from instrumentation import INSTRUMENTATION
+
+def load_job(job, file_path):
+    from loader import load_source
+    job.report(0, 'Reading file')
+    with INSTRUMENTATION.stage('file read'):
+        source = load_source(file_path)
+    content = source.text
+    INSTRUMENTATION.count('bytes read', source.size)
+    INSTRUMENTATION.count('chars read', len(content))
+    job.report(20, 'Parsing')
+    # The decoded text is parsed as is and handed to the editor, so it is decoded exactly once
+    with INSTRUMENTATION.stage('ast.parse'):
+        tree = ast.parse(content, file_path)
+    # The per-statement index is the symbol table: the module is analyzed once, segment by segment
+    job.report(50, 'Extracting symbols')
+    with INSTRUMENTATION.stage('statement index'):
+        incremental = IncrementalAnalyzer()
+        incremental.reset(content, tree)
+    INSTRUMENTATION.count('symbols emitted', len(incremental.symbol_table))
+    return source, tree, incremental
+
+def extract_symbols_timed(tree):
+    analysis = cached_analysis(tree)
+    if analysis is not None:
+        return analysis
+    with INSTRUMENTATION.stage('process_node'):
+        analysis = analyze_tree(tree)
+    INSTRUMENTATION.count('nodes visited', analysis.nodes_visited)
+    INSTRUMENTATION.count('symbols emitted', len(analysis.symbol_table))
+    return analysis
+
+def index_job(job, root):
+    from indexer import iter_index, iter_python_files
+    from search import SymbolIndex
+    job.report(0, 'Scanning project')
+    total = sum(1 for _ in iter_python_files(root)) or 1
+    results = []
+    for done, result in enumerate(iter_index(root), 1):
+        results.append(result)
+        if done % 50 == 0:
+            job.report(min(90, done * 90 // total), f'Indexed {done} of {total} files')
+    job.report(90, 'Building symbol index')
+    return root, SymbolIndex.from_results(results)
+
+def references_job(job, root):
+    from scopes import ReferenceIndex
+    job.report(0, 'Resolving names')
+
+    def progress(done, total):
+        if done % 50 == 0:
+            job.report(done * 100 // total, f'Resolved {done} of {total} files')
+
+    return ReferenceIndex.build(root, progress=progress)
+
+def find_references_job(job, index, file_path, content, position):
+    job.report(0, 'Resolving names')
+    index.update_file(file_path, content)
+    job.report(50, 'Finding references')
+    qualified = index.at(file_path, *position)
+    if qualified is None:
+        return None
+    return index.canonical(qualified), index.references(qualified)
+
+def project_metrics_job(job, root):
+    from metrics import ProjectMetrics
+    job.report(0, 'Measuring functions')
+
+    def progress(done, total):
+        job.report(done * 95 // total, f'Measured {done} of {total} files')
+
+    project = ProjectMetrics.build(root, progress=progress)
+    job.report(95, 'Aggregating')
+    return project, project.report()
+
+def file_metrics_job(job, file_path, content, tree):
+    from metrics import ProjectMetrics
+    content, tree, analysis = analysis_job(job, content, tree)
+    job.report(60, 'Measuring functions')
+    file_path = file_path or os.path.join(os.getcwd(), '<editor>.py')
+    with INSTRUMENTATION.stage('unit metrics'):
+        project = ProjectMetrics(os.path.dirname(os.path.abspath(file_path)))
+        project.update_file(file_path, content, tree)
+        project.finalize()
+    return content, tree, analysis, project
+
+def table_export_job(job, columns, file_path):
+    from exporters import export_table
+    job.report(0, 'Exporting')
+    with INSTRUMENTATION.stage('export table'):
+        export_table(columns, file_path)
+    return file_path
+
+def export_job(job, rows, file_path, extension):
+    from exporters import export_symbols
+    job.report(0, 'Exporting')
+    with INSTRUMENTATION.stage(f'export {extension}'):
+        export_symbols(rows, file_path, extension)
+    return file_path
+
+def analysis_job(job, content, tree):
+    if tree is None:
+        job.report(0, 'Parsing')
+        with INSTRUMENTATION.stage('ast.parse'):
+            tree = ast.parse(content)
+    job.report(50, 'Analyzing')
+    return content, tree, extract_symbols_timed(tree)
+
+def uml_job(job, content, tree, file_path, renderer, output_dir):
+    from uml import ProjectModel, DiagramWriter
+    content, module, analysis = analysis_job(job, content, tree)
+    job.report(60, 'Building class diagram')
+    model = ProjectModel()
+    name = os.path.splitext(os.path.basename(file_path or 'module.py'))[0]
+    model.add_module(name, module)
+    classes, edges = model.diagram()
+    formats = ('puml', 'svg') + (('png',) if renderer is not None else ())
+    writer = DiagramWriter(output_dir, formats, (renderer,) if renderer is not None else ())
+    with INSTRUMENTATION.stage('uml render'):
+        paths = writer.write(f'{name}_class_diagram', classes, edges)
+    writer.flush()
+    return content, module, analysis, paths, writer.skipped
+
+def documentation_job(job, file_path, content, tree):
+    from docs import module_docs, render_html
+    content, module, analysis = analysis_job(job, content, tree)
+    job.report(60, 'Extracting documentation')
+    with INSTRUMENTATION.stage('documentation'):
+        name = os.path.splitext(os.path.basename(file_path))[0] if file_path else '<editor>'
+        html = render_html(module_docs(module, name))
+    return content, module, analysis, html
+
+class PythonHighlighter(QsciLexerPython):
+    def __init__(self, parent=None):
+        super(PythonHighlighter, self).__init__(parent)
+        self.setDefaultFont(QFont("Courier", 10))
+
+class MetricsDialog(QDialog):
+    KIND_FILTERS = [('All units', None), ('Functions and methods', ('function', 'method')),
+                    ('Functions', ('function',)), ('Methods', ('method',)), ('Classes', ('class',)),
+                    ('Modules', ('module',))]
+
+    def __init__(self, metrics, project=None, on_open=None, on_export=None, parent=None):
+        super().__init__(parent)
+        self.on_open = on_open
+        self.on_export = on_export
+        self.setWindowTitle("Code Metrics")
+        self.setGeometry(100, 100, 400 if project is None else 900, 300 if project is None else 650)
+        layout = QVBoxLayout()
+        self.metricsText = QTextEdit()
+        self.metricsText.setPlainText(metrics)
+        self.metricsText.setReadOnly(True)
+        self.metricsText.setFont(QFont("Courier", 10))
+        layout.addWidget(self.metricsText)
+        self.model = None
+        if project is not None:
+            filter_layout = QHBoxLayout()
+            self.kindBox = QComboBox()
+            self.kindBox.addItems([label for label, _ in self.KIND_FILTERS])
+            self.kindBox.currentIndexChanged.connect(self.filterKinds)
+            filter_layout.addWidget(self.kindBox)
+            for label, extension in (('Export CSV', '.csv'), ('Export Columnar', '.mtbl')):
+                button = QPushButton(label)
+                button.clicked.connect(lambda _, extension=extension: self.exportTable(extension))
+                filter_layout.addWidget(button)
+            layout.addLayout(filter_layout)
+            self.model = MetricsTableModel(project, self)
+            self.table = QTableView()
+            self.table.setModel(self.model)
+            self.table.setSortingEnabled(True)
+            self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+            self.table.verticalHeader().setDefaultSectionSize(self.table.fontMetrics().height() + 6)
+            self.table.doubleClicked.connect(self.openUnit)
+            layout.addWidget(self.table, 3)
+            self.kindBox.setCurrentIndex(1)
+        self.setLayout(layout)
+
+    def filterKinds(self, position):
+        self.model.setKinds(self.KIND_FILTERS[position][1])
+
+    def openUnit(self, index):
+        if self.on_open is not None:
+            self.on_open(self.model.pathAt(index.row()), self.model.lineAt(index.row()))
+
+    def exportTable(self, extension):
+        file_path, _ = QFileDialog.getSaveFileName(self, 'Export Metrics', 'metrics' + extension,
+                                                   f"{extension[1:].upper()} files (*{extension})")
+        if file_path and self.on_export is not None:
+            if not file_path.endswith(extension):
+                file_path += extension
+            self.on_export(self.model.project.table(), file_path)
+
+class ProfilingDialog(QDialog):
+    def __init__(self, instrumentation, parent=None):
+        super().__init__(parent)
+        self.instrumentation = instrumentation
+        self.capture = None
+        self.setWindowTitle("Profiling")
+        self.setGeometry(100, 100, 600, 400)
+        layout = QVBoxLayout()
+        self.statsText = QTextEdit()
+        self.statsText.setReadOnly(True)
+        self.statsText.setFont(QFont("Courier", 10))
+        layout.addWidget(self.statsText)
+        button_layout = QHBoxLayout()
+        self.refreshButton = QPushButton('Refresh')
+        self.refreshButton.clicked.connect(self.refresh)
+        button_layout.addWidget(self.refreshButton)
+        self.resetButton = QPushButton('Reset')
+        self.resetButton.clicked.connect(self.resetStats)
+        button_layout.addWidget(self.resetButton)
+        self.saveButton = QPushButton('Save JSON')
+        self.saveButton.clicked.connect(self.saveJSON)
+        button_layout.addWidget(self.saveButton)
+        self.captureButton = QPushButton('Start Capture')
+        self.captureButton.clicked.connect(self.toggleCapture)
+        button_layout.addWidget(self.captureButton)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+        self.refresh()
+
+    def refresh(self):
+        self.statsText.setPlainText(self.instrumentation.report())
+
+    def resetStats(self):
+        self.instrumentation.reset()
+        self.refresh()
+
+    def saveJSON(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, 'Save Profiling Stats', 'profile.json', 'JSON files (*.json)')
+        if file_path:
+            with open(file_path, 'w') as stats_file:
+                stats_file.write(self.instrumentation.to_json())
+
+    def toggleCapture(self):
+        if self.capture is None:
+            prefix, _ = QFileDialog.getSaveFileName(self, 'Capture Profile To', 'capture')
+            if not prefix:
+                return
+            from instrumentation import ProfileCapture
+            self.capture = ProfileCapture(prefix)
+            self.capture.start()
+            self.captureButton.setText('Stop Capture')
+        else:
+            paths = self.capture.stop()
+            self.capture = None
+            self.captureButton.setText('Start Capture')
+            QMessageBox.information(self, 'Profile Captured', "Wrote:\n" + "\n".join(paths))
+
+    def closeEvent(self, event):
+        if self.capture is not None:
+            self.toggleCapture()
+        super().closeEvent(event)
+
+class DetailedInfoDialog(QDialog):
+    def __init__(self, title, details, html=False):
+        super().__init__()
+        self.setWindowTitle(title)
+        self.setGeometry(100, 100, 400, 300)
+        layout = QVBoxLayout()
+        self.infoText = QTextEdit()
+        if html:
+            self.infoText.setHtml(details)
+        else:
+            self.infoText.setPlainText(details)
+        self.infoText.setReadOnly(True)
+        layout.addWidget(self.infoText)
+        self.setLayout(layout)
+
+class SymbolSearchDialog(QDialog):
+    def __init__(self, index, on_open, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.on_open = on_open
+        self.setWindowTitle("Go to Symbol")
+        self.setGeometry(100, 100, 700, 400)
+        layout = QVBoxLayout()
+        query_layout = QHBoxLayout()
+        self.queryEdit = QLineEdit()
+        self.queryEdit.setPlaceholderText('Symbol name...')
+        self.queryEdit.textChanged.connect(self.runSearch)
+        query_layout.addWidget(self.queryEdit)
+        self.typeCombo = QComboBox()
+        self.typeCombo.addItems(['All types', 'Function', 'Class', 'Variable', 'Import'])
+        self.typeCombo.currentIndexChanged.connect(self.runSearch)
+        query_layout.addWidget(self.typeCombo)
+        self.scopeEdit = QLineEdit()
+        self.scopeEdit.setPlaceholderText('Scope...')
+        self.scopeEdit.textChanged.connect(self.runSearch)
+        query_layout.addWidget(self.scopeEdit)
+        layout.addLayout(query_layout)
+        self.resultsTable = QTableWidget()
+        self.resultsTable.setColumnCount(5)
+        self.resultsTable.setHorizontalHeaderLabels(['Symbol', 'Type', 'Scope', 'File', 'Line'])
+        self.resultsTable.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.resultsTable.itemDoubleClicked.connect(self.openResult)
+        layout.addWidget(self.resultsTable)
+        self.setLayout(layout)
+        self.results = []
+
+    def runSearch(self):
+        typ = self.typeCombo.currentText() if self.typeCombo.currentIndex() else None
+        self.results = self.index.search(self.queryEdit.text(), 100, typ, self.scopeEdit.text())
+        self.resultsTable.setRowCount(len(self.results))
+        for i, (name, typ, scope, path, line) in enumerate(self.results):
+            self.resultsTable.setItem(i, 0, QTableWidgetItem(name))
+            self.resultsTable.setItem(i, 1, QTableWidgetItem(typ))
+            self.resultsTable.setItem(i, 2, QTableWidgetItem(scope))
+            self.resultsTable.setItem(i, 3, QTableWidgetItem(path))
+            self.resultsTable.setItem(i, 4, QTableWidgetItem(str(line)))
+
+    def openResult(self, item):
+        name, typ, scope, path, line = self.results[item.row()]
+        self.on_open(path, line)
+
+class ReferencesDialog(QDialog):
+    def __init__(self, qualified, references, on_open, parent=None):
+        super().__init__(parent)
+        self.references = references
+        self.on_open = on_open
+        self.setWindowTitle(f"References to {qualified}")
+        self.setGeometry(100, 100, 700, 400)
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(f"{len(references)} references to {qualified}"))
+        self.resultsTable = QTableWidget(len(references), 4)
+        self.resultsTable.setHorizontalHeaderLabels(['File', 'Line', 'Column', 'Kind'])
+        self.resultsTable.setEditTriggers(QTableWidget.NoEditTriggers)
+        for i, (path, line, column, kind) in enumerate(references):
+            self.resultsTable.setItem(i, 0, QTableWidgetItem(path))
+            self.resultsTable.setItem(i, 1, QTableWidgetItem(str(line)))
+            self.resultsTable.setItem(i, 2, QTableWidgetItem(str(column)))
+            self.resultsTable.setItem(i, 3, QTableWidgetItem(kind))
+        self.resultsTable.itemDoubleClicked.connect(self.openResult)
+        layout.addWidget(self.resultsTable)
+        self.setLayout(layout)
+
+    def openResult(self, item):
+        path, line, column, kind = self.references[item.row()]
+        self.on_open(path, line)
+
+class ASTViewerDialog(QDialog):
+    def __init__(self, ast_tree, line=None, on_open=None, parent=None):
+        super().__init__(parent)
+        self.on_open = on_open
+        self.setWindowTitle("AST Viewer")
+        self.setGeometry(100, 100, 800, 500)
+        layout = QVBoxLayout()
+        line_layout = QHBoxLayout()
+        self.lineEdit = QLineEdit()
+        self.lineEdit.setPlaceholderText('Editor line...')
+        self.lineEdit.returnPressed.connect(self.findLine)
+        line_layout.addWidget(self.lineEdit)
+        find_button = QPushButton('Find Node')
+        find_button.clicked.connect(self.findLine)
+        line_layout.addWidget(find_button)
+        layout.addLayout(line_layout)
+        self.model = ASTTreeModel(ast_tree, self)
+        self.treeView = QTreeView()
+        self.treeView.setUniformRowHeights(True)
+        self.treeView.setModel(self.model)
+        self.treeView.header().setSectionResizeMode(0, QHeaderView.Interactive)
+        self.treeView.setColumnWidth(0, 260)
+        self.treeView.doubleClicked.connect(self.openNode)
+        self.treeView.expand(self.model.index(0, 0))
+        layout.addWidget(self.treeView)
+        self.setLayout(layout)
+        if line is not None:
+            self.lineEdit.setText(str(line))
+            self.findLine()
+
+    def findLine(self):
+        try:
+            line = int(self.lineEdit.text())
+        except ValueError:
+            return
+        index = self.model.indexForLine(line)
+        if index.isValid():
+            self.treeView.scrollTo(index)
+            self.treeView.setCurrentIndex(index)
+
+    def openNode(self, index):
+        line = self.model.lineAt(index)
+        if line is not None and self.on_open is not None:
+            self.on_open(line)
+
+class SymbolTableGenerator(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.initUI()
+
+    def initUI(self):
+        self.setWindowTitle('Symbol Table Generator')
+        main_layout = QVBoxLayout()
+
+        # Initialize the editor first
+        self.editor = QsciScintilla()
+        self.editor.setLexer(PythonHighlighter(self.editor))
+        self.editor.setUtf8(True)
+        self.editor.setMarginType(0, QsciScintilla.NumberMargin)
+        self.editor.setMarginWidth(0, '0000')
+        main_layout.addWidget(self.editor)
+
+        toolbar = QToolBar()
+
+        self.browse_button = QPushButton('Browse')
+        self.browse_button.clicked.connect(self.selectFile)
+        toolbar.addWidget(self.browse_button)
+
+        self.save_button = QPushButton('Save')
+        self.save_button.clicked.connect(self.saveFile)
+        toolbar.addWidget(self.save_button)
+
+        self.cut_button = QPushButton('Cut')
+        self.cut_button.clicked.connect(self.editor.cut)
+        toolbar.addWidget(self.cut_button)
+
+        self.copy_button = QPushButton('Copy')
+        self.copy_button.clicked.connect(self.editor.copy)
+        toolbar.addWidget(self.copy_button)
+
+        self.paste_button = QPushButton('Paste')
+        self.paste_button.clicked.connect(self.editor.paste)
+        toolbar.addWidget(self.paste_button)
+
+        self.undo_button = QPushButton('Undo')
+        self.undo_button.clicked.connect(self.editor.undo)
+        toolbar.addWidget(self.undo_button)
+
+        self.redo_button = QPushButton('Redo')
+        self.redo_button.clicked.connect(self.editor.redo)
+        toolbar.addWidget(self.redo_button)
+
+        self.clear_editor_button = QPushButton('Clear Editor')
+        self.clear_editor_button.clicked.connect(self.clearEditor)
+        toolbar.addWidget(self.clear_editor_button)
+
+        self.go_to_line_button = QPushButton('Go to Line')
+        self.go_to_line_button.clicked.connect(self.goToLine)
+        toolbar.addWidget(self.go_to_line_button)
+
+        self.show_python_version_button = QPushButton('Python Version')
+        self.show_python_version_button.clicked.connect(self.showPythonVersion)
+        toolbar.addWidget(self.show_python_version_button)
+
+        self.toggle_line_numbers_button = QPushButton('Toggle Line Numbers')
+        self.toggle_line_numbers_button.clicked.connect(self.toggleLineNumbers)
+        toolbar.addWidget(self.toggle_line_numbers_button)
+
+        self.live_button = QPushButton('Live Symbols')
+        self.live_button.setCheckable(True)
+        self.live_button.setChecked(True)
+        toolbar.addWidget(self.live_button)
+
+        main_layout.addWidget(toolbar)
+
+        search_replace_layout = QHBoxLayout()
+
+        self.searchBar = QLineEdit()
+        self.searchBar.setPlaceholderText('Search...')
+        self.searchBar.textChanged.connect(self.filterSymbols)
+        search_replace_layout.addWidget(self.searchBar)
+
+        self.replace_button = QPushButton('Replace')
+        self.replace_button.clicked.connect(self.replaceText)
+        search_replace_layout.addWidget(self.replace_button)
+
+        main_layout.addLayout(search_replace_layout)
+
+        self.stale_label = QLabel('Symbols are out of date until the edited code parses')
+        self.stale_label.hide()
+        main_layout.addWidget(self.stale_label)
+
+        self.symbol_model = SymbolTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.symbol_model)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(self.table.fontMetrics().height() + 6)
+        self.table.doubleClicked.connect(self.navigateToLine)
+        main_layout.addWidget(self.table)
+
+        action_layout = QHBoxLayout()
+
+        self.metrics_button = QPushButton('Calculate Metrics')
+        self.metrics_button.clicked.connect(self.calculateMetrics)
+        action_layout.addWidget(self.metrics_button)
+
+        self.project_metrics_button = QPushButton('Project Metrics')
+        self.project_metrics_button.clicked.connect(self.calculateProjectMetrics)
+        action_layout.addWidget(self.project_metrics_button)
+
+        self.profiling_button = QPushButton('Profiling')
+        self.profiling_button.clicked.connect(self.showProfiling)
+        action_layout.addWidget(self.profiling_button)
+
+        self.export_button = QPushButton('Export Symbol Table')
+        self.export_button.clicked.connect(self.exportSymbolTable)
+        action_layout.addWidget(self.export_button)
+
+        self.ast_button = QPushButton('View AST')
+        self.ast_button.clicked.connect(self.showAST)
+        action_layout.addWidget(self.ast_button)
+
+        self.uml_button = QPushButton('Generate UML')
+        self.uml_button.clicked.connect(self.generateUML)
+        action_layout.addWidget(self.uml_button)
+
+        self.doc_button = QPushButton('Generate Documentation')
+        self.doc_button.clicked.connect(self.generateDocumentation)
+        action_layout.addWidget(self.doc_button)
+
+        self.index_button = QPushButton('Index Project')
+        self.index_button.clicked.connect(self.indexProject)
+        action_layout.addWidget(self.index_button)
+
+        self.go_to_symbol_button = QPushButton('Go to Symbol')
+        self.go_to_symbol_button.clicked.connect(self.goToSymbol)
+        action_layout.addWidget(self.go_to_symbol_button)
+
+        self.references_button = QPushButton('Find References')
+        self.references_button.clicked.connect(self.findReferences)
+        action_layout.addWidget(self.references_button)
+
+        main_layout.addLayout(action_layout)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.hide()
+        main_layout.addWidget(self.progress_bar)
+
+        self.setLayout(main_layout)
+
+        self.jobs = JobRunner(self)
+        self.jobs.progress.connect(self.showProgress)
+        self.jobs.idle.connect(self.progress_bar.hide)
+
+        self.incremental = IncrementalAnalyzer()
+        self.symbol_table = self.incremental.symbol_table
+        self.symbol_index = None
+        self.project_root = None
+        self.reference_index = None
+        self.plantuml = None
+        self.pending_line = None
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(200)
+        self.live_timer.timeout.connect(self.refreshSymbolTable)
+        self.editor.textChanged.connect(self.scheduleRefresh)
+
+    def selectFile(self):
+        file_dialog = QFileDialog(self)
+        file_dialog.setNameFilter("Python files (*.py)")
+        if file_dialog.exec_():
+            file_path = file_dialog.selectedFiles()[0]
+            self.pending_line = None
+            self.loadFile(file_path)
+
+    def loadFile(self, file_path):
+        file_path = os.path.abspath(file_path)
+        self.file_path = file_path
+        self.jobs.start('load', load_job, (file_path,), self.fileLoaded,
+                        lambda error: QMessageBox.critical(self, 'Error', f'Failed to load file: {error}'))
+
+    def fileLoaded(self, result):
+        source, tree, incremental = result
+        self.ast_tree = tree
+        self.incremental = incremental
+        self.source_encoding = source.encoding
+        self.source_newline = source.newline
+        self.editor.setText(source.text)
+        self._parsed_text = source.text
+        self.stale_label.hide()
+        self.generateSymbolTable()
+        if self.pending_line is not None:
+            self.selectLine(self.pending_line)
+            self.pending_line = None
+
+    def showProgress(self, kind, percent, message):
+        self.progress_bar.setFormat(f"{message}... %p%")
+        self.progress_bar.setValue(percent)
+        self.progress_bar.show()
+
+    def closeEvent(self, event):
+        self.jobs.cancelAll()
+        if self.plantuml is not None:
+            self.plantuml.close()
+        super().closeEvent(event)
+
+    def saveFile(self):
+        file_dialog = QFileDialog(self)
+        file_dialog.setAcceptMode(QFileDialog.AcceptSave)
+        file_dialog.setNameFilter("Python files (*.py)")
+        if file_dialog.exec_():
+            file_path = file_dialog.selectedFiles()[0]
+            try:
+                encoding = getattr(self, 'source_encoding', 'utf-8')
+                newline = getattr(self, 'source_newline', '\n')
+                with open(file_path, 'w', encoding=encoding, newline=newline) as file:
+                    file.write(self.editor.text())
+                QMessageBox.information(self, 'Save Successful', f'File saved to {file_path}')
+            except Exception as e:
+                QMessageBox.critical(self, 'Save Failed', f'Failed to save file: {str(e)}')
+
+    def clearEditor(self):
+        self.editor.clear()
+
+    def showPythonVersion(self):
+        python_version = sys.version
+        QMessageBox.information(self, 'Python Version', python_version)
+
+    def currentTree(self):
+        content = self.editor.text()
+        if getattr(self, '_parsed_text', None) != content:
+            self.ast_tree = ast.parse(content)
+            self._parsed_text = content
+        return self.ast_tree
+
+    def currentAnalysis(self):
+        return analyze_tree(self.currentTree())
+
+    def treeSnapshot(self):
+        content = self.editor.text()
+        if getattr(self, '_parsed_text', None) == content:
+            return content, self.ast_tree
+        return content, None
+
+    def adoptTree(self, content, tree):
+        if self.editor.text() == content:
+            self.ast_tree = tree
+            self._parsed_text = content
+
+    def generateSymbolTable(self):
+        self.symbol_table = self.incremental.symbol_table
+        self.populateTable()
+
+    def scheduleRefresh(self):
+        if self.live_button.isChecked() and hasattr(self, 'ast_tree'):
+            self.live_timer.start()
+
+    def refreshSymbolTable(self):
+        with INSTRUMENTATION.stage('incremental update'):
+            symbol_table = self.incremental.update(self.editor.text())
+        self.stale_label.setVisible(self.incremental.stale)
+        if self.incremental.reparsed_lines:
+            self.symbol_table = symbol_table
+            self.populateTable()
+
+    def populateTable(self):
+        with INSTRUMENTATION.stage('table population'):
+            self.symbol_model.setSymbols(self.symbol_table)
+
+    def showProfiling(self):
+        dialog = ProfilingDialog(INSTRUMENTATION, self)
+        dialog.show()
+
+    def navigateToLine(self, index):
+        self.selectLine(self.symbol_model.lineAt(index.row()))
+
+    def selectLine(self, line_number):
+        self.editor.setCursorPosition(line_number - 1, 0)
+        self.editor.setSelection(line_number - 1, 0, line_number - 1, len(self.editor.text(line_number)))
+        self.editor.setFocus()
+
+    def indexProject(self):
+        root = QFileDialog.getExistingDirectory(self, 'Index Project')
+        if root:
+            self.jobs.start('index', index_job, (root,), self.projectIndexed,
+                            lambda error: QMessageBox.critical(self, 'Indexing Failed', f'Failed to index project: {error}'))
+
+    def projectIndexed(self, result):
+        root, self.symbol_index = result
+        self.project_root = root
+        self.reference_index = None
+        QMessageBox.information(self, 'Index Project',
+                                f'Indexed {len(self.symbol_index)} symbols in {len(self.symbol_index.paths)} files under {root}.')
+
+    def goToSymbol(self):
+        if self.symbol_index is None:
+            QMessageBox.information(self, 'Go to Symbol', 'Index a project first.')
+            return
+        dialog = SymbolSearchDialog(self.symbol_index, self.openSymbol, self)
+        dialog.show()
+
+    def openSymbol(self, path, line):
+        if os.path.abspath(path) == getattr(self, 'file_path', None) and not self.jobs.isRunning('load'):
+            self.selectLine(line)
+        else:
+            self.pending_line = line
+            self.loadFile(path)
+
+    def cursorPosition(self):
+        # AST columns are UTF-8 byte offsets; the editor reports characters
+        line, index = self.editor.getCursorPosition()
+        return line + 1, len(self.editor.text(line)[:index].encode('utf-8'))
+
+    def inProject(self):
+        file_path = getattr(self, 'file_path', None)
+        return (self.project_root is not None and file_path is not None and
+                os.path.abspath(file_path).startswith(os.path.abspath(self.project_root) + os.sep))
+
+    def findReferences(self):
+        try:
+            tree = self.currentTree()
+        except SyntaxError as e:
+            QMessageBox.critical(self, 'Syntax Error', f'Cannot resolve names: {e}')
+            return
+        if not self.inProject():
+            from scopes import resolve_tree, KINDS
+            module = os.path.splitext(os.path.basename(getattr(self, 'file_path', None) or '<editor>'))[0]
+            references = resolve_tree(tree, module, source=self.editor.text())
+            qualified = references.at(*self.cursorPosition())
+            if qualified is None:
+                QMessageBox.information(self, 'Find References', 'No name at the cursor.')
+                return
+            path = getattr(self, 'file_path', '<editor>')
+            self.showReferences(qualified, [(path, line, column, KINDS[kind])
+                                            for _, _, kind, line, column, _ in references.find(qualified)])
+        elif self.reference_index is None:
+            self.jobs.start('references', references_job, (self.project_root,), self.referencesIndexed,
+                            lambda error: QMessageBox.critical(self, 'Find References Failed', f'Failed to resolve names: {error}'))
+        elif not self.jobs.isRunning('find references'):
+            # The job patches the shared index, so a second lookup waits for the first to finish
+            args = (self.reference_index, self.file_path, self.editor.text(), self.cursorPosition())
+            self.jobs.start('find references', find_references_job, args, self.referencesFound,
+                            lambda error: QMessageBox.critical(self, 'Find References Failed', f'Failed to resolve names: {error}'))
+
+    def referencesIndexed(self, index):
+        self.reference_index = index
+        self.findReferences()
+
+    def referencesFound(self, result):
+        if result is None:
+            QMessageBox.information(self, 'Find References', 'No name at the cursor.')
+            return
+        self.showReferences(*result)
+
+    def showReferences(self, qualified, references):
+        dialog = ReferencesDialog(qualified, references, self.openSymbol, self)
+        dialog.show()
+
+    def filterSymbols(self):
+        self.symbol_model.setFilter(self.searchBar.text())
+
+    def showAST(self):
+        try:
+            tree = self.currentTree()
+        except SyntaxError as e:
+            QMessageBox.critical(self, 'Syntax Error', f'Cannot show the AST: {e}')
+            return
+        line, _ = self.editor.getCursorPosition()
+        dialog = ASTViewerDialog(tree, line + 1, self.selectLine, self)
+        dialog.show()
+
+    def calculateMetrics(self):
+        self.jobs.start('metrics', file_metrics_job, (getattr(self, 'file_path', None),) + self.treeSnapshot(),
+                        self.showMetrics,
+                        lambda error: QMessageBox.critical(self, 'Metrics Failed', f'Failed to calculate metrics: {error}'))
+
+    def showMetrics(self, result):
+        content, tree, analysis, project = result
+        self.adoptTree(content, tree)
+        metrics = analysis.metrics()
+        metrics['Lines of Code'] = len(content.splitlines())
+        metrics['Source Lines of Code'] = project.columns['sloc'][0]
+        metrics['Max Nesting Depth'] = max(project.columns['depth'])
+        metrics_info = "\n".join(f"{key}: {value}" for key, value in metrics.items())
+        dialog = MetricsDialog(metrics_info, project, self.openMetricsUnit, self.exportMetrics, self)
+        dialog.show()
+
+    def calculateProjectMetrics(self):
+        root = self.project_root or QFileDialog.getExistingDirectory(self, 'Project Metrics')
+        if root:
+            self.jobs.start('project metrics', project_metrics_job, (root,), self.showProjectMetrics,
+                            lambda error: QMessageBox.critical(self, 'Metrics Failed', f'Failed to measure project: {error}'))
+
+    def showProjectMetrics(self, result):
+        project, report = result
+        dialog = MetricsDialog(report, project, self.openMetricsUnit, self.exportMetrics, self)
+        dialog.show()
+
+    def openMetricsUnit(self, path, line):
+        if os.path.exists(path):
+            self.openSymbol(path, line)
+        else:
+            self.selectLine(line)
+
+    def exportMetrics(self, columns, file_path):
+        self.jobs.start('export', table_export_job, (columns, file_path),
+                        lambda path: QMessageBox.information(self, 'Export Successful', f'Metrics exported to {path}'),
+                        lambda error: QMessageBox.critical(self, 'Export Failed', f'Failed to export metrics: {error}'))
+
+    def calculateCyclomaticComplexity(self):
+        return analyze_tree(self.ast_tree).complexity
+
+    def calculateLinesOfCode(self):
+        return len(self.editor.text().splitlines())
+
+    def calculateNumberOfFunctions(self):
+        return analyze_tree(self.ast_tree).num_functions
+
+    def calculateNumberOfClasses(self):
+        return analyze_tree(self.ast_tree).num_classes
+
+    def calculateNumberOfImports(self):
+        return analyze_tree(self.ast_tree).num_imports
+
+    def exportSymbolTable(self):
+        file_dialog = QFileDialog(self)
+        file_dialog.setAcceptMode(QFileDialog.AcceptSave)
+        file_dialog.setNameFilters(["CSV files (*.csv)", "JSON files (*.json)", "XML files (*.xml)",
+                                    "NDJSON files (*.ndjson)", "Columnar symbol tables (*.stbl)"])
+        if file_dialog.exec_():
+            from exporters import export_format
+            file_path = file_dialog.selectedFiles()[0]
+            if export_format(file_path):
+                self.exportTo(file_path)
+
+    def exportTo(self, file_path, extension=None):
+        if extension is None:
+            from exporters import export_format
+            extension = export_format(file_path)
+        label = extension[1:].upper()
+        self.jobs.start('export', export_job, (self.symbol_table, file_path, extension),
+                        lambda path: QMessageBox.information(self, 'Export Successful', f'Symbol table exported to {path}'),
+                        lambda error: QMessageBox.critical(self, 'Export Failed', f'Failed to export {label}: {error}'))
+
+    def exportToCSV(self, file_path):
+        self.exportTo(file_path, '.csv')
+
+    def exportToJSON(self, file_path):
+        self.exportTo(file_path, '.json')
+
+    def exportToXML(self, file_path):
+        self.exportTo(file_path, '.xml')
+
+    def exportToNDJSON(self, file_path):
+        self.exportTo(file_path, '.ndjson')
+
+    def exportToColumnar(self, file_path):
+        self.exportTo(file_path, '.stbl')
+
+    def generateUML(self):
+        if self.plantuml is None:
+            import shutil
+            if shutil.which('plantuml'):
+                from uml import PlantUMLRenderer
+                # One PlantUML process serves every diagram rendered in this session
+                self.plantuml = PlantUMLRenderer(output_format='png')
+        file_path = getattr(self, 'file_path', None)
+        # Diagrams go next to the file they describe; unsaved text needs a directory picked for it
+        output_dir = os.path.dirname(file_path) if file_path else QFileDialog.getExistingDirectory(self, 'Save UML Diagram To')
+        if not output_dir:
+            return
+        args = self.treeSnapshot() + (file_path, self.plantuml, output_dir)
+        self.jobs.start('uml', uml_job, args, self.umlGenerated,
+                        lambda error: QMessageBox.critical(self, 'UML Generation Failed', f'Failed to generate UML: {error}'))
+
+    def umlGenerated(self, result):
+        content, tree, analysis, paths, skipped = result
+        self.adoptTree(content, tree)
+        if skipped:
+            QMessageBox.information(self, 'UML Generation', 'Classes are unchanged; the diagram is up to date:\n' + '\n'.join(paths))
+        else:
+            QMessageBox.information(self, 'UML Generation', 'UML diagram saved as:\n' + '\n'.join(paths))
+
+    def generateDocumentation(self):
+        content, tree = self.treeSnapshot()
+        self.jobs.start('documentation', documentation_job, (getattr(self, 'file_path', None), content, tree), self.showDocumentation,
+                        lambda error: QMessageBox.critical(self, 'Documentation Generation Failed', f'Failed to generate documentation: {error}'))
+
+    def showDocumentation(self, result):
+        content, tree, analysis, html = result
+        self.adoptTree(content, tree)
+        dialog = DetailedInfoDialog('Documentation', html, html=True)
+        dialog.exec_()
+
+    def goToLine(self):
+        line, ok = QInputDialog.getInt(self, 'Go to Line', 'Enter line number:')
+        if ok:
+            self.editor.setCursorPosition(line - 1, 0)
+            self.editor.setFocus()
+
+    def replaceText(self):
+        find_text, ok1 = QInputDialog.getText(self, 'Replace Text', 'Enter text to find:')
+        if ok1 and find_text:
+            replace_text, ok2 = QInputDialog.getText(self, 'Replace Text', 'Enter replacement text:')
+            if ok2 and replace_text:
+                self.editor.selectAll()
+                content = self.editor.text().replace(find_text, replace_text)
+                self.editor.setText(content)
+
+    def showVariables(self):
+        variables = self.currentAnalysis().variables
+        var_info = "\n".join(variables)
+        dialog = DetailedInfoDialog('Variables', var_info)
+        dialog.exec_()
+
+    def showClasses(self):
+        classes = self.currentAnalysis().classes
+        class_info = "\n".join(classes)
+        dialog = DetailedInfoDialog('Classes', class_info)
+        dialog.exec_()
+
+    def showFunctions(self):
+        functions = self.currentAnalysis().functions
+        func_info = "\n".join(functions)
+        dialog = DetailedInfoDialog('Functions', func_info)
+        dialog.exec_()
+
+    def showCallStack(self):
+        stack = traceback.format_stack()
+        stack_info = "".join(stack)
+        dialog = DetailedInfoDialog('Call Stack', stack_info)
+        dialog.exec_()
+
+    def toggleLineNumbers(self):
+        margin_width = self.editor.marginWidth(0)
+        self.editor.setMarginWidth(0, 0 if margin_width else '0000')
+
+def run(file_path=None):
+    app = QApplication(sys.argv)
+    window = SymbolTableGenerator()
+    window.show()
+    if file_path:
+        window.loadFile(file_path)
+    return app.exec_()
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+
+import ast
+
+from analysis import analyze_tree
+from cache import SymbolCache, content_digest, DEFAULT_MAX_BYTES
+from instrumentation import Instrumentation, ProfileCapture
+from loader import load_source, iter_source_entries, iter_batches, DEFAULT_BATCH_BYTES
+
+SKIP_DIRS = {'.git', '.hg', '.svn', '__pycache__', '.tox', '.nox', '.venv', 'venv', 'node_modules'}
+
+
+def iter_python_files(root):
+    for file_path, _ in iter_source_entries(root, SKIP_DIRS):
+        yield file_path
+
+
+def index_file(file_path):
+    instrumentation = Instrumentation()
+    try:
+        with instrumentation.stage('read'):
+            # The cache key digests the raw bytes, as SymbolCache.lookup does when revalidating
+            source = load_source(file_path, digest=content_digest)
+        instrumentation.count('bytes_read', source.size)
+        with instrumentation.stage('parse'):
+            tree = ast.parse(source.text, file_path)
+        with instrumentation.stage('extract'):
+            analysis = analyze_tree(tree)
+            analysis.lines_of_code = len(source.text.splitlines())
+            symbols = list(analysis.symbol_table)
+    except (SyntaxError, ValueError, UnicodeDecodeError, OSError) as e:
+        return {'path': file_path, 'error': f'{type(e).__name__}: {e}'}, None, instrumentation.snapshot()
+    instrumentation.count('nodes_visited', analysis.nodes_visited)
+    instrumentation.count('symbols_emitted', len(symbols))
+    result = {'path': file_path, 'symbols': symbols, 'metrics': analysis.metrics()}
+    return result, (source.mtime_ns, source.size, source.digest), instrumentation.snapshot()
+
+
+def index_batch(paths):
+    """Worker entry point: index a batch of files, merging their instrumentation."""
+    instrumentation = Instrumentation()
+    results = []
+    for file_path in paths:
+        result, key, snapshot = index_file(file_path)
+        instrumentation.merge(snapshot)
+        results.append((result, key))
+    return results, instrumentation.snapshot()
+
+
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    peak = max(usage, children)
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def iter_index(root, workers=None, chunksize=16, cache=None, stats=None, instrumentation=None,
+               batch_bytes=DEFAULT_BATCH_BYTES):
+    """Index every Python file under ``root``, yielding one result per file.
+
+    Work is handed to the pool in batches of at most ``chunksize`` files and ``batch_bytes``
+    bytes, so a worker gets many small modules per round trip but a multi-megabyte module is
+    never queued behind others.
+    """
+    if stats is None:
+        stats = {}
+    if instrumentation is None:
+        instrumentation = Instrumentation()
+    stats.setdefault('cache_hits', 0)
+    entries = iter_source_entries(root, SKIP_DIRS)
+    if cache is None:
+        misses = entries
+    else:
+        cache.prune(root)
+        misses = []
+        for file_path, stat in entries:
+            try:
+                with instrumentation.stage('cache lookup'):
+                    entry = cache.lookup(file_path, stat)
+            except OSError:
+                entry = None
+            if entry is None:
+                misses.append((file_path, stat))
+            else:
+                stats['cache_hits'] += 1
+                yield {'path': file_path, 'symbols': entry.symbols, 'metrics': entry.metrics}
+
+    if cache is None or misses:
+        with multiprocessing.Pool(workers) as pool:
+            batches = iter_batches(misses, batch_bytes, chunksize)
+            for results, snapshot in pool.imap_unordered(index_batch, batches):
+                instrumentation.merge(snapshot)
+                for result, key in results:
+                    yield result
+                    if cache is not None and key is not None:
+                        with instrumentation.stage('cache store'):
+                            cache.store(result['path'], *key, result['symbols'], result['metrics'])
+    if cache is not None:
+        cache.flush()
+
+
+def run_index(root, output, workers=None, chunksize=16, cache=None, instrumentation=None,
+              batch_bytes=DEFAULT_BATCH_BYTES):
+    stats = {'files': 0, 'errors': 0, 'symbols': 0, 'cache_hits': 0}
+    if instrumentation is None:
+        instrumentation = Instrumentation()
+    start = time.perf_counter()
+    for result in iter_index(root, workers, chunksize, cache, stats, instrumentation, batch_bytes):
+        with instrumentation.stage('write'):
+            output.write(json.dumps(result))
+            output.write('\n')
+        stats['files'] += 1
+        if 'error' in result:
+            stats['errors'] += 1
+        else:
+            stats['symbols'] += len(result['symbols'])
+    elapsed = time.perf_counter() - start
+    stats['seconds'] = round(elapsed, 3)
+    stats['files_per_sec'] = round(stats['files'] / elapsed, 1) if elapsed else 0.0
+    stats['peak_rss_kb'] = peak_rss_kb()
+    stats['workers'] = workers or os.cpu_count()
+    stats.update(instrumentation.snapshot())
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build symbol tables for every Python file under a directory.')
+    parser.add_argument('root', help='directory to index')
+    parser.add_argument('-o', '--output', default='-', help='NDJSON output file (default: stdout)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='number of worker processes (default: CPU count)')
+    parser.add_argument('--chunksize', type=int, default=16, help='most files handed to a worker at a time')
+    parser.add_argument('--batch-kb', type=int, default=DEFAULT_BATCH_BYTES // 1024,
+                        help='most source kilobytes handed to a worker at a time (a larger file gets its own batch)')
+    parser.add_argument('--cache', default=None, help='SQLite symbol cache; unchanged files are not re-parsed')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help='cache size limit in MB before least recently used entries are evicted')
+    parser.add_argument('--stats-json', default=None,
+                        help='write throughput, per-stage timings and counters as JSON to this file')
+    parser.add_argument('--profile', default=None, metavar='PREFIX',
+                        help='capture cProfile and tracemalloc data for the main process to PREFIX.*')
+    args = parser.parse_args(argv)
+
+    cache = SymbolCache(args.cache, args.cache_size * 1024 * 1024) if args.cache else None
+    capture = ProfileCapture(args.profile) if args.profile else None
+    if capture is not None:
+        capture.start()
+    try:
+        if args.output == '-':
+            stats = run_index(args.root, sys.stdout, args.workers, args.chunksize, cache,
+                              batch_bytes=args.batch_kb * 1024)
+        else:
+            with open(args.output, 'w') as output:
+                stats = run_index(args.root, output, args.workers, args.chunksize, cache,
+                                  batch_bytes=args.batch_kb * 1024)
+    finally:
+        if cache is not None:
+            cache.close()
+        if capture is not None:
+            capture.stop()
+
+    if args.stats_json:
+        with open(args.stats_json, 'w') as stats_file:
+            json.dump(stats, stats_file, indent=2)
+
+    print(f"Indexed {stats['files']} files ({stats['errors']} errors, {stats['symbols']} symbols, "
+          f"{stats['cache_hits']} from cache) in {stats['seconds']}s: {stats['files_per_sec']} files/sec, "
+          f"peak RSS {stats['peak_rss_kb']} KB, {stats['workers']} workers", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import time
+import threading
+from contextlib import contextmanager
+
+
+class Instrumentation:
+    """Per-stage wall-clock timers and named counters, safe to update from worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = [0, 0.0, 0.0]
+            stage[0] += 1
+            stage[1] += seconds
+            stage[2] = max(stage[2], seconds)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, snapshot):
+        for name, stage in snapshot.get('stages', {}).items():
+            with self._lock:
+                current = self.stages.setdefault(name, [0, 0.0, 0.0])
+                current[0] += stage['calls']
+                current[1] += stage['total_ms'] / 1000
+                current[2] = max(current[2], stage['max_ms'] / 1000)
+        for name, amount in snapshot.get('counters', {}).items():
+            self.count(name, amount)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'stages': {name: {'calls': calls, 'total_ms': round(total * 1000, 3), 'max_ms': round(peak * 1000, 3)}
+                           for name, (calls, total, peak) in self.stages.items()},
+                'counters': dict(self.counters),
+            }
+
+    def to_json(self, **extra):
+        import json
+        data = self.snapshot()
+        data.update(extra)
+        return json.dumps(data, indent=2)
+
+    def report(self):
+        snapshot = self.snapshot()
+        lines = [f"{'Stage':24} {'Calls':>7} {'Total ms':>10} {'Mean ms':>9} {'Max ms':>9}"]
+        for name, stage in sorted(snapshot['stages'].items(), key=lambda item: -item[1]['total_ms']):
+            mean = stage['total_ms'] / stage['calls'] if stage['calls'] else 0.0
+            lines.append(f"{name:24} {stage['calls']:7d} {stage['total_ms']:10.1f} {mean:9.2f} {stage['max_ms']:9.1f}")
+        lines.append('')
+        for name, amount in sorted(snapshot['counters'].items()):
+            lines.append(f"{name:24} {amount:>12,}")
+        return "\n".join(lines)
+
+
+class ProfileCapture:
+    """Opt-in cProfile and tracemalloc capture.
+
+    ``stop`` writes ``<prefix>.prof`` (for pstats/snakeviz), a ``<prefix>.profile.txt`` summary and
+    the top allocation sites to ``<prefix>.memory.txt``. cProfile only sees the thread that calls
+    ``start``; work on pool threads is covered by the stage timers instead.
+    """
+
+    def __init__(self, prefix, profile=True, memory=True, top=30):
+        import cProfile
+        self.prefix = prefix
+        self.profile = cProfile.Profile() if profile else None
+        self.memory = memory
+        self.top = top
+        self.running = False
+
+    def start(self):
+        import tracemalloc
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profile is not None:
+            self.profile.enable()
+        self.running = True
+
+    def stop(self):
+        import io
+        import pstats
+        import tracemalloc
+        paths = []
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile.dump_stats(self.prefix + '.prof')
+            paths.append(self.prefix + '.prof')
+            summary = io.StringIO()
+            pstats.Stats(self.profile, stream=summary).sort_stats('cumulative').print_stats(self.top)
+            with open(self.prefix + '.profile.txt', 'w') as file:
+                file.write(summary.getvalue())
+            paths.append(self.prefix + '.profile.txt')
+        if self.memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(self.prefix + '.memory.txt', 'w') as file:
+                file.write(f"current {current / 1e6:.2f} MB, peak {peak / 1e6:.2f} MB\n\n")
+                for stat in snapshot.statistics('lineno')[:self.top]:
+                    file.write(f"{stat}\n")
+            paths.append(self.prefix + '.memory.txt')
+        self.running = False
+        return paths
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+INSTRUMENTATION = Instrumentation()
@@ -0,0 +1,130 @@
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobSignals(QObject):
+    progress = pyqtSignal(int, str)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    done = pyqtSignal()
+
+
+class Job(QRunnable):
+    """Runs ``func(job, *args)`` on a pool thread and reports back through Qt signals.
+
+    Signals are queued to the thread that created the job, so the slots run on the GUI thread.
+    """
+
+    def __init__(self, func, *args):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.func = func
+        self.args = args
+        self.signals = JobSignals()
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def check(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def report(self, percent, message):
+        self.check()
+        self.signals.progress.emit(percent, message)
+
+    def run(self):
+        try:
+            result = self.func(self, *self.args)
+            self.check()
+        except JobCancelled:
+            pass
+        except Exception as e:
+            if not self.cancelled:
+                traceback.print_exc()
+                self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+        finally:
+            self.signals.done.emit()
+
+
+class JobRunner(QObject):
+    """Keeps at most one live job per kind; starting a new one cancels the one it supersedes."""
+
+    progress = pyqtSignal(str, int, str)
+    idle = pyqtSignal()
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self.jobs = {}
+        self._active = set()
+
+    def start(self, kind, func, args, on_finished, on_failed=None):
+        self._discard(kind)
+        job = Job(func, *args)
+        job.signals.progress.connect(lambda percent, message: self._progress(kind, job, percent, message))
+        job.signals.finished.connect(lambda result: self._finished(kind, job, result, on_finished))
+        job.signals.failed.connect(lambda error: self._finished(kind, job, error, on_failed))
+        job.signals.done.connect(lambda: self._active.discard(job))
+        self.jobs[kind] = job
+        self._active.add(job)
+        self.pool.start(job)
+        return job
+
+    def cancel(self, kind):
+        if self._discard(kind) and not self.jobs:
+            self.idle.emit()
+
+    def cancelAll(self):
+        for kind in list(self.jobs):
+            self.cancel(kind)
+
+    def isRunning(self, kind):
+        return kind in self.jobs
+
+    def _discard(self, kind):
+        job = self.jobs.pop(kind, None)
+        if job is None:
+            return False
+        job.cancel()
+        if self.pool.tryTake(job):
+            self._active.discard(job)
+        return True
+
+    def _progress(self, kind, job, percent, message):
+        if self.jobs.get(kind) is job:
+            self.progress.emit(kind, percent, message)
+
+    def _finished(self, kind, job, value, callback):
+        if self.jobs.get(kind) is not job:
+            return
+        del self.jobs[kind]
+        if not self.jobs:
+            self.idle.emit()
+        if callback is not None:
+            callback(value)
+
+
+def run_subprocess(job, args, poll_interval=0.1):
+    import subprocess
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    while True:
+        try:
+            output, errors = process.communicate(timeout=poll_interval)
+            break
+        except subprocess.TimeoutExpired:
+            if job.cancelled:
+                process.kill()
+                process.communicate()
+                raise JobCancelled()
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, args, output, errors)
+    return output
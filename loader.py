@@ -0,0 +1,126 @@
+import os
+import mmap
+
+# Files at least this large are decoded straight out of a read-only mapping instead of being
+# read into a bytes object first, so the raw bytes never live on the Python heap.
+MMAP_THRESHOLD = 1 << 20
+DEFAULT_BATCH_BYTES = 4 << 20
+
+
+class SourceFile:
+    """Decoded contents of a Python file, shared by the editor and the parser.
+
+    ``encoding`` is the PEP 263 encoding (``utf-8-sig`` when the file starts with a BOM) and
+    ``newline`` the line ending found in the file, so saving can write the file back unchanged.
+    ``digest`` is the result of the ``digest`` function given to ``load_source``, if any.
+    """
+    __slots__ = ('path', 'text', 'encoding', 'newline', 'size', 'mtime_ns', 'mapped', 'digest')
+
+    def __init__(self, path, text, encoding, newline, size, mtime_ns, mapped=False, digest=None):
+        self.path = path
+        self.text = text
+        self.encoding = encoding
+        self.newline = newline
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.mapped = mapped
+        self.digest = digest
+
+
+def _first_lines(buffer, count=2):
+    end = 0
+    for _ in range(count):
+        newline = buffer.find(b'\n', end)
+        if newline < 0:
+            return bytes(buffer[:])
+        end = newline + 1
+    return bytes(buffer[:end])
+
+
+def detect_encoding(buffer):
+    """PEP 263 encoding of ``buffer`` (bytes, mmap or any object with ``find`` and slicing)."""
+    from tokenize import detect_encoding as _detect
+    lines = iter(_first_lines(buffer).splitlines(keepends=True))
+    encoding, _ = _detect(lambda: next(lines, b''))
+    return encoding
+
+
+def decode_source(buffer, encoding=None):
+    """``(text, encoding, newline)`` with universal newlines applied, as ``open(path, 'r')`` would."""
+    if encoding is None:
+        encoding = detect_encoding(buffer)
+    text = str(buffer, encoding)
+    newline = '\n'
+    if '\r' in text:
+        newline = '\r\n' if '\r\n' in text else '\r'
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text, encoding, newline
+
+
+def load_source(path, mmap_threshold=MMAP_THRESHOLD, digest=None):
+    """Read and decode ``path``; ``digest``, if given, is applied to the raw bytes (or mapping) first."""
+    digested = None
+    with open(path, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        mapped = stat.st_size >= mmap_threshold > 0
+        if mapped:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                if digest is not None:
+                    digested = digest(view)
+                text, encoding, newline = decode_source(view)
+        else:
+            data = file.read()
+            if digest is not None:
+                digested = digest(data)
+            text, encoding, newline = decode_source(data)
+    return SourceFile(path, text, encoding, newline, stat.st_size, stat.st_mtime_ns, mapped, digested)
+
+
+def iter_source_entries(root, skip_dirs=(), suffix='.py'):
+    """Yield ``(path, stat)`` for files under ``root`` in ``os.walk`` order.
+
+    The stat results come from the directory scan (free on Windows, cached per entry
+    elsewhere), so batching by size and cache validation need no second ``stat`` call.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in skip_dirs:
+                                subdirs.append(entry.path)
+                        elif entry.name.endswith(suffix) and entry.is_file():
+                            files.append((entry.path, entry.stat()))
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        files.sort(key=lambda item: item[0])
+        yield from files
+        stack.extend(sorted(subdirs, reverse=True))
+
+
+def iter_batches(entries, max_bytes=DEFAULT_BATCH_BYTES, max_files=64):
+    """Group ``(path, stat)`` entries into lists of paths of at most ``max_bytes`` or ``max_files``.
+
+    A file larger than ``max_bytes`` gets a batch of its own, so one huge module never holds
+    back a batch of small ones.
+    """
+    batch = []
+    batch_bytes = 0
+    for path, stat in entries:
+        size = stat.st_size
+        if batch and (batch_bytes + size > max_bytes or len(batch) >= max_files):
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append(path)
+        batch_bytes += size
+    if batch:
+        yield batch
+
@@ -0,0 +1,536 @@
+import os
+import sys
+import ast
+import time
+import heapq
+import pickle
+import argparse
+import multiprocessing
+from array import array
+from bisect import bisect_right
+
+from analysis import COMPLEXITY_NODES, decision_points
+from depgraph import module_name
+from indexer import SKIP_DIRS
+from loader import iter_source_entries, iter_batches, DEFAULT_BATCH_BYTES
+
+METRICS_VERSION = 2
+KINDS = ('module', 'class', 'function', 'method')
+MODULE, CLASS, FUNCTION, METHOD = range(len(KINDS))
+STRING_COLUMNS = ('module', 'qualname', 'kind')
+NUMERIC_COLUMNS = ('line', 'end_line', 'complexity', 'loc', 'sloc', 'depth', 'fan_out', 'fan_in')
+COLUMNS = STRING_COLUMNS + NUMERIC_COLUMNS
+# Per-unit values a worker computes; fan_in needs the whole project and is filled in by finalize
+UNIT_FIELDS = NUMERIC_COLUMNS[:-1]
+PERCENTILES = (50, 90, 95, 99)
+
+DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+NESTING_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.Try, ast.With, ast.AsyncWith) + tuple(
+    getattr(ast, name) for name in ('TryStar', 'Match') if hasattr(ast, name))
+# Nodes that can hold nothing a unit metric counts; the walk never pushes them
+LEAF_NODES = frozenset([ast.Name, ast.Constant, ast.alias, ast.Pass, ast.Break, ast.Continue, ast.Global,
+                        ast.Nonlocal] + [cls for base in (ast.expr_context, ast.operator, ast.unaryop, ast.cmpop,
+                                                            ast.boolop) for cls in base.__subclasses__()])
+_DEFINITION_TYPES = frozenset(DEFINITIONS)
+_COMPLEXITY_TYPES = frozenset(COMPLEXITY_NODES)
+_NESTING_TYPES = frozenset(NESTING_NODES)
+
+_numpy_module = None
+
+
+def _numpy():
+    global _numpy_module
+    if _numpy_module is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy_module = numpy
+    return _numpy_module or None
+
+
+def code_line_prefix(lines):
+    """``prefix[i]`` is the number of lines among the first ``i`` that are not blank or comments."""
+    prefix = array('I', [0])
+    count = 0
+    for line in lines:
+        stripped = line.lstrip()
+        if stripped and stripped[0] != 35:  # ord('#')
+            count += 1
+        prefix.append(count)
+    return prefix
+
+
+class ModuleMetrics:
+    """Metrics of every unit (the module, its classes, functions and methods) of one file.
+
+    ``values`` holds UNIT_FIELDS for each unit back to back; ``called`` counts, per callee
+    name, how many units of this module call it, which ``finalize`` sums into fan-in.
+    """
+    __slots__ = ('module', 'qualnames', 'kinds', 'values', 'called')
+
+    def __init__(self, module, qualnames, kinds, values, called):
+        self.module = module
+        self.qualnames = qualnames
+        self.kinds = kinds
+        self.values = values
+        self.called = called
+
+    def __len__(self):
+        return len(self.qualnames)
+
+    def __reduce__(self):
+        return ModuleMetrics, (self.module, self.qualnames, self.kinds, self.values, self.called)
+
+
+def module_metrics(tree, data, module):
+    """ModuleMetrics of a parsed module; ``data`` is its source as bytes.
+
+    Complexity is McCabe's, counted per unit with ``decision_points``: a nested function's
+    branches belong to it, not to its parent, and a class scores the sum of its methods plus
+    its own class-body branches. Nesting depth counts compound statements, with ``elif`` at
+    the depth of its ``if``. Fan-out is the number of distinct names a unit calls.
+    """
+    prefix = code_line_prefix(data.splitlines())
+    qualnames = [module]
+    kinds = bytearray([MODULE])
+    parents = [-1]
+    spans = [(1, len(prefix) - 1)]
+    complexity = [1]
+    depth = [0]
+    calls = [set()]
+    stack = [(child, 0, 0) for child in reversed(tree.body)]
+    AST = ast.AST
+    while stack:
+        node, unit, level = stack.pop()
+        cls = node.__class__
+        if cls in _DEFINITION_TYPES:
+            index = len(kinds)
+            if cls is ast.ClassDef:
+                kind = CLASS
+            else:
+                kind = METHOD if kinds[unit] == CLASS else FUNCTION
+            qualnames.append(f"{qualnames[unit]}.{node.name}")
+            kinds.append(kind)
+            parents.append(unit)
+            start = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+            spans.append((start, node.end_lineno or node.lineno))
+            complexity.append(0 if kind == CLASS else 1)
+            depth.append(0)
+            calls.append(set())
+            # Decorators, defaults, annotations and bases run in the enclosing unit
+            body = {id(child) for child in node.body}
+            stack.extend((child, unit, level) for child in ast.iter_child_nodes(node)
+                         if id(child) not in body and child.__class__ not in LEAF_NODES)
+            stack.extend((child, index, 0) for child in reversed(node.body))
+            continue
+        if cls in _COMPLEXITY_TYPES:
+            complexity[unit] += decision_points(node)
+        elif cls is ast.Call:
+            func = node.func
+            if func.__class__ is ast.Name:
+                calls[unit].add(func.id)
+            elif func.__class__ is ast.Attribute:
+                calls[unit].add(func.attr)
+        elif_node = None
+        if cls in _NESTING_TYPES:
+            inner = level + 1
+            if inner > depth[unit]:
+                depth[unit] = inner
+            if cls is ast.If and len(node.orelse) == 1 and node.orelse[0].__class__ is ast.If:
+                elif_node = node.orelse[0]
+        else:
+            inner = level
+        children = []
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if value.__class__ is list:
+                children.extend(item for item in value if isinstance(item, AST) and item.__class__ not in LEAF_NODES)
+            elif isinstance(value, AST) and value.__class__ not in LEAF_NODES:
+                children.append(value)
+        for child in reversed(children):
+            stack.append((child, unit, level if child is elif_node else inner))
+
+    # Units are created parent first, so walking backwards adds each method before its class is read
+    for index in range(len(kinds) - 1, 0, -1):
+        if kinds[index] == METHOD:
+            complexity[parents[index]] += complexity[index]
+
+    values = array('I')
+    called = {}
+    for index, (start, end) in enumerate(spans):
+        end = max(min(end, len(prefix) - 1), start - 1)
+        values.extend((start, end, complexity[index], end - start + 1, prefix[end] - prefix[start - 1],
+                       depth[index], len(calls[index])))
+        for name in calls[index]:
+            called[name] = called.get(name, 0) + 1
+    return ModuleMetrics(module, qualnames, bytes(kinds), values, called)
+
+
+def measure_file(file_path, root):
+    """Worker entry point: ``(path, ModuleMetrics or None, mtime)``."""
+    try:
+        with open(file_path, 'rb') as file:
+            mtime = os.fstat(file.fileno()).st_mtime_ns
+            data = file.read()
+        tree = ast.parse(data, file_path)
+    except (SyntaxError, ValueError, OSError):
+        return file_path, None, None
+    return file_path, module_metrics(tree, data, module_name(file_path, root)), mtime
+
+
+def _measure_batch(args):
+    paths, root = args
+    return [measure_file(file_path, root) for file_path in paths]
+
+
+def _percentile(ordered, q):
+    # Linear interpolation between closest ranks, as numpy.percentile does by default
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class ProjectMetrics:
+    """Per-unit metrics of every module under a root, stored column-wise.
+
+    Files are measured in a process pool and kept per file, so ``refresh`` only re-measures
+    what changed; ``finalize`` concatenates them into ``array`` columns and derives fan-in
+    (how many units anywhere call a unit's name). Aggregates run on NumPy views of those
+    columns when NumPy is installed and fall back to sorting and ``heapq`` otherwise.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.files = {}
+        self.mtimes = {}
+        self.numpy = _numpy()
+        self._finalized = False
+
+    def __len__(self):
+        if not self._finalized:
+            self.finalize()
+        return len(self.kinds)
+
+    @classmethod
+    def build(cls, root, workers=None, chunksize=64, progress=None, batch_bytes=DEFAULT_BATCH_BYTES):
+        project = cls(root)
+        entries = list(iter_source_entries(project.root, SKIP_DIRS))
+        tasks = [(paths, project.root) for paths in iter_batches(entries, batch_bytes, chunksize)]
+        done = 0
+        with multiprocessing.Pool(workers) as pool:
+            for results in pool.imap_unordered(_measure_batch, tasks):
+                for file_path, metrics, mtime in results:
+                    if metrics is not None:
+                        project.files[file_path] = metrics
+                        project.mtimes[file_path] = mtime
+                done += len(results)
+                if progress is not None:
+                    progress(done, len(entries))
+        project.finalize()
+        return project
+
+    def update_file(self, file_path, source=None, tree=None):
+        """Re-measure one file, from ``source`` if given (unsaved editor text, with its parsed
+        ``tree`` if the caller has one); keeps the old rows on a syntax error."""
+        file_path = os.path.abspath(file_path)
+        if source is None:
+            _, metrics, mtime = measure_file(file_path, self.root)
+        else:
+            data = source.encode('utf-8')
+            try:
+                if tree is None:
+                    tree = ast.parse(data, file_path)
+                metrics = module_metrics(tree, data, module_name(file_path, self.root))
+            except (SyntaxError, ValueError):
+                metrics = None
+            mtime = None
+        if metrics is not None:
+            self.files[file_path] = metrics
+            self.mtimes[file_path] = mtime
+            self._finalized = False
+
+    def remove_file(self, file_path):
+        if self.files.pop(os.path.abspath(file_path), None) is not None:
+            self.mtimes.pop(os.path.abspath(file_path), None)
+            self._finalized = False
+
+    def refresh(self):
+        seen = set()
+        changed = 0
+        for file_path, stat in iter_source_entries(self.root, SKIP_DIRS):
+            seen.add(file_path)
+            if stat.st_mtime_ns == self.mtimes.get(file_path):
+                continue
+            self.update_file(file_path)
+            changed += 1
+        for file_path in [file_path for file_path in self.files if file_path not in seen]:
+            self.remove_file(file_path)
+            changed += 1
+        return changed
+
+    def finalize(self):
+        self.paths = []
+        self.modules = []
+        self.module_ids = array('I')
+        self.qualnames = []
+        self.kinds = bytearray()
+        self.columns = {column: array('I') for column in NUMERIC_COLUMNS}
+        called = {}
+        fields = [self.columns[column] for column in UNIT_FIELDS]
+        width = len(UNIT_FIELDS)
+        for module_id, (file_path, metrics) in enumerate(sorted(self.files.items())):
+            self.paths.append(file_path)
+            self.modules.append(metrics.module)
+            self.module_ids.extend([module_id] * len(metrics))
+            self.qualnames.extend(metrics.qualnames)
+            self.kinds.extend(metrics.kinds)
+            for offset, column in enumerate(fields):
+                column.extend(metrics.values[offset::width])
+            for name, count in metrics.called.items():
+                called[name] = called.get(name, 0) + count
+        self.columns['fan_in'] = array('I', (0 if kind == MODULE else called.get(qualname.rpartition('.')[2], 0)
+                                             for kind, qualname in zip(self.kinds, self.qualnames)))
+        self._finalized = True
+
+    def row(self, index):
+        if not self._finalized:
+            self.finalize()
+        return ((self.modules[self.module_ids[index]], self.qualnames[index], KINDS[self.kinds[index]]) +
+                tuple(self.columns[column][index] for column in NUMERIC_COLUMNS))
+
+    def path(self, index):
+        return self.paths[self.module_ids[index]]
+
+    def table(self):
+        """``(name, values)`` per column in COLUMNS order: lists for strings, ``array`` columns for numbers."""
+        if not self._finalized:
+            self.finalize()
+        modules = self.modules
+        strings = [('module', [modules[module_id] for module_id in self.module_ids]),
+                   ('qualname', self.qualnames),
+                   ('kind', [KINDS[kind] for kind in self.kinds])]
+        return strings + [(column, self.columns[column]) for column in NUMERIC_COLUMNS]
+
+    def select(self, kinds=None):
+        """Row indices whose kind is in ``kinds`` (names), or None for every row."""
+        if not self._finalized:
+            self.finalize()
+        if kinds is None:
+            return None
+        codes = {KINDS.index(kind) for kind in ([kinds] if isinstance(kinds, str) else kinds)}
+        np = self.numpy
+        if np is not None:
+            kind_codes = np.frombuffer(self.kinds, dtype=np.uint8)
+            return np.flatnonzero(np.isin(kind_codes, list(codes)))
+        return array('L', (index for index, kind in enumerate(self.kinds) if kind in codes))
+
+    def values(self, column, kinds=None):
+        """Values of a numeric column for the selected rows, as a NumPy array or a list."""
+        selected = self.select(kinds)
+        values = self.columns[column]
+        np = self.numpy
+        if np is not None:
+            values = np.frombuffer(values, dtype=np.dtype(f'u{values.itemsize}')) if len(values) else np.zeros(0, np.uint64)
+            return values if selected is None else values[selected]
+        return list(values) if selected is None else [values[index] for index in selected]
+
+    def summary(self, column, kinds=None, percentiles=PERCENTILES):
+        values = self.values(column, kinds)
+        result = {'count': len(values)}
+        if not len(values):
+            return result
+        np = self.numpy
+        if np is not None:
+            points = np.percentile(values, percentiles)
+            result.update(mean=float(values.mean()), min=int(values.min()), max=int(values.max()))
+        else:
+            values = sorted(values)
+            points = [_percentile(values, q) for q in percentiles]
+            result.update(mean=sum(values) / len(values), min=values[0], max=values[-1])
+        result.update((f"p{q:g}", float(point)) for q, point in zip(percentiles, points))
+        return result
+
+    def histogram(self, column, bins=10, kinds=None):
+        """``(edges, counts)`` over ``bins`` equal-width bins between the minimum and maximum."""
+        values = self.values(column, kinds)
+        if not len(values):
+            return [], []
+        np = self.numpy
+        if np is not None:
+            counts, edges = np.histogram(values, bins)
+            return [float(edge) for edge in edges], [int(count) for count in counts]
+        low, high = min(values), max(values)
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+        edges = [low + (high - low) * step / bins for step in range(bins + 1)]
+        counts = [0] * bins
+        for value in values:
+            counts[min(bisect_right(edges, value) - 1, bins - 1)] += 1
+        return edges, counts
+
+    def top(self, column, n=10, kinds=None):
+        """Row indices of the ``n`` largest values, largest first; ties keep table order."""
+        selected = self.select(kinds)
+        np = self.numpy
+        if np is not None:
+            values = self.values(column, kinds)
+            if not len(values) or n <= 0:
+                return []
+            n = min(n, len(values))
+            threshold = np.partition(values, len(values) - n)[len(values) - n]
+            candidates = np.flatnonzero(values >= threshold)
+            order = candidates[np.lexsort((candidates, -values[candidates].astype(np.int64)))][:n]
+            rows = order if selected is None else selected[order]
+            return [int(row) for row in rows]
+        values = self.columns[column]
+        rows = range(len(values)) if selected is None else selected
+        return heapq.nlargest(n, rows, key=values.__getitem__)
+
+    def argsort(self, column, descending=False):
+        """Row order sorted by ``column``; stable, so equal keys keep table order."""
+        if not self._finalized:
+            self.finalize()
+        if column in STRING_COLUMNS:
+            keys = dict(self.table())[column]
+            order = sorted(range(len(keys)), key=keys.__getitem__, reverse=descending)
+            return array('L', order)
+        np = self.numpy
+        if np is not None:
+            values = self.values(column)
+            order = np.argsort(-values.astype(np.int64) if descending else values, kind='stable')
+            return array('L', order.tolist())
+        values = self.columns[column]
+        return array('L', sorted(range(len(values)), key=values.__getitem__, reverse=descending))
+
+    def report(self, column='complexity', n=10, kinds=('function', 'method'), bins=10):
+        lines = [f"{len(self.files)} modules, {len(self)} units"]
+        for name in ('complexity', 'sloc', 'depth', 'fan_out', 'fan_in'):
+            stats = self.summary(name, kinds)
+            if stats['count']:
+                points = '  '.join(f"p{q:g} {stats[f'p{q:g}']:.1f}" for q in PERCENTILES)
+                lines.append(f"{name:>10}: mean {stats['mean']:.2f}  {points}  max {stats['max']}")
+        edges, counts = self.histogram(column, bins, kinds)
+        if counts:
+            lines.append('')
+            lines.append(f"{column} histogram ({', '.join(kinds)})")
+            widest = max(counts) or 1
+            for low, high, count in zip(edges, edges[1:], counts):
+                lines.append(f"{low:8.1f} - {high:8.1f} {count:9d} {'#' * (count * 40 // widest)}")
+        lines.append('')
+        lines.append(f"top {n} by {column}")
+        for index in self.top(column, n, kinds):
+            lines.append(f"{self.columns[column][index]:6d}  {self.qualnames[index]}  "
+                         f"{self.path(index)}:{self.columns['line'][index]}")
+        return "\n".join(lines)
+
+    def save(self, file_path):
+        state = {'version': METRICS_VERSION, 'root': self.root, 'files': self.files, 'mtimes': self.mtimes}
+        with open(file_path, 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, 'rb') as file:
+            state = pickle.load(file)
+        if state.get('version') != METRICS_VERSION:
+            raise ValueError('metrics cache was written by an incompatible version')
+        project = cls(state['root'])
+        project.files, project.mtimes = state['files'], state['mtimes']
+        return project
+
+
+def _occurrences(modules, qualnames):
+    # Redefined or conditionally defined units share a qualname; the n-th one matches the n-th
+    seen = {}
+    for key in zip(modules, qualnames):
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        yield key + (occurrence,)
+
+
+def compare(project, baseline_columns, column='complexity'):
+    """Changes of ``column`` since a saved table, largest first.
+
+    Returns ``(grown, added)``: ``(increase, qualname, old, new)`` for units whose value grew and
+    ``(value, qualname)`` for units the saved table does not have.
+    """
+    old = dict(zip(_occurrences(baseline_columns['module'], baseline_columns['qualname']), baseline_columns[column]))
+    table = dict(project.table())
+    grown = []
+    added = []
+    for key, value in zip(_occurrences(table['module'], table['qualname']), table[column]):
+        previous = old.get(key)
+        if previous is None:
+            added.append((value, key[1]))
+        elif value > previous:
+            grown.append((value - previous, key[1], previous, value))
+    grown.sort(key=lambda change: -change[0])
+    added.sort(key=lambda unit: -unit[0])
+    return grown, added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Per-function complexity, size, nesting and coupling for a project.')
+    parser.add_argument('root', help='project directory; module names are relative to it')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--sort', choices=NUMERIC_COLUMNS, default='complexity', help='column for the hotspot list')
+    parser.add_argument('--top', type=int, default=10, help='number of hotspots to list')
+    parser.add_argument('--kind', action='append', choices=KINDS,
+                        help='unit kinds to aggregate (repeatable; default: function and method)')
+    parser.add_argument('--bins', type=int, default=10, help='histogram bins')
+    parser.add_argument('-o', '--output', action='append', default=[],
+                        help='write every row to a .csv or columnar .mtbl file (repeatable)')
+    parser.add_argument('--compare', metavar='MTBL', help='list units whose --sort value grew since this table')
+    parser.add_argument('--fail-over', type=int, default=None, metavar='N',
+                        help='exit with status 1 when any selected unit scores above N in --sort')
+    parser.add_argument('--index-cache', help='pickle file to load, refresh and save the per-file metrics')
+    args = parser.parse_args(argv)
+    kinds = tuple(args.kind or ('function', 'method'))
+
+    start = time.perf_counter()
+    project = None
+    if args.index_cache and os.path.exists(args.index_cache):
+        project = ProjectMetrics.load(args.index_cache)
+        if project.root == os.path.abspath(args.root):
+            project.refresh()
+        else:
+            print(f"{args.index_cache} holds metrics for {project.root}; rebuilding", file=sys.stderr)
+            project = None
+    if project is None:
+        project = ProjectMetrics.build(args.root, args.workers)
+    if args.index_cache:
+        project.save(args.index_cache)
+    measured = time.perf_counter() - start
+    start = time.perf_counter()
+    print(project.report(args.sort, args.top, kinds, args.bins))
+    print(f"measured in {measured:.2f}s, aggregated in {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"({'numpy' if project.numpy is not None else 'pure Python'})", file=sys.stderr)
+
+    if args.output or args.compare:
+        from exporters import export_table, read_table_columnar
+    for output in args.output:
+        export_table(project.table(), output)
+    if args.compare:
+        with open(args.compare, 'rb') as file:
+            baseline = read_table_columnar(file)
+        grown, added = compare(project, baseline, args.sort)
+        print(f"\n{len(grown)} units grew in {args.sort} since {args.compare}")
+        for increase, qualname, old, new in grown[:args.top]:
+            print(f"{increase:+6d}  {qualname}  ({old} -> {new})")
+        print(f"\n{len(added)} units are new since {args.compare}")
+        for value, qualname in added[:args.top]:
+            print(f"{value:6d}  {qualname}")
+
+    if args.fail_over is not None:
+        worst = project.top(args.sort, 1, kinds)
+        if worst and project.columns[args.sort][worst[0]] > args.fail_over:
+            print(f"FAIL {project.qualnames[worst[0]]} has {args.sort} {project.columns[args.sort][worst[0]]}, "
+                  f"over {args.fail_over}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
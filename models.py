@@ -0,0 +1,333 @@
+import ast
+from array import array
+from itertools import islice
+
+from PyQt5.QtCore import Qt, QAbstractItemModel, QAbstractTableModel, QModelIndex
+
+from analysis import SYMBOL_COLUMNS
+from search import SubstringIndex
+from symbols import SymbolStore
+
+
+class SymbolTableModel(QAbstractTableModel):
+    """Table view over a SymbolStore; the view only asks for the cells it paints.
+
+    Filtering walks the name index lazily and hands rows to the view in batches through
+    ``fetchMore``, so a keystroke costs one batch rather than a scan of every row.
+    """
+
+    FETCH_SIZE = 2000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._clear()
+
+    def _clear(self):
+        self.store = SymbolStore()
+        self.index = SubstringIndex([])
+        self.filter_text = ''
+        self.visible = None
+        self._pending = None
+
+    def setSymbols(self, symbol_table):
+        self.beginResetModel()
+        self._clear()
+        if not isinstance(symbol_table, SymbolStore):
+            symbol_table = SymbolStore.from_rows(symbol_table)
+        self.store = symbol_table
+        self.index = SubstringIndex(symbol_table.iter_names())
+        self.endResetModel()
+        if self.filter_text:
+            self.setFilter(self.filter_text)
+
+    def setFilter(self, text):
+        text = text.lower()
+        self.beginResetModel()
+        self.filter_text = text
+        if text:
+            self.visible = array('L')
+            self._pending = self.index.iter_matches(text)
+            self._take(self.FETCH_SIZE)
+        else:
+            self.visible = None
+            self._pending = None
+        self.endResetModel()
+
+    def _take(self, count):
+        batch = array('L', islice(self._pending, count))
+        if len(batch) < count:
+            self._pending = None
+        return batch
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._pending is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._pending is None:
+            return
+        batch = self._take(self.FETCH_SIZE)
+        if not batch:
+            return
+        first = len(self.visible)
+        self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+        self.visible.extend(batch)
+        self.endInsertRows()
+
+    def sourceRow(self, row):
+        return row if self.visible is None else self.visible[row]
+
+    def lineAt(self, row):
+        return self.store.lines[self.sourceRow(row)]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.store) if self.visible is None else len(self.visible)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(SYMBOL_COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        row = self.sourceRow(index.row())
+        column = index.column()
+        if column == 0:
+            return self.store.name(row)
+        if column == 1:
+            return self.store.type(row)
+        if column == 2:
+            return self.store.scope(row)
+        if column == 3:
+            return str(self.store.lines[row])
+        return str(self.store.ids[row])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return SYMBOL_COLUMNS[section]
+        return str(section + 1)
+
+
+AST_COLUMNS = ['Node', 'Fields', 'Lines']
+
+
+def _child_nodes(node):
+    # (label, child) pairs in field order; list fields are flattened to "field[i]"
+    for field, value in ast.iter_fields(node):
+        if isinstance(value, ast.AST):
+            yield field, value
+        elif isinstance(value, list):
+            for position, item in enumerate(value):
+                if isinstance(item, ast.AST):
+                    yield f"{field}[{position}]", item
+
+
+def _has_children(node):
+    for _ in ast.iter_child_nodes(node):
+        return True
+    return False
+
+
+def _field_summary(node, limit=120):
+    parts = []
+    for field, value in ast.iter_fields(node):
+        if isinstance(value, ast.AST):
+            if not _has_children(value) and not value._fields:
+                parts.append(f"{field}={type(value).__name__}")
+        elif isinstance(value, list):
+            if value and not isinstance(value[0], ast.AST):
+                parts.append(f"{field}={value!r}")
+        elif value is not None:
+            parts.append(f"{field}={value!r}")
+    summary = ', '.join(parts)
+    return summary if len(summary) <= limit else summary[:limit - 3] + '...'
+
+
+def _line_range(node):
+    start = getattr(node, 'lineno', None)
+    if start is None:
+        return ''
+    end = getattr(node, 'end_lineno', None) or start
+    return str(start) if end == start else f"{start}-{end}"
+
+
+class _ASTItem:
+    __slots__ = ('label', 'node', 'parent', 'row', '_children')
+
+    def __init__(self, label, node, parent, row):
+        self.label = label
+        self.node = node
+        self.parent = parent
+        self.row = row
+        self._children = None
+
+    @property
+    def children(self):
+        if self._children is None:
+            self._children = [_ASTItem(label, child, self, row)
+                              for row, (label, child) in enumerate(_child_nodes(self.node))]
+        return self._children
+
+
+class ASTTreeModel(QAbstractItemModel):
+    """Lazy tree over an AST: an item's children are wrapped only when the view asks for them.
+
+    Nothing is built up front, so opening a huge module costs one item; expanding a node costs
+    one item per direct child. ``indexForLine`` walks down to the innermost node covering a line.
+    """
+
+    def __init__(self, tree, parent=None):
+        super().__init__(parent)
+        self.root = _ASTItem(type(tree).__name__, tree, None, 0)
+
+    def _item(self, index):
+        return index.internalPointer() if index.isValid() else None
+
+    def index(self, row, column, parent=QModelIndex()):
+        item = self._item(parent)
+        children = [self.root] if item is None else item.children
+        if 0 <= row < len(children) and 0 <= column < len(AST_COLUMNS):
+            return self.createIndex(row, column, children[row])
+        return QModelIndex()
+
+    def parent(self, index):
+        item = self._item(index)
+        if item is None or item.parent is None:
+            return QModelIndex()
+        return self.createIndex(item.parent.row, 0, item.parent)
+
+    def hasChildren(self, parent=QModelIndex()):
+        item = self._item(parent)
+        if item is None:
+            return True
+        if item._children is not None:
+            return bool(item._children)
+        return _has_children(item.node)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        item = self._item(parent)
+        return 1 if item is None else len(item.children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(AST_COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        item = self._item(index)
+        if item is None or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        column = index.column()
+        if column == 0:
+            name = type(item.node).__name__
+            return name if item.parent is None else f"{item.label}: {name}"
+        if column == 1:
+            return _field_summary(item.node, 120 if role == Qt.DisplayRole else 2000)
+        return _line_range(item.node)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return AST_COLUMNS[section]
+        return None
+
+    def lineAt(self, index):
+        item = self._item(index)
+        return None if item is None else getattr(item.node, 'lineno', None)
+
+    def indexForLine(self, line):
+        item = self.root
+        while True:
+            for child in item.children:
+                start = getattr(child.node, 'lineno', None)
+                if start is not None and start <= line <= (getattr(child.node, 'end_lineno', None) or start):
+                    item = child
+                    break
+            else:
+                break
+        if item is self.root:
+            return QModelIndex()
+        return self.createIndex(item.row, 0, item)
+
+
+class MetricsTableModel(QAbstractTableModel):
+    """Sortable table over ProjectMetrics.
+
+    Sorting and the kind filter only rebuild a permutation of row numbers (from the project's
+    ``argsort``); cells are read straight from its columns when the view paints them.
+    """
+
+    def __init__(self, project, parent=None):
+        super().__init__(parent)
+        from metrics import COLUMNS, KINDS
+        self.columns = COLUMNS
+        self.kind_names = KINDS
+        self.project = project
+        self.kinds = None
+        self.sort_column = None
+        self.descending = False
+        self.visible = array('L', range(len(project)))
+
+    def setKinds(self, kinds):
+        self.kinds = kinds
+        self._rebuild()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = self.columns[column]
+        self.descending = order == Qt.DescendingOrder
+        self._rebuild()
+
+    def _rebuild(self):
+        self.layoutAboutToBeChanged.emit()
+        if self.sort_column is None:
+            order = range(len(self.project))
+        else:
+            order = self.project.argsort(self.sort_column, self.descending)
+        if self.kinds is None:
+            self.visible = array('L', order)
+        else:
+            codes = {self.kind_names.index(kind) for kind in self.kinds}
+            kinds = self.project.kinds
+            self.visible = array('L', (row for row in order if kinds[row] in codes))
+        self.layoutChanged.emit()
+
+    def sourceRow(self, row):
+        return self.visible[row]
+
+    def pathAt(self, row):
+        return self.project.path(self.visible[row])
+
+    def lineAt(self, row):
+        return self.project.columns['line'][self.visible[row]]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.visible)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.TextAlignmentRole):
+            return None
+        row = self.visible[index.row()]
+        column = self.columns[index.column()]
+        project = self.project
+        if column == 'module':
+            value = project.modules[project.module_ids[row]]
+        elif column == 'qualname':
+            value = project.qualnames[row]
+        elif column == 'kind':
+            value = self.kind_names[project.kinds[row]]
+        else:
+            if role == Qt.TextAlignmentRole:
+                return int(Qt.AlignRight | Qt.AlignVCenter)
+            return str(project.columns[column][row])
+        return value if role == Qt.DisplayRole else None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section]
+        return str(section + 1)
@@ -0,0 +1,592 @@
+import os
+import re
+import sys
+import ast
+import time
+import pickle
+import builtins
+import argparse
+import multiprocessing
+from array import array
+
+from loader import load_source
+from indexer import iter_python_files
+from depgraph import module_name, resolve_import
+
+BUILTINS = frozenset(dir(builtins))
+REFERENCES_VERSION = 2
+DEF, USE = 0, 1
+KINDS = ('def', 'use')
+COMPREHENSIONS = (ast.ListComp, ast.SetComp, ast.GeneratorExp, ast.DictComp)
+_NAME_OFFSETS = {ast.FunctionDef: len('def '), ast.AsyncFunctionDef: len('async def '), ast.ClassDef: len('class ')}
+
+
+class Scope:
+    __slots__ = ('kind', 'qualname', 'parent', 'bindings', 'globals', 'nonlocals')
+
+    def __init__(self, kind, qualname, parent=None):
+        self.kind = kind
+        self.qualname = qualname
+        self.parent = parent
+        self.bindings = set()
+        self.globals = set()
+        self.nonlocals = set()
+
+
+class ModuleReferences:
+    """Resolved names of one module.
+
+    ``references`` holds ``(qualified name, name, kind, line, column, scope)`` rows, where the
+    qualified name is the owning scope's path plus the name (``pkg.mod.Foo.__init__.self``,
+    ``builtins.len``) and columns are UTF-8 byte offsets as in the AST. ``aliases`` maps the
+    qualified name an import binds to the qualified name it imports.
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.references = []
+        self.aliases = {}
+        self.scopes = []
+
+    def at(self, line, column):
+        for qualified, name, kind, ref_line, ref_column, scope in self.references:
+            if ref_line == line and ref_column <= column < ref_column + len(name):
+                return qualified
+        return None
+
+    def find(self, qualified):
+        return [reference for reference in self.references if reference[0] == qualified]
+
+
+class ScopeResolver:
+    """Resolves every name in a module to the scope that binds it.
+
+    One iterative walk records scopes, their bindings and ``global``/``nonlocal`` declarations
+    and every name occurrence; occurrences are resolved afterwards with Python's rules (class
+    bodies are skipped by nested functions, unbound names fall back to module globals and
+    builtins), because a name can be bound after its first use in a function. The AST has no
+    position for names bound by ``except ... as name`` or ``**rest`` in a mapping pattern; with
+    ``source`` their columns are looked up in the text, otherwise the statement's is used.
+    """
+
+    def __init__(self, module='<module>', is_package=False, source=None):
+        self.module = module
+        self.package = module if is_package else module.rpartition('.')[0]
+        self.source = source
+        self.lines = None
+
+    def resolve(self, tree):
+        self.result = ModuleReferences(self.module)
+        self.occurrences = []
+        self.attributes = []
+        self.imports = []
+        module_scope = Scope('module', self.module)
+        self.result.scopes.append(module_scope.qualname)
+        self.visit(tree, module_scope)
+        self._resolve_occurrences()
+        return self.result
+
+    def new_scope(self, kind, name, parent):
+        qualname = f"{parent.qualname}.{name}"
+        scope = Scope(kind, qualname, parent)
+        self.result.scopes.append(qualname)
+        return scope
+
+    def bind(self, scope, name, line, column):
+        scope.bindings.add(name)
+        self.occurrences.append((scope, name, DEF, line, column))
+
+    def use(self, scope, name, line, column):
+        self.occurrences.append((scope, name, USE, line, column))
+
+    def find_name(self, name, line, column):
+        """``(line, column)`` of the first ``name`` at or after the given position in the source."""
+        if self.source is None:
+            return line, column
+        if self.lines is None:
+            source = self.source.encode('utf-8') if isinstance(self.source, str) else self.source
+            self.lines = source.splitlines()
+        pattern = re.compile(rb'\b%s\b' % re.escape(name.encode('utf-8')))
+        for number in range(line, len(self.lines) + 1):
+            match = pattern.search(self.lines[number - 1], column if number == line else 0)
+            if match:
+                return number, match.start()
+        return line, column
+
+    def visit(self, tree, scope):
+        stack = [(tree, scope)]
+        while stack:
+            node, scope = stack.pop()
+            children = self.visit_node(node, scope)
+            if children is None:
+                children = [(child, scope) for child in ast.iter_child_nodes(node)]
+            stack.extend(reversed(children))
+
+    def visit_node(self, node, scope):
+        """Handle ``node`` and return ``(child, scope)`` pairs to visit, or None for all children in ``scope``."""
+        if isinstance(node, ast.Name):
+            if isinstance(node.ctx, ast.Load):
+                self.use(scope, node.id, node.lineno, node.col_offset)
+            else:
+                self.bind(scope, node.id, node.lineno, node.col_offset)
+            return []
+        if isinstance(node, ast.Attribute):
+            return self.visit_attribute(node, scope)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            return self.visit_function(node, scope)
+        if isinstance(node, ast.ClassDef):
+            self.bind(scope, node.name, node.lineno, node.col_offset + _NAME_OFFSETS[ast.ClassDef])
+            inner = self.new_scope('class', node.name, scope)
+            outer = node.decorator_list + node.bases + node.keywords
+            return [(child, scope) for child in outer] + [(child, inner) for child in node.body]
+        if isinstance(node, COMPREHENSIONS):
+            return self.visit_comprehension(node, scope)
+        if isinstance(node, ast.NamedExpr):
+            target = scope
+            while target.kind == 'comprehension':
+                target = target.parent
+            self.bind(target, node.target.id, node.target.lineno, node.target.col_offset)
+            return [(node.value, scope)]
+        if isinstance(node, (ast.Global, ast.Nonlocal)):
+            declared = scope.globals if isinstance(node, ast.Global) else scope.nonlocals
+            declared.update(node.names)
+            return []
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            self.visit_import(node, scope)
+            return []
+        if isinstance(node, ast.ExceptHandler):
+            if node.name:
+                self.bind(scope, node.name, *self.find_name(node.name, node.type.end_lineno, node.type.end_col_offset))
+            return None
+        if isinstance(node, (ast.MatchAs, ast.MatchStar)):
+            # The pattern ends with the name in ``case [*rest]`` and ``case Point() as point``
+            if node.name:
+                self.bind(scope, node.name, node.end_lineno, node.end_col_offset - len(node.name))
+            return None
+        if isinstance(node, ast.MatchMapping) and node.rest:
+            start = node.patterns[-1] if node.patterns else None
+            position = (start.end_lineno, start.end_col_offset) if start else (node.lineno, node.col_offset + 1)
+            self.bind(scope, node.rest, *self.find_name(node.rest, *position))
+            return None
+        return None
+
+    def visit_function(self, node, scope):
+        args = node.args
+        outer = [default for default in args.defaults + args.kw_defaults if default is not None]
+        if isinstance(node, ast.Lambda):
+            inner = self.new_scope('function', f"<lambda:{node.lineno}:{node.col_offset}>", scope)
+            body = [node.body]
+        else:
+            self.bind(scope, node.name, node.lineno, node.col_offset + _NAME_OFFSETS[type(node)])
+            inner = self.new_scope('function', node.name, scope)
+            outer = node.decorator_list + outer
+            body = node.body
+        parameters = args.posonlyargs + args.args + [args.vararg] + args.kwonlyargs + [args.kwarg]
+        for parameter in parameters:
+            if parameter is None:
+                continue
+            self.bind(inner, parameter.arg, parameter.lineno, parameter.col_offset)
+            if parameter.annotation is not None:
+                outer.append(parameter.annotation)
+        if getattr(node, 'returns', None) is not None:
+            outer.append(node.returns)
+        return [(child, scope) for child in outer] + [(child, inner) for child in body]
+
+    def visit_comprehension(self, node, scope):
+        inner = self.new_scope('comprehension', f"<{type(node).__name__.lower()}:{node.lineno}:{node.col_offset}>", scope)
+        children = [(node.generators[0].iter, scope)]
+        for position, generator in enumerate(node.generators):
+            children.append((generator.target, inner))
+            if position:
+                children.append((generator.iter, inner))
+            children.extend((condition, inner) for condition in generator.ifs)
+        if isinstance(node, ast.DictComp):
+            children += [(node.key, inner), (node.value, inner)]
+        else:
+            children.append((node.elt, inner))
+        return children
+
+    def visit_attribute(self, node, scope):
+        # Remember dotted chains on a plain name so that ``mod.func`` can be linked through imports
+        path = []
+        base = node
+        while isinstance(base, ast.Attribute):
+            path.append(base)
+            base = base.value
+        if isinstance(base, ast.Name) and isinstance(base.ctx, ast.Load):
+            chain = [(attribute.attr, attribute.end_lineno, attribute.end_col_offset - len(attribute.attr))
+                     for attribute in reversed(path)]
+            self.attributes.append((scope, base.id, chain))
+        return [(base, scope)] + [(child, scope) for attribute in reversed(path)
+                                  for child in ast.iter_child_nodes(attribute) if child is not attribute.value]
+
+    def visit_import(self, node, scope):
+        imported = ''
+        if isinstance(node, ast.ImportFrom):
+            imported = resolve_import(self.package, node.module or '', node.level)
+        for alias in node.names:
+            if alias.name == '*':
+                continue
+            line = getattr(alias, 'lineno', node.lineno)
+            column = getattr(alias, 'col_offset', node.col_offset)
+            if alias.asname and hasattr(alias, 'end_col_offset'):
+                line, column = alias.end_lineno, alias.end_col_offset - len(alias.asname)
+            if isinstance(node, ast.Import):
+                local = alias.asname or alias.name.partition('.')[0]
+                target = alias.name if alias.asname else local
+            else:
+                local = alias.asname or alias.name
+                target = f"{imported}.{alias.name}" if imported else alias.name
+            self.bind(scope, local, line, column)
+            # A relative import that climbs above the project root still binds the name, but links nowhere
+            if imported is not None:
+                self.imports.append((scope, local, target))
+
+    def owner(self, scope, name):
+        if name in scope.globals:
+            return self._module_owner(scope, name)
+        if name in scope.bindings and name not in scope.nonlocals:
+            return scope.qualname
+        current = scope.parent
+        while current is not None:
+            if current.kind == 'module':
+                return self._module_owner(current, name)
+            if current.kind != 'class' and name in current.bindings:
+                if name in current.globals:
+                    return self._module_owner(current, name)
+                if name not in current.nonlocals:
+                    return current.qualname
+            current = current.parent
+        return self._module_owner(scope, name)
+
+    def _module_owner(self, scope, name):
+        while scope.parent is not None:
+            scope = scope.parent
+        if name not in scope.bindings and name in BUILTINS:
+            return 'builtins'
+        return scope.qualname
+
+    def _resolve_occurrences(self):
+        # Interned so that repeated names are shared in memory and in pickles
+        intern = sys.intern
+        references = self.result.references
+        for scope, name, kind, line, column in self.occurrences:
+            references.append((intern(f"{self.owner(scope, name)}.{name}"), name, kind, line, column, scope.qualname))
+        aliases = self.result.aliases
+        for scope, local, target in self.imports:
+            aliases[f"{self.owner(scope, local)}.{local}"] = target
+        for scope, name, chain in self.attributes:
+            target = aliases.get(f"{self.owner(scope, name)}.{name}")
+            if target is None:
+                continue
+            for attr, line, column in chain:
+                target = f"{target}.{attr}"
+                references.append((intern(target), attr, USE, line, column, scope.qualname))
+        references.sort(key=lambda reference: (reference[3], reference[4]))
+        self.occurrences = self.attributes = self.imports = None
+
+
+def resolve_tree(tree, module='<module>', is_package=False, source=None):
+    return ScopeResolver(module, is_package, source).resolve(tree)
+
+
+def resolve_file(file_path, root):
+    """Worker entry point: ``(path, ModuleReferences or None, mtime)``."""
+    try:
+        source = load_source(file_path)
+        tree = ast.parse(source.text, file_path)
+    except (SyntaxError, ValueError, OSError):
+        return file_path, None, None
+    is_package = os.path.basename(file_path) == '__init__.py'
+    return file_path, resolve_tree(tree, module_name(file_path, root), is_package, source.text), source.mtime_ns
+
+
+def _resolve_in_root(args):
+    return resolve_file(*args)
+
+
+class ReferenceIndex:
+    """Project-wide def/use index keyed by qualified name.
+
+    Rows are stored column-wise (qualified name id, file id, line, column, kind) and grouped by
+    name in CSR form on ``finalize``, so a lookup is a slice. Import aliases are followed both
+    ways: references to ``pkg.core.helper`` include uses of ``from pkg.core import helper`` in
+    other modules and of ``core.helper`` after ``from pkg import core``. Files updated after
+    ``finalize`` go to an overlay that hides their CSR rows, as in ``ImportGraph``, and the
+    arrays are only rebuilt once it holds more than ``compact_ratio`` of the files.
+    """
+
+    def __init__(self, root, compact_ratio=0.05):
+        self.root = os.path.abspath(root)
+        self.compact_ratio = compact_ratio
+        self.files = {}
+        self.mtimes = {}
+        self._finalized = False
+
+    def __len__(self):
+        return sum(len(module.references) for module in self.files.values())
+
+    @classmethod
+    def build(cls, root, workers=None, chunksize=16, progress=None):
+        index = cls(root)
+        files = list(iter_python_files(index.root))
+        tasks = [(file_path, index.root) for file_path in files]
+        with multiprocessing.Pool(workers) as pool:
+            for done, (file_path, references, mtime) in enumerate(
+                    pool.imap_unordered(_resolve_in_root, tasks, chunksize), 1):
+                if references is not None:
+                    index.files[file_path] = references
+                    index.mtimes[file_path] = mtime
+                if progress is not None:
+                    progress(done, len(files))
+        index.finalize()
+        return index
+
+    def update_file(self, file_path, source=None):
+        """Re-resolve one file, from ``source`` if given (unsaved editor text); keeps the old rows if it does not parse."""
+        file_path = os.path.abspath(file_path)
+        try:
+            if source is None:
+                _, references, mtime = resolve_file(file_path, self.root)
+            else:
+                is_package = os.path.basename(file_path) == '__init__.py'
+                references = resolve_tree(ast.parse(source, file_path), module_name(file_path, self.root),
+                                          is_package, source)
+                mtime = None
+        except (SyntaxError, ValueError):
+            references = None
+        if references is not None:
+            self._replace(file_path, references)
+            self.mtimes[file_path] = mtime
+
+    def remove_file(self, file_path):
+        file_path = os.path.abspath(file_path)
+        if file_path in self.files:
+            self._replace(file_path, None)
+            self.mtimes.pop(file_path, None)
+
+    def _replace(self, file_path, references):
+        old = self.files.pop(file_path, None)
+        if references is not None:
+            self.files[file_path] = references
+        if not self._finalized:
+            return
+        if old is not None:
+            for local, target in old.aliases.items():
+                if self.aliases.get(local) == target:
+                    del self.aliases[local]
+                    self.aliased_by[target].remove(local)
+        rows = {}
+        if references is not None:
+            for local, target in references.aliases.items():
+                previous = self.aliases.get(local)
+                if previous is not None:
+                    self.aliased_by[previous].remove(local)
+                self.aliases[local] = target
+                self.aliased_by.setdefault(target, []).append(local)
+            for qualified, name, kind, line, column, scope in references.references:
+                rows.setdefault(qualified, []).append((line, column, kind))
+        path_id = self.path_ids.get(file_path)
+        if path_id is not None:
+            self._hidden.add(path_id)
+        self._overlay[file_path] = rows
+        if len(self._overlay) > self.compact_ratio * len(self.files):
+            self.finalize()
+
+    def refresh(self):
+        seen = set()
+        changed = 0
+        for file_path in iter_python_files(self.root):
+            seen.add(file_path)
+            try:
+                if os.stat(file_path).st_mtime_ns == self.mtimes.get(file_path):
+                    continue
+            except OSError:
+                continue
+            self.update_file(file_path)
+            changed += 1
+        for file_path in [file_path for file_path in self.files if file_path not in seen]:
+            self.remove_file(file_path)
+            changed += 1
+        return changed
+
+    def finalize(self):
+        names = {}
+        self.names = []
+        self.paths = []
+        self.path_ids = {}
+        self.rows_name = array('L')
+        self.rows_path = array('L')
+        self.rows_line = array('L')
+        self.rows_column = array('L')
+        self.rows_kind = bytearray()
+        self.aliases = {}
+        for path_id, (file_path, module) in enumerate(self.files.items()):
+            self.paths.append(file_path)
+            self.path_ids[file_path] = path_id
+            self.aliases.update(module.aliases)
+            for qualified, name, kind, line, column, scope in module.references:
+                name_id = names.get(qualified)
+                if name_id is None:
+                    name_id = names[qualified] = len(self.names)
+                    self.names.append(qualified)
+                self.rows_name.append(name_id)
+                self.rows_path.append(path_id)
+                self.rows_line.append(line)
+                self.rows_column.append(column)
+                self.rows_kind.append(kind)
+        self.ids = names
+
+        counts = array('L', [0]) * (len(self.names) + 1)
+        for name_id in self.rows_name:
+            counts[name_id + 1] += 1
+        for i in range(len(self.names)):
+            counts[i + 1] += counts[i]
+        self.name_offsets = counts
+        self.name_rows = array('L', [0]) * len(self.rows_name)
+        fill = array('L', counts[:-1])
+        for row, name_id in enumerate(self.rows_name):
+            self.name_rows[fill[name_id]] = row
+            fill[name_id] += 1
+
+        self.aliased_by = {}
+        for local, target in self.aliases.items():
+            self.aliased_by.setdefault(target, []).append(local)
+        # path -> {qualified name: [(line, column, kind)]} for files updated since, whose CSR rows are hidden
+        self._overlay = {}
+        self._hidden = set()
+        self._finalized = True
+
+    def canonical(self, qualified):
+        """Follow import aliases to the name they ultimately refer to."""
+        if not self._finalized:
+            self.finalize()
+        seen = {qualified}
+        while True:
+            target = self.aliases.get(qualified)
+            if target is None:
+                # ``core.helper`` where ``core`` itself is an alias; ``from .prompt import prompt`` in a
+                # package maps the submodule's name to a longer one, which would never stop growing
+                prefix, _, rest = qualified.rpartition('.')
+                while prefix and (prefix not in self.aliases or self.aliases[prefix].startswith(prefix + '.')):
+                    prefix, _, head = prefix.rpartition('.')
+                    rest = f"{head}.{rest}"
+                if not prefix:
+                    return qualified
+                target = f"{self.aliases[prefix]}.{rest}"
+            if target in seen:
+                return qualified
+            seen.add(target)
+            qualified = target
+
+    def related(self, qualified):
+        """The canonical name plus every alias of it and every dotted name reached through an alias."""
+        qualified = self.canonical(qualified)
+        names = [qualified]
+        seen = {qualified}
+        position = 0
+        while position < len(names):
+            current = names[position]
+            position += 1
+            for local in self.aliased_by.get(current, ()):
+                if local not in seen:
+                    seen.add(local)
+                    names.append(local)
+            # ``from pkg import core`` then ``core.helper``: the alias target is a prefix of the name
+            prefix, _, rest = current.rpartition('.')
+            while prefix:
+                for local in self.aliased_by.get(prefix, ()):
+                    candidate = f"{local}.{rest}"
+                    if candidate not in seen and self._known(candidate):
+                        seen.add(candidate)
+                        names.append(candidate)
+                prefix, _, head = prefix.rpartition('.')
+                rest = f"{head}.{rest}"
+        return names
+
+    def _known(self, qualified):
+        return qualified in self.ids or any(qualified in rows for rows in self._overlay.values())
+
+    def references(self, qualified, kind=None):
+        """``(path, line, column, kind)`` for every def or use of ``qualified`` across the project."""
+        results = []
+        for name in self.related(qualified):
+            name_id = self.ids.get(name)
+            if name_id is not None:
+                for position in range(self.name_offsets[name_id], self.name_offsets[name_id + 1]):
+                    row = self.name_rows[position]
+                    if self.rows_path[row] in self._hidden or (kind is not None and self.rows_kind[row] != kind):
+                        continue
+                    results.append((self.paths[self.rows_path[row]], self.rows_line[row],
+                                    self.rows_column[row], KINDS[self.rows_kind[row]]))
+            for file_path, rows in self._overlay.items():
+                for line, column, row_kind in rows.get(name, ()):
+                    if kind is None or row_kind == kind:
+                        results.append((file_path, line, column, KINDS[row_kind]))
+        results.sort()
+        return results
+
+    def definitions(self, qualified):
+        return self.references(qualified, DEF)
+
+    def at(self, file_path, line, column):
+        module = self.files.get(os.path.abspath(file_path))
+        return None if module is None else module.at(line, column)
+
+    def save(self, file_path):
+        state = {'version': REFERENCES_VERSION, 'root': self.root, 'files': self.files, 'mtimes': self.mtimes}
+        with open(file_path, 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, 'rb') as file:
+            state = pickle.load(file)
+        if state.get('version') != REFERENCES_VERSION:
+            raise ValueError('reference index was written by an incompatible version')
+        index = cls(state['root'])
+        index.files, index.mtimes = state['files'], state['mtimes']
+        return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find every definition and use of a name across a project.')
+    parser.add_argument('root', help='project directory; module names are relative to it')
+    parser.add_argument('name', nargs='?', help='qualified name, e.g. pkg.mod.Class.method')
+    parser.add_argument('--at', metavar='FILE:LINE:COLUMN', help='use the name at this position instead')
+    parser.add_argument('--defs', action='store_true', help='only definitions')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--index-cache', help='pickle file to load, refresh and save the index')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.index_cache and os.path.exists(args.index_cache):
+        index = ReferenceIndex.load(args.index_cache)
+        index.refresh()
+    else:
+        index = ReferenceIndex.build(args.root, args.workers)
+    if args.index_cache:
+        index.save(args.index_cache)
+    print(f"{len(index)} references in {len(index.files)} files ready in {time.perf_counter() - start:.2f}s",
+          file=sys.stderr)
+
+    name = args.name
+    if args.at:
+        file_path, line, column = args.at.rsplit(':', 2)
+        name = index.at(file_path, int(line), int(column))
+        if name is None:
+            print(f"no name at {args.at}", file=sys.stderr)
+            return 1
+    if not name:
+        parser.error('give a qualified name or --at FILE:LINE:COLUMN')
+    start = time.perf_counter()
+    results = index.references(name, DEF if args.defs else None)
+    for path, line, column, kind in results:
+        print(f"{path}:{line}:{column}: {kind}")
+    print(f"{len(results)} references to {index.canonical(name)} in {(time.perf_counter() - start) * 1000:.1f} ms",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,308 @@
+import re
+import sys
+import json
+import argparse
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class SubstringIndex:
+    """Case-insensitive substring search over a column of names.
+
+    The lowered names are joined into one newline-separated string so that ``str.find`` does
+    the scanning in C; a row is resolved from a match offset by bisecting the row starts.
+    """
+
+    def __init__(self, names):
+        lowered = [name.lower() for name in names]
+        self.starts = array('L')
+        position = 0
+        for name in lowered:
+            self.starts.append(position)
+            position += len(name) + 1
+        self.text = "\n".join(lowered)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def iter_matches(self, needle):
+        needle = needle.lower()
+        if '\n' in needle:
+            return
+        starts = self.starts
+        find = self.text.find
+        count = len(starts)
+        end = len(self.text)
+        position = find(needle)
+        while position != -1:
+            row = bisect_right(starts, position) - 1
+            yield row
+            row += 1
+            if row >= count:
+                return
+            position = find(needle, starts[row], end)
+
+    def matches(self, needle):
+        return array('L', self.iter_matches(needle))
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _byte_bitmaps(names):
+    """``{byte: int}`` whose bit ``i`` is set when ``names[i]`` holds that byte in UTF-8.
+
+    Each bitmap takes a few passes over the joined names in C: ``translate`` keeps the byte (as
+    ``1``) and the separators, and each name's run of ones collapses to a single flag.
+    """
+    data = ('\n' + '\n'.join(names)).encode('utf-8')
+    identity = bytes(range(256))
+    runs = re.compile(rb'\n1+')
+    bitmaps = {}
+    for byte in range(256):
+        if byte == 10 or byte not in data:
+            continue
+        others = identity.replace(bytes([byte]), b'').replace(b'\n', b'')
+        kept = data.translate(identity[:byte] + b'1' + identity[byte + 1:], others)
+        flags = runs.sub(b'1', kept).replace(b'\n', b'0')
+        bitmaps[byte] = int(flags[::-1], 2)
+    return bitmaps
+
+
+def _word_starts(name, spans):
+    """How many of the matched ``(start, end)`` spans begin a word of a snake_case or CamelCase name."""
+    count = 0
+    for position, _ in spans:
+        char = name[position]
+        previous = name[position - 1] if position else ''
+        if not previous or previous == '_' or (char.isupper() and previous.islower()):
+            count += 1
+    return count
+
+
+class _Interner:
+    __slots__ = ('values', 'ids')
+
+    def __init__(self):
+        self.values = []
+        self.ids = {}
+
+    def __call__(self, value):
+        code = self.ids.get(value)
+        if code is None:
+            code = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class SymbolIndex:
+    """Project-wide "go to symbol" index.
+
+    Symbols are stored column-wise and grouped by distinct name. A query is matched against the
+    distinct names in rank order: prefix matches from a sorted array, substring matches from a
+    trigram index, then fuzzy subsequence matches; the hits are expanded to symbols and
+    filtered by type and scope until ``limit`` results are collected.
+
+    Fuzzy candidates are the names holding every byte of the query, found by AND-ing per-byte
+    bitmaps whose bits follow name length, so the shortest candidates are checked first. Hits
+    are ranked in pages of ``limit`` by how many query characters start a word, then by the
+    span they cover, and checking stops as soon as the caller has enough results.
+    """
+
+    def __init__(self):
+        self._names = _Interner()
+        self._types = _Interner()
+        self._scopes = _Interner()
+        self._paths = _Interner()
+        self.symbol_names = array('L')
+        self.symbol_types = array('B')
+        self.symbol_scopes = array('L')
+        self.symbol_paths = array('L')
+        self.symbol_lines = array('L')
+        self._finalized = False
+
+    def __len__(self):
+        return len(self.symbol_names)
+
+    @property
+    def paths(self):
+        return self._paths.values
+
+    @classmethod
+    def from_results(cls, results):
+        index = cls()
+        for result in results:
+            if 'symbols' in result:
+                index.add_file(result['path'], result['symbols'])
+        index.finalize()
+        return index
+
+    def add_file(self, path, symbols):
+        path_id = self._paths(path)
+        for name, typ, scope, line, symbol_id in symbols:
+            self.symbol_names.append(self._names(name))
+            self.symbol_types.append(self._types(typ))
+            self.symbol_scopes.append(self._scopes(scope))
+            self.symbol_paths.append(path_id)
+            self.symbol_lines.append(line)
+        self._finalized = False
+
+    def finalize(self):
+        names = self._names.values
+        self.lowered = [name.lower() for name in names]
+        self.sorted_ids = array('L', sorted(range(len(names)), key=self.lowered.__getitem__))
+        self.sorted_names = [self.lowered[i] for i in self.sorted_ids]
+
+        counts = array('L', [0]) * (len(names) + 1)
+        for name_id in self.symbol_names:
+            counts[name_id + 1] += 1
+        for i in range(len(names)):
+            counts[i + 1] += counts[i]
+        self.name_offsets = counts
+        self.name_symbols = array('L', [0]) * len(self.symbol_names)
+        fill = array('L', counts[:-1])
+        for symbol_id, name_id in enumerate(self.symbol_names):
+            self.name_symbols[fill[name_id]] = symbol_id
+            fill[name_id] += 1
+
+        postings = {}
+        for name_id, name in enumerate(self.lowered):
+            for trigram in _trigrams(name):
+                posting = postings.get(trigram)
+                if posting is None:
+                    posting = postings[trigram] = array('L')
+                posting.append(name_id)
+        self.trigrams = postings
+        self.substrings = SubstringIndex(names)
+
+        self.fuzzy_order = array('L', sorted(range(len(names)), key=lambda name_id: len(names[name_id])))
+        self.byte_bitmaps = _byte_bitmaps([self.lowered[name_id] for name_id in self.fuzzy_order])
+        self._finalized = True
+
+    def symbol(self, symbol_id):
+        return (self._names.values[self.symbol_names[symbol_id]],
+                self._types.values[self.symbol_types[symbol_id]],
+                self._scopes.values[self.symbol_scopes[symbol_id]],
+                self._paths.values[self.symbol_paths[symbol_id]],
+                self.symbol_lines[symbol_id])
+
+    def search(self, query, limit=50, typ=None, scope=None):
+        if not self._finalized:
+            self.finalize()
+        query = query.lower()
+        type_code = None
+        if typ is not None:
+            type_code = self._types.ids.get(typ)
+            if type_code is None:
+                return []
+        scope_ids = None
+        if scope:
+            scope = scope.lower()
+            scope_ids = {i for i, value in enumerate(self._scopes.values) if scope in value.lower()}
+            if not scope_ids:
+                return []
+
+        results = []
+        seen = set()
+        for name_id in self._ranked_names(query, limit):
+            if name_id in seen:
+                continue
+            seen.add(name_id)
+            for position in range(self.name_offsets[name_id], self.name_offsets[name_id + 1]):
+                symbol_id = self.name_symbols[position]
+                if type_code is not None and self.symbol_types[symbol_id] != type_code:
+                    continue
+                if scope_ids is not None and self.symbol_scopes[symbol_id] not in scope_ids:
+                    continue
+                results.append(self.symbol(symbol_id))
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def _ranked_names(self, query, limit):
+        if not query:
+            yield from self.sorted_ids
+            return
+        yield from self._prefix_matches(query)
+        yield from self._substring_matches(query)
+        yield from self._fuzzy_matches(query, limit)
+
+    def _prefix_matches(self, query):
+        position = bisect_left(self.sorted_names, query)
+        sorted_names = self.sorted_names
+        while position < len(sorted_names) and sorted_names[position].startswith(query):
+            yield self.sorted_ids[position]
+            position += 1
+
+    def _substring_matches(self, query):
+        if len(query) < 3:
+            yield from self.substrings.iter_matches(query)
+            return
+        postings = []
+        for trigram in _trigrams(query):
+            posting = self.trigrams.get(trigram)
+            if posting is None:
+                return
+            postings.append(posting)
+        lowered = self.lowered
+        candidates = [name_id for name_id in min(postings, key=len) if query in lowered[name_id]]
+        candidates.sort(key=lambda name_id: len(lowered[name_id]))
+        yield from candidates
+
+    def _fuzzy_matches(self, query, page):
+        candidates = -1
+        for byte in set(query.encode('utf-8')):
+            bitmap = self.byte_bitmaps.get(byte)
+            if bitmap is None:
+                return
+            candidates &= bitmap
+        # ``[^x]*x`` cannot backtrack into an earlier ``x``, so a name is checked in linear time
+        pattern = re.compile(''.join(f"({re.escape(char)})[^{re.escape(following)}]*"
+                                     for char, following in zip(query, query[1:])) + f"({re.escape(query[-1])})")
+        names = self._names.values
+        lowered = self.lowered
+        order = self.fuzzy_order
+        flags = bin(candidates)[:1:-1]
+        hits = []
+        rank = flags.find('1')
+        while rank != -1:
+            name_id = order[rank]
+            match = pattern.search(lowered[name_id])
+            if match is not None:
+                name = names[name_id]
+                starts = _word_starts(name, match.regs[1:]) if len(name) == len(lowered[name_id]) else 0
+                hits.append((-starts, match.end() - match.start(), rank, name_id))
+                if len(hits) >= page:
+                    hits.sort()
+                    yield from (hit[3] for hit in hits)
+                    hits = []
+            rank = flags.find('1', rank + 1)
+        hits.sort()
+        yield from (hit[3] for hit in hits)
+
+
+def iter_ndjson(file_path):
+    with open(file_path) as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Search symbols in an index written by indexer.py.')
+    parser.add_argument('index', help='NDJSON file produced by indexer.py')
+    parser.add_argument('query')
+    parser.add_argument('-n', '--limit', type=int, default=20)
+    parser.add_argument('--type', dest='typ', choices=['Function', 'Class', 'Variable', 'Import'])
+    parser.add_argument('--scope', help='only symbols whose scope contains this text')
+    args = parser.parse_args(argv)
+
+    index = SymbolIndex.from_results(iter_ndjson(args.index))
+    for name, typ, scope, path, line in index.search(args.query, args.limit, args.typ, args.scope):
+        print(f"{path}:{line}: {name} ({typ}, {scope})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,185 @@
+from array import array
+
+_blake2b = None
+
+
+class StringTable:
+    """Process-wide intern table mapping symbol, type and scope strings to small integer codes."""
+
+    def __init__(self):
+        self.strings = []
+        self.codes = {}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, code):
+        return self.strings[code]
+
+    def intern(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+
+STRINGS = StringTable()
+
+
+def symbol_id(name, typ, scope, occurrence):
+    global _blake2b
+    if _blake2b is None:
+        # hashlib loads OpenSSL, which startup should not pay for before the first id is needed
+        from hashlib import blake2b as _blake2b
+    key = f"{scope}\0{typ}\0{name}\0{occurrence}".encode('utf-8', 'surrogatepass')
+    return int.from_bytes(_blake2b(key, digest_size=8).digest(), 'little')
+
+
+class Symbol:
+    __slots__ = ('name', 'type', 'scope', 'line', 'id')
+
+    def __init__(self, name, typ, scope, line, id):
+        self.name = name
+        self.type = typ
+        self.scope = scope
+        self.line = line
+        self.id = id
+
+    def __iter__(self):
+        return iter((self.name, self.type, self.scope, self.line, self.id))
+
+    def __repr__(self):
+        return f"Symbol({self.name!r}, {self.type!r}, {self.scope!r}, {self.line}, {self.id:#x})"
+
+
+class SymbolStore:
+    """Column store of symbols: interned string codes, ``uint32`` lines and stable ``uint64`` ids.
+
+    A symbol's id hashes its name, type, scope and how many identical symbols precede it in the
+    file, so it survives edits that only move lines. Slicing returns a store whose columns are
+    memoryviews of this one; a store must not be appended to while such views are alive.
+    Iterating yields ``(name, type, scope, line, id)`` tuples, the row shape used by exporters.
+    """
+
+    __slots__ = ('names', 'types', 'scopes', 'lines', 'ids', '_occurrences')
+
+    def __init__(self, names=None, types=None, scopes=None, lines=None, ids=None):
+        self.names = array('I') if names is None else names
+        self.types = array('I') if types is None else types
+        self.scopes = array('I') if scopes is None else scopes
+        self.lines = array('I') if lines is None else lines
+        self.ids = array('Q') if ids is None else ids
+        self._occurrences = None
+
+    @classmethod
+    def from_rows(cls, rows):
+        store = cls()
+        intern = STRINGS.intern
+        for name, typ, scope, line, id in rows:
+            store.names.append(intern(name))
+            store.types.append(intern(typ))
+            store.scopes.append(intern(scope))
+            store.lines.append(line)
+            store.ids.append(id)
+        return store
+
+    @classmethod
+    def concat(cls, stores):
+        store = cls()
+        for part in stores:
+            store.names.extend(part.names)
+            store.types.extend(part.types)
+            store.scopes.extend(part.scopes)
+            store.lines.extend(part.lines)
+        store._assign_ids()
+        return store
+
+    def append(self, name, typ, scope, line):
+        intern = STRINGS.intern
+        key = (intern(name), intern(typ), intern(scope))
+        if self._occurrences is None:
+            self._occurrences = self._count_occurrences()
+        occurrence = self._occurrences.get(key, 0)
+        self._occurrences[key] = occurrence + 1
+        self.names.append(key[0])
+        self.types.append(key[1])
+        self.scopes.append(key[2])
+        self.lines.append(line)
+        self.ids.append(symbol_id(name, typ, scope, occurrence))
+
+    def _count_occurrences(self):
+        occurrences = {}
+        for key in zip(self.names, self.types, self.scopes):
+            occurrences[key] = occurrences.get(key, 0) + 1
+        return occurrences
+
+    def compact(self):
+        # Drop the per-key counters kept for appending; they are rebuilt on the next append
+        self._occurrences = None
+        return self
+
+    def _assign_ids(self):
+        strings = STRINGS.strings
+        occurrences = {}
+        ids = array('Q')
+        for key in zip(self.names, self.types, self.scopes):
+            occurrence = occurrences.get(key, 0)
+            occurrences[key] = occurrence + 1
+            ids.append(symbol_id(strings[key[0]], strings[key[1]], strings[key[2]], occurrence))
+        self.ids = ids
+
+    def shifted(self, delta):
+        if not delta:
+            return self
+        return SymbolStore(self.names, self.types, self.scopes,
+                           array('I', [line + delta for line in self.lines]), self.ids)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SymbolStore(*(memoryview(column)[index] for column in
+                                 (self.names, self.types, self.scopes, self.lines, self.ids)))
+        strings = STRINGS.strings
+        return (strings[self.names[index]], strings[self.types[index]], strings[self.scopes[index]],
+                self.lines[index], self.ids[index])
+
+    def __iter__(self):
+        strings = STRINGS.strings
+        for name, typ, scope, line, id in zip(self.names, self.types, self.scopes, self.lines, self.ids):
+            yield strings[name], strings[typ], strings[scope], line, id
+
+    def __eq__(self, other):
+        if isinstance(other, SymbolStore):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __reduce__(self):
+        # String codes are only meaningful in this process, so pickle the decoded rows.
+        return SymbolStore.from_rows, (list(self),)
+
+    def symbol(self, index):
+        return Symbol(*self[index])
+
+    def name(self, index):
+        return STRINGS.strings[self.names[index]]
+
+    def type(self, index):
+        return STRINGS.strings[self.types[index]]
+
+    def scope(self, index):
+        return STRINGS.strings[self.scopes[index]]
+
+    def iter_names(self):
+        strings = STRINGS.strings
+        return (strings[code] for code in self.names)
+
+    def chunks(self, size):
+        for start in range(0, len(self), size):
+            yield self[start:start + size]
+
+    def nbytes(self):
+        return sum(column.itemsize * len(column) for column in
+                   (self.names, self.types, self.scopes, self.lines, self.ids))
@@ -0,0 +1,97 @@
+import ast
+
+import pytest
+
+from analysis import IncrementalAnalyzer, ModuleAnalyzer
+
+SOURCE = '''\
+import os
+from collections import OrderedDict as OD
+
+LIMIT = 10
+
+
+def first(value):
+    total = value
+    return total
+
+
+@decorator
+class Widget(Base):
+    size = 3
+
+    def draw(self):
+        inner = 1
+        return inner
+
+
+def first(value):
+    return value
+'''
+
+
+def full_rows(content):
+    return list(ModuleAnalyzer().analyze(ast.parse(content)).symbol_table)
+
+
+def edited(content, old, new):
+    assert old in content
+    return content.replace(old, new, 1)
+
+
+@pytest.mark.parametrize('old, new', [
+    ('LIMIT = 10', 'LIMIT = 10\nEXTRA = 2'),
+    ('    total = value\n', ''),
+    ('    size = 3\n', '    size = 3\n    color = 4\n'),
+    ('def draw(self):', 'def paint(self):'),
+    ('import os\n', ''),
+    ('\n\ndef first(value):\n    return value\n', '\nfirst = None\n'),
+    ('@decorator\n', '@decorator\n@another\n'),
+])
+def test_update_matches_full_analysis(old, new):
+    incremental = IncrementalAnalyzer()
+    incremental.reset(SOURCE)
+    content = edited(SOURCE, old, new)
+    assert list(incremental.update(content)) == full_rows(content)
+    assert not incremental.stale
+    assert 0 < incremental.reparsed_lines < len(content.splitlines())
+
+
+def test_successive_updates_match_full_analysis():
+    incremental = IncrementalAnalyzer()
+    incremental.reset(SOURCE)
+    content = SOURCE
+    for old, new in [('LIMIT = 10', 'LIMIT = 11'), ('inner = 1', 'inner = 1\n        outer = 2'),
+                     ('size = 3', 'size = 3\n\n    def grow(self):\n        pass')]:
+        content = edited(content, old, new)
+        assert list(incremental.update(content)) == full_rows(content)
+
+
+def test_unchanged_text_reparses_nothing():
+    incremental = IncrementalAnalyzer()
+    rows = list(incremental.reset(SOURCE))
+    assert list(incremental.update(SOURCE)) == rows
+    assert incremental.reparsed_lines == 0
+
+
+def test_syntax_error_keeps_previous_rows_and_marks_stale():
+    incremental = IncrementalAnalyzer()
+    rows = list(incremental.reset(SOURCE))
+    broken = edited(SOURCE, 'LIMIT = 10', 'LIMIT = (10')
+    assert list(incremental.update(broken)) == rows
+    assert incremental.stale
+    assert incremental.reparsed_lines == 0
+
+    # Further typing still diffs against the last text that parsed
+    fixed = edited(SOURCE, 'LIMIT = 10', 'LIMIT = (10)\nNEW = 1')
+    assert list(incremental.update(fixed)) == full_rows(fixed)
+    assert not incremental.stale
+
+
+def test_reset_clears_stale():
+    incremental = IncrementalAnalyzer()
+    incremental.reset(SOURCE)
+    incremental.update('def broken(:\n')
+    assert incremental.stale
+    assert list(incremental.reset(SOURCE)) == full_rows(SOURCE)
+    assert not incremental.stale
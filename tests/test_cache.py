@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import itertools
+
+import pytest
+
+import cache
+from cache import SymbolCache, content_digest, SCHEMA_VERSION
+
+ROWS = [['first', 'Function', 'Global', 1, 7], ['Widget', 'Class', 'Global', 4, 9]]
+METRICS = {'Lines of Code': 5}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Distinct last_used stamps, so eviction order does not depend on the timer resolution
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(cache.time, 'time', lambda: next(ticks))
+
+
+def store_file(symbol_cache, path, content):
+    with open(path, 'wb') as file:
+        file.write(content)
+    stat = os.stat(path)
+    symbol_cache.store(path, stat.st_mtime_ns, stat.st_size, content_digest(content), ROWS, METRICS)
+
+
+def test_unchanged_file_is_served(tmp_path):
+    path = str(tmp_path / 'mod.py')
+    with SymbolCache(str(tmp_path / 'cache.db')) as symbol_cache:
+        store_file(symbol_cache, path, b'x = 1\n')
+        entry = symbol_cache.lookup(path)
+    assert entry.symbols == [tuple(row) for row in ROWS]
+    assert entry.metrics == METRICS
+    assert (symbol_cache.hits, symbol_cache.misses) == (1, 0)
+
+
+def test_touched_file_with_same_content_is_revalidated_by_digest(tmp_path):
+    path = str(tmp_path / 'mod.py')
+    with SymbolCache(str(tmp_path / 'cache.db')) as symbol_cache:
+        store_file(symbol_cache, path, b'x = 1\n')
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert symbol_cache.lookup(path) is not None
+        # The new mtime was recorded, so the next lookup does not hash the file again
+        mtime_ns, = symbol_cache.connection.execute('SELECT mtime_ns FROM files').fetchone()
+        assert mtime_ns == os.stat(path).st_mtime_ns
+
+
+def test_changed_content_misses(tmp_path):
+    path = str(tmp_path / 'mod.py')
+    with SymbolCache(str(tmp_path / 'cache.db')) as symbol_cache:
+        store_file(symbol_cache, path, b'x = 1\n')
+        with open(path, 'wb') as file:
+            file.write(b'x = 22\n')
+        assert symbol_cache.lookup(path) is None
+        assert symbol_cache.misses == 1
+
+
+def test_entries_persist_across_connections(tmp_path):
+    path = str(tmp_path / 'mod.py')
+    db_path = str(tmp_path / 'cache.db')
+    with SymbolCache(db_path) as symbol_cache:
+        store_file(symbol_cache, path, b'x = 1\n')
+    with SymbolCache(db_path) as symbol_cache:
+        assert symbol_cache.lookup(path) is not None
+        assert symbol_cache.total_bytes > 0
+
+
+def test_other_schema_version_is_dropped(tmp_path):
+    path = str(tmp_path / 'mod.py')
+    db_path = str(tmp_path / 'cache.db')
+    with SymbolCache(db_path) as symbol_cache:
+        store_file(symbol_cache, path, b'x = 1\n')
+    connection = sqlite3.connect(db_path)
+    connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION + 1}')
+    connection.commit()
+    connection.close()
+    with SymbolCache(db_path) as symbol_cache:
+        assert symbol_cache.lookup(path) is None
+        assert symbol_cache.total_bytes == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    paths = [str(tmp_path / f'mod{i}.py') for i in range(4)]
+    with SymbolCache(str(tmp_path / 'cache.db')) as symbol_cache:
+        store_file(symbol_cache, paths[0], b'a = 1\n')
+        entry_bytes = symbol_cache.total_bytes
+        symbol_cache.max_bytes = entry_bytes * 3
+        for path in paths[1:3]:
+            store_file(symbol_cache, path, b'a = 1\n')
+        assert symbol_cache.lookup(paths[0]) is not None
+        store_file(symbol_cache, paths[3], b'a = 1\n')
+        kept = {path for (path,) in symbol_cache.connection.execute('SELECT path FROM files')}
+        assert paths[0] in kept and paths[3] in kept
+        assert paths[1] not in kept
+        assert symbol_cache.total_bytes <= symbol_cache.max_bytes
+
+
+def test_prune_drops_deleted_files(tmp_path):
+    paths = [str(tmp_path / f'mod{i}.py') for i in range(2)]
+    with SymbolCache(str(tmp_path / 'cache.db')) as symbol_cache:
+        for path in paths:
+            store_file(symbol_cache, path, b'a = 1\n')
+        os.remove(paths[0])
+        assert symbol_cache.prune(str(tmp_path)) == 1
+        assert symbol_cache.lookup(paths[1]) is not None
@@ -0,0 +1,124 @@
+import pytest
+
+from depgraph import ImportGraph, module_name, resolve_import
+
+PROJECT = {
+    'pkg/__init__.py': "from . import core\n",
+    'pkg/core.py': "from .util import helper\nimport pkg.extra\n",
+    'pkg/util.py': "from . import core, later\n\ndef helper():\n    pass\n",
+    'pkg/extra.py': "def load():\n    from pkg import core\n",
+    'top.py': "from .... import nowhere\nimport os\n",
+}
+
+
+@pytest.mark.parametrize('package, imported, level, expected', [
+    ('a.b.c', 'x', 0, 'x'),
+    ('a.b.c', 'x', 1, 'a.b.c.x'),
+    ('a.b.c', 'x', 2, 'a.b.x'),
+    ('a.b.c', '', 3, 'a'),
+    ('a.b.c', 'x', 4, 'x'),
+    ('a.b.c', 'x', 5, None),
+    ('', 'x', 1, 'x'),
+    ('', 'x', 2, None),
+])
+def test_resolve_import(package, imported, level, expected):
+    assert resolve_import(package, imported, level) == expected
+
+
+def write_project(root, files):
+    for relative, source in files.items():
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source)
+
+
+def snapshot(graph):
+    names = graph.names
+    return {name: (sorted(names[target] for target in graph.imports(module)),
+                   sorted(names[target] for target in graph.imports(module, at_import_time=True)),
+                   sorted(names[source] for source in graph.importers(module)))
+            for name, module in graph.ids.items()}
+
+
+@pytest.fixture
+def project(tmp_path):
+    write_project(tmp_path, PROJECT)
+    return tmp_path
+
+
+def test_module_name(project):
+    assert module_name(str(project / 'pkg' / '__init__.py'), str(project)) == 'pkg'
+    assert module_name(str(project / 'pkg' / 'core.py'), str(project)) == 'pkg.core'
+    assert module_name(str(project / 'pkg' / 'core.py'), str(project / 'pkg')) == 'pkg.core'
+
+
+def test_build(project):
+    graph = ImportGraph.build(str(project), workers=1)
+    state = snapshot(graph)
+    assert state['pkg'] == (['pkg.core'], ['pkg.core'], [])
+    assert state['pkg.core'] == (['pkg.extra', 'pkg.util'], ['pkg.extra', 'pkg.util'], ['pkg', 'pkg.extra', 'pkg.util'])
+    assert state['pkg.extra'] == (['pkg.core'], [], ['pkg.core'])
+    # ``from .... import`` climbs above the root and resolves to nothing
+    assert state['top'] == ([], [], [])
+    assert 'nowhere' not in graph.unresolved
+
+
+def test_cycles(project):
+    graph = ImportGraph.build(str(project), workers=1)
+    names = graph.names
+    assert [sorted(names[module] for module in component) for component in graph.cycles()] == \
+        [['pkg.core', 'pkg.extra', 'pkg.util']]
+    # extra only imports core when load() runs
+    assert [sorted(names[module] for module in component) for component in graph.cycles(at_import_time=True)] == \
+        [['pkg.core', 'pkg.util']]
+    assert graph.fan_out(graph.module('pkg')) == 3
+
+
+@pytest.mark.parametrize('compact_ratio', [100, 0])
+def test_updates_match_rebuild(project, compact_ratio):
+    graph = ImportGraph.build(str(project), workers=1)
+    graph.compact_ratio = compact_ratio
+    edited = {
+        'pkg/util.py': "def helper():\n    from pkg import later\n",
+        'pkg/later.py': "from .extra import load\n",
+    }
+    for relative, source in edited.items():
+        graph.update_file(str(project / relative), source)
+    write_project(project, edited)
+    (project / 'top.py').unlink()
+    graph.remove_file(str(project / 'top.py'))
+    if compact_ratio:
+        assert graph._overlay
+    assert snapshot(graph) == snapshot(ImportGraph.build(str(project), workers=1))
+    # util no longer imports core at import time; the cycle through later and extra is lazy
+    assert len(graph.cycles()) == 1
+    assert graph.cycles(at_import_time=True) == []
+
+
+def test_new_module_resolves_earlier_imports(project):
+    graph = ImportGraph.build(str(project), workers=1)
+    util = graph.module('pkg.util')
+    assert 'pkg.later' in graph.unresolved
+    write_project(project, {'pkg/later.py': ''})
+    later = graph.update_file(str(project / 'pkg' / 'later.py'))
+    assert later in graph.imports(util)
+    assert list(graph.importers(later)) == [util]
+
+
+@pytest.mark.parametrize('source', ["import pkg.core\ndef broken(:\n", "import pkg.core\0\n"])
+def test_unparsable_source_keeps_edges(project, source):
+    graph = ImportGraph.build(str(project), workers=1)
+    before = snapshot(graph)
+    graph.update_file(str(project / 'pkg' / 'util.py'), source)
+    assert snapshot(graph) == before
+
+
+def test_refresh_and_cache(project, tmp_path_factory):
+    graph = ImportGraph.build(str(project), workers=1)
+    cache = tmp_path_factory.mktemp('cache') / 'imports.pickle'
+    graph.save(str(cache))
+    write_project(project, {'pkg/extra.py': "import pkg.util\n"})
+    loaded = ImportGraph.load(str(cache))
+    assert snapshot(loaded) == snapshot(graph)
+    assert loaded.refresh() == 1
+    assert snapshot(loaded) == snapshot(ImportGraph.build(str(project), workers=1))
@@ -0,0 +1,121 @@
+import io
+import csv
+import json
+from array import array
+
+import pytest
+
+from exporters import (CHUNK_SIZE, TABLE_ROW_GROUP, write_columnar, read_columnar, write_json, write_ndjson,
+                       write_csv, export_symbols, write_table_columnar, read_table_columnar, export_table)
+from symbols import SymbolStore
+
+ROWS = [('first', 'Function', 'Global', 1, 11), ('Widget', 'Class', 'Global', 4, 2 ** 64 - 1),
+        ('größe', 'Variable', 'Widget', 7, 0), ('quote"\\\n', 'Import', 'Global (from x)', 9, 5)]
+
+
+def many_rows(count=CHUNK_SIZE + 10):
+    return [(f'name_{i % 7}', 'Function', f'scope_{i % 3}', i + 1, i * 31) for i in range(count)]
+
+
+@pytest.mark.parametrize('rows', [[], ROWS, many_rows()])
+def test_columnar_round_trip(rows):
+    buffer = io.BytesIO()
+    write_columnar(rows, buffer)
+    buffer.seek(0)
+    assert list(read_columnar(buffer)) == rows
+
+
+def test_columnar_round_trip_from_store():
+    store = SymbolStore.from_rows(many_rows())
+    buffer = io.BytesIO()
+    write_columnar(store, buffer)
+    buffer.seek(0)
+    assert list(read_columnar(buffer)) == list(store)
+
+
+def test_columnar_rejects_other_files():
+    with pytest.raises(ValueError):
+        list(read_columnar(io.BytesIO(b'MTBL\x01\x00')))
+    buffer = io.BytesIO()
+    write_columnar(ROWS, buffer)
+    with pytest.raises(ValueError):
+        list(read_columnar(io.BytesIO(buffer.getvalue()[:-10])))
+
+
+@pytest.mark.parametrize('rows', [[], ROWS, many_rows()])
+def test_json_matches_json_dump(rows):
+    buffer = io.StringIO()
+    write_json(rows, buffer)
+    expected = io.StringIO()
+    json.dump([list(row) for row in rows], expected, indent=4)
+    assert buffer.getvalue() == expected.getvalue()
+
+
+def test_json_from_store_matches_rows():
+    store = SymbolStore.from_rows(ROWS)
+    from_store, from_rows = io.StringIO(), io.StringIO()
+    write_json(store, from_store)
+    write_json(ROWS, from_rows)
+    assert from_store.getvalue() == from_rows.getvalue()
+
+
+def test_ndjson_rows():
+    buffer = io.StringIO()
+    write_ndjson(ROWS, buffer)
+    records = [json.loads(line) for line in buffer.getvalue().splitlines()]
+    assert [(r['symbol'], r['type'], r['scope'], r['line'], r['id']) for r in records] == ROWS
+
+
+def test_csv_rows():
+    buffer = io.StringIO(newline='')
+    write_csv(ROWS, buffer)
+    buffer.seek(0)
+    header, *rows = csv.reader(buffer)
+    assert header == ['Symbol', 'Type', 'Scope', 'Line', 'ID']
+    assert [tuple(row[:3]) + (int(row[3]), int(row[4])) for row in rows] == ROWS
+
+
+def test_export_symbols_picks_format_by_extension(tmp_path):
+    path = str(tmp_path / 'symbols.stbl')
+    export_symbols(ROWS, path)
+    with open(path, 'rb') as file:
+        assert list(read_columnar(file)) == ROWS
+
+
+def table(count):
+    return [('module', [f'mod_{i % 5}' for i in range(count)]),
+            ('qualname', [f'größe.f_{i}' for i in range(count)]),
+            ('line', array('I', range(count))),
+            ('rank', array('L', range(count, 0, -1))),
+            ('offset', array('Q', (i * 2 ** 33 for i in range(count))))]
+
+
+@pytest.mark.parametrize('count', [0, 3, TABLE_ROW_GROUP + 10])
+def test_table_columnar_round_trip(count):
+    columns = table(count)
+    buffer = io.BytesIO()
+    write_table_columnar(columns, buffer)
+    buffer.seek(0)
+    loaded = read_table_columnar(buffer)
+    assert list(loaded) == [name for name, _ in columns]
+    for name, values in columns:
+        assert list(loaded[name]) == list(values)
+    # Columns are stored by width, so 'L' reads back as whichever fixed-width code matches it here
+    assert [loaded[name].typecode for name in ('line', 'rank', 'offset')] == \
+        ['I', {4: 'I', 8: 'Q'}[array('L').itemsize], 'Q']
+
+
+def test_table_columnar_rejects_other_files():
+    with pytest.raises(ValueError):
+        read_table_columnar(io.BytesIO(b'not a table'))
+
+
+def test_export_table_csv(tmp_path):
+    path = str(tmp_path / 'metrics.csv')
+    export_table(table(3), path)
+    with open(path, newline='') as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ['module', 'qualname', 'line', 'rank', 'offset']
+    assert rows[2] == ['mod_1', 'größe.f_1', '1', '2', str(2 ** 33)]
+    with pytest.raises(ValueError):
+        export_table(table(1), str(tmp_path / 'metrics.xlsx'))
@@ -0,0 +1,70 @@
+import os
+import hashlib
+
+import pytest
+
+from loader import decode_source, detect_encoding, iter_batches, iter_source_entries, load_source
+
+TEXT = "name = 'café'\n\ndef f():\n    return name\n"
+
+
+def write(tmp_path, data, name='module.py'):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.mark.parametrize('mmap_threshold', [0, 1])
+@pytest.mark.parametrize('data, encoding, newline', [
+    (TEXT.encode('utf-8'), 'utf-8', '\n'),
+    (b'\xef\xbb\xbf' + TEXT.encode('utf-8'), 'utf-8-sig', '\n'),
+    (b'# -*- coding: latin-1 -*-\n' + TEXT.encode('latin-1'), 'iso-8859-1', '\n'),
+    (TEXT.replace('\n', '\r\n').encode('utf-8'), 'utf-8', '\r\n'),
+    (TEXT.replace('\n', '\r').encode('utf-8'), 'utf-8', '\r'),
+])
+def test_load_source(tmp_path, data, encoding, newline, mmap_threshold):
+    path = write(tmp_path, data)
+    source = load_source(path, mmap_threshold)
+    assert source.text.endswith(TEXT)
+    assert '\r' not in source.text and '\ufeff' not in source.text
+    assert (source.encoding, source.newline) == (encoding, newline)
+    assert source.mapped == bool(mmap_threshold)
+    assert source.size == len(data)
+    with open(path, encoding=encoding) as file:
+        assert source.text == file.read()
+
+
+@pytest.mark.parametrize('mmap_threshold', [0, 1])
+def test_digest_sees_raw_bytes(tmp_path, mmap_threshold):
+    data = TEXT.replace('\n', '\r\n').encode('utf-8')
+    source = load_source(write(tmp_path, data), mmap_threshold, digest=lambda raw: hashlib.sha1(raw).hexdigest())
+    assert source.digest == hashlib.sha1(data).hexdigest()
+    assert load_source(write(tmp_path, data), mmap_threshold).digest is None
+
+
+def test_empty_file_is_not_mapped(tmp_path):
+    source = load_source(write(tmp_path, b''), 1)
+    assert (source.text, source.mapped, source.encoding) == ('', False, 'utf-8')
+
+
+def test_detect_encoding_reads_only_two_lines():
+    assert detect_encoding(b'#!/usr/bin/env python\n# coding: cp1252\nx = 1\n') == 'cp1252'
+    assert detect_encoding(b'x = 1\ny = 2\n# coding: cp1252\n') == 'utf-8'
+
+
+def test_decode_source_rejects_wrong_encoding():
+    with pytest.raises(UnicodeDecodeError):
+        decode_source('café'.encode('latin-1'), 'utf-8')
+
+
+def test_entries_and_batches(tmp_path):
+    (tmp_path / 'pkg' / 'skip').mkdir(parents=True)
+    for name, size in [('b.py', 30), ('a.py', 10), ('pkg/c.py', 50), ('pkg/skip/d.py', 5), ('notes.txt', 5)]:
+        (tmp_path / name).write_bytes(b'#' * size)
+    entries = list(iter_source_entries(str(tmp_path), skip_dirs={'skip'}))
+    names = [os.path.relpath(path, tmp_path) for path, _ in entries]
+    assert names == ['a.py', 'b.py', 'pkg/c.py']
+    assert [stat.st_size for _, stat in entries] == [10, 30, 50]
+    batches = list(iter_batches(entries, max_bytes=40))
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert [len(batch) for batch in iter_batches(entries, max_files=1)] == [1, 1, 1]
@@ -0,0 +1,139 @@
+import io
+import ast
+
+import pytest
+
+import metrics
+from exporters import read_table_columnar, write_table_columnar
+from metrics import UNIT_FIELDS, KINDS, ProjectMetrics, compare, module_metrics
+
+SOURCE = '''\
+import os
+
+
+def plain(x):
+    return x
+
+
+@decorator
+def branchy(items, flag):
+    # comment
+    total = 0
+    for item in items:
+        if item and flag:
+            total += 1
+        elif item:
+            total -= 1
+    return [i for i in items if i]
+
+
+class Shape:
+    kind = 'a' if os.name else 'b'
+
+    def area(self):
+        if self.w:
+            return helper(self.w)
+        return 0
+
+    def plain(self):
+        return plain(1)
+'''
+
+
+def units(module):
+    width = len(UNIT_FIELDS)
+    return {qualname: (KINDS[kind],) + tuple(module.values[index * width:(index + 1) * width])
+            for index, (qualname, kind) in enumerate(zip(module.qualnames, module.kinds))}
+
+
+def test_module_metrics():
+    data = SOURCE.encode('utf-8')
+    module = module_metrics(ast.parse(data), data, 'm')
+    assert UNIT_FIELDS == ('line', 'end_line', 'complexity', 'loc', 'sloc', 'depth', 'fan_out')
+    assert units(module) == {
+        # The class body's conditional expression belongs to the class, not the module
+        'm': ('module', 1, 29, 1, 29, 20, 0, 0),
+        'm.plain': ('function', 4, 5, 1, 2, 2, 0, 0),
+        # Starts at the decorator; for, if, ``and``, elif and the comprehension's loop and filter
+        'm.branchy': ('function', 8, 17, 7, 10, 9, 2, 0),
+        'm.Shape': ('class', 20, 29, 4, 10, 8, 0, 0),
+        'm.Shape.area': ('method', 23, 26, 2, 4, 4, 1, 1),
+        'm.Shape.plain': ('method', 28, 29, 1, 2, 2, 0, 1),
+    }
+    assert module.called == {'helper': 1, 'plain': 1}
+
+
+def project_of(tmp_path, sources):
+    project = ProjectMetrics(str(tmp_path))
+    for name, source in sources.items():
+        project.update_file(str(tmp_path / name), source)
+    project.finalize()
+    return project
+
+
+def test_fan_in_and_queries(tmp_path):
+    project = project_of(tmp_path, {'m.py': SOURCE, 'other.py': 'def caller():\n    return plain(branchy())\n'})
+    rows = {project.qualnames[index]: project.row(index) for index in range(len(project))}
+    fan_in = {qualname: row[-1] for qualname, row in rows.items()}
+    assert fan_in['m.plain'] == fan_in['m.Shape.plain'] == 2
+    assert fan_in['m.branchy'] == 1
+    assert fan_in['m'] == fan_in['m.Shape.area'] == 0
+    assert [project.qualnames[index] for index in project.top('complexity', 2)] == ['m.branchy', 'm.Shape']
+    assert [project.qualnames[index] for index in project.top('complexity', 2, kinds='method')] == \
+        ['m.Shape.area', 'm.Shape.plain']
+    assert project.summary('complexity', ('function', 'method'))['max'] == 7
+    assert sum(project.histogram('complexity', 3)[1]) == len(project)
+
+
+def test_update_keeps_rows_on_syntax_error(tmp_path):
+    project = project_of(tmp_path, {'m.py': SOURCE})
+    before = project.table()
+    project.update_file(str(tmp_path / 'm.py'), 'def broken(:\n')
+    assert project.table() == before
+
+
+def saved_table(project):
+    file = io.BytesIO()
+    write_table_columnar(project.table(), file)
+    file.seek(0)
+    return read_table_columnar(file)
+
+
+def test_compare(tmp_path):
+    duplicated = "def dup():\n    pass\n\ndef dup():\n    return 1 if x else 2\n"
+    baseline = saved_table(project_of(tmp_path, {'m.py': SOURCE + duplicated}))
+    edited = SOURCE.replace('return helper(self.w)', 'return helper(self.w) if self.h else 0')
+    # The first dup grows; matching by name alone would compare it with the second one
+    edited += "def dup():\n    return 3 if y else 4\n\ndef dup():\n    return 1 if x else 2\n\ndef new(a):\n    pass\n"
+    grown, added = compare(project_of(tmp_path, {'m.py': edited}), baseline)
+    assert grown == [(1, 'm.Shape', 4, 5), (1, 'm.Shape.area', 2, 3), (1, 'm.dup', 1, 2)]
+    assert added == [(1, 'm.new')]
+
+
+def test_index_cache_is_rebuilt_for_another_root(tmp_path, capsys):
+    first, second = tmp_path / 'first', tmp_path / 'second'
+    first.mkdir()
+    second.mkdir()
+    (first / 'alpha.py').write_text('def alpha():\n    pass\n')
+    (second / 'beta.py').write_text('def beta():\n    pass\n')
+    cache = str(tmp_path / 'metrics.pickle')
+    assert metrics.main([str(first), '-j', '1', '--index-cache', cache]) == 0
+    assert 'alpha.alpha' in capsys.readouterr().out
+    assert metrics.main([str(second), '-j', '1', '--index-cache', cache]) == 0
+    captured = capsys.readouterr()
+    assert 'beta.beta' in captured.out and 'alpha' not in captured.out
+    assert 'rebuilding' in captured.err
+    assert ProjectMetrics.load(cache).root == str(second)
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_aggregates_with_and_without_numpy(tmp_path, use_numpy):
+    project = project_of(tmp_path, {'m.py': SOURCE})
+    if use_numpy:
+        if project.numpy is None:
+            pytest.skip('numpy is not installed')
+    else:
+        project.numpy = None
+    assert [project.qualnames[index] for index in project.argsort('complexity', descending=True)][:2] == \
+        ['m.branchy', 'm.Shape']
+    assert project.summary('sloc')['count'] == len(project)
@@ -0,0 +1,61 @@
+import ast
+
+import pytest
+
+pytest.importorskip('PyQt5.QtCore')
+
+from PyQt5.QtCore import QModelIndex  # noqa: E402
+
+from models import SymbolTableModel, ASTTreeModel  # noqa: E402
+
+SOURCE = '''\
+import os
+
+
+class Widget:
+    def draw(self, canvas):
+        if canvas:
+            return canvas.paint(self)
+'''
+
+
+def test_ast_items_are_built_on_demand():
+    model = ASTTreeModel(ast.parse(SOURCE))
+    assert model.root._children is None
+    module = model.index(0, 0)
+    assert model.rowCount(module) == 2
+    widget = model.index(1, 0, module)
+    assert model.data(widget) == 'body[1]: ClassDef'
+    assert model.data(model.index(1, 2, module)) == '4-7'
+    assert widget.internalPointer()._children is None
+    assert model.hasChildren(widget)
+    assert model.parent(widget).internalPointer() is model.root
+
+
+def test_index_for_line_finds_innermost_node():
+    model = ASTTreeModel(ast.parse(SOURCE))
+    index = model.indexForLine(7)
+    assert model.lineAt(index) == 7
+    # Return -> Call -> Attribute -> the Name ``canvas``, the first node covering the line at each level
+    node = index.internalPointer().node
+    assert isinstance(node, ast.Name) and node.id == 'canvas'
+    assert isinstance(model.parent(model.parent(model.parent(index))).internalPointer().node, ast.Return)
+    assert not model.indexForLine(2).isValid()
+
+
+def test_symbol_filter_fetches_in_batches():
+    model = SymbolTableModel()
+    model.FETCH_SIZE = 10
+    model.setSymbols([(f'name_{i}', 'Variable', 'Global', i + 1, i) for i in range(25)])
+    assert model.rowCount() == 25
+    model.setFilter('NAME_')
+    assert model.rowCount() == 10
+    while model.canFetchMore(QModelIndex()):
+        model.fetchMore(QModelIndex())
+    assert model.rowCount() == 25
+    model.setFilter('name_2')
+    rows = [model.sourceRow(row) for row in range(model.rowCount())]
+    assert rows == [2] + list(range(20, 25))
+    assert model.lineAt(1) == 21
+    model.setFilter('')
+    assert model.rowCount() == 25
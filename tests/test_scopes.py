@@ -0,0 +1,149 @@
+import os
+import ast
+
+import pytest
+
+from scopes import DEF, USE, ReferenceIndex, resolve_tree
+
+SOURCE = '''\
+import os
+
+
+def outer(items):
+    total = 0
+
+    def inner():
+        nonlocal total
+        total += len(items)
+    squares = [x * x for x in items]
+    key = lambda y: y
+    try:
+        pass
+    except (OSError, ValueError) as error:
+        raise
+    match items:
+        case {"a": 1, **rest}:
+            pass
+    return os.path.join
+'''
+
+PROJECT = {
+    'pkg/__init__.py': "from .core import helper\nfrom .prompt import prompt\n",
+    'pkg/core.py': "def helper(x):\n    return len(x)\n",
+    'pkg/app.py': "from pkg import core\nfrom pkg.core import helper as h\n\ncore.helper([])\nh([])\n",
+    'pkg/prompt/__init__.py': "from .prompt import prompt\n",
+    'pkg/prompt/prompt.py': "def prompt():\n    pass\n",
+}
+
+
+def rows(references):
+    return {(line, column): (qualified, kind) for qualified, name, kind, line, column, scope in references.references}
+
+
+def test_resolve_scopes():
+    references = resolve_tree(ast.parse(SOURCE), 'm', source=SOURCE)
+    found = rows(references)
+    assert found[9, 8] == ('m.outer.total', DEF)
+    assert found[9, 17] == ('builtins.len', USE)
+    assert found[9, 21] == ('m.outer.items', USE)
+    assert found[10, 25] == ('m.outer.<listcomp:10:14>.x', DEF)
+    assert found[10, 30] == ('m.outer.items', USE)
+    assert found[11, 20] == ('m.outer.<lambda:11:10>.y', USE)
+    assert found[19, 19] == ('os.path.join', USE)
+    assert references.aliases == {'m.os': 'os'}
+    assert references.at(9, 19) == 'builtins.len'
+
+
+def test_columns_found_in_source():
+    # Neither the except handler nor the mapping pattern records where its name is
+    found = rows(resolve_tree(ast.parse(SOURCE), 'm', source=SOURCE))
+    assert found[14, 36] == ('m.outer.error', DEF)
+    assert found[17, 24] == ('m.outer.rest', DEF)
+    # Without the text the name is placed where the exception type ends
+    without_source = rows(resolve_tree(ast.parse(SOURCE), 'm'))
+    assert without_source[14, 32] == ('m.outer.error', DEF)
+
+
+def test_import_above_root_binds_without_alias():
+    source = "from .... import nowhere\nnowhere()\n"
+    references = resolve_tree(ast.parse(source), 'pkg.mod', source=source)
+    assert references.aliases == {}
+    assert rows(references)[2, 0] == ('pkg.mod.nowhere', USE)
+
+
+def write_project(root, files):
+    for relative, source in files.items():
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source)
+
+
+def located(index, qualified, root):
+    return [(os.path.relpath(path, root), line, column, kind) for path, line, column, kind in index.references(qualified)]
+
+
+@pytest.fixture
+def project(tmp_path):
+    write_project(tmp_path, PROJECT)
+    return tmp_path
+
+
+def test_references_follow_aliases(project):
+    index = ReferenceIndex.build(str(project), workers=1)
+    assert located(index, 'pkg.app.h', project) == [
+        ('pkg/__init__.py', 1, 18, 'def'),
+        ('pkg/app.py', 2, 31, 'def'),
+        ('pkg/app.py', 4, 5, 'use'),
+        ('pkg/app.py', 5, 0, 'use'),
+        ('pkg/core.py', 1, 4, 'def'),
+    ]
+    assert index.canonical('pkg.helper') == 'pkg.core.helper'
+    assert [path for path, *_ in located(index, 'builtins.len', project)] == ['pkg/core.py']
+
+
+def test_alias_to_own_submodule_terminates(project):
+    # ``from .prompt import prompt`` maps pkg.prompt to pkg.prompt.prompt, a longer name
+    index = ReferenceIndex.build(str(project), workers=1)
+    assert index.canonical('pkg.prompt') == 'pkg.prompt.prompt.prompt'
+    assert index.canonical('pkg.prompt.other') == 'pkg.prompt.other'
+    assert [path for path, *_ in located(index, 'pkg.prompt.prompt.prompt', project)] == \
+        ['pkg/__init__.py', 'pkg/prompt/__init__.py', 'pkg/prompt/prompt.py']
+
+
+@pytest.mark.parametrize('compact_ratio', [100, 0])
+def test_updates_match_rebuild(project, compact_ratio):
+    index = ReferenceIndex.build(str(project), workers=1)
+    index.compact_ratio = compact_ratio
+    edited = {
+        'pkg/app.py': "from pkg.core import helper\n\nhelper(helper)\n",
+        'pkg/extra.py': "import pkg.core\n\npkg.core.helper(1)\n",
+    }
+    for relative, source in edited.items():
+        index.update_file(str(project / relative), source)
+    write_project(project, edited)
+    (project / 'pkg' / 'prompt' / 'prompt.py').unlink()
+    index.remove_file(str(project / 'pkg' / 'prompt' / 'prompt.py'))
+    if compact_ratio:
+        assert index._overlay
+    rebuilt = ReferenceIndex.build(str(project), workers=1)
+    for name in ('pkg.core.helper', 'pkg.app.h', 'pkg.app.core', 'pkg.prompt.prompt.prompt', 'builtins.len'):
+        assert index.references(name) == rebuilt.references(name), name
+    assert ('pkg/extra.py', 3, 9, 'use') in located(index, 'pkg.core.helper', project)
+
+
+@pytest.mark.parametrize('source', ["def broken(:\n", "x = 1\0\n"])
+def test_unparsable_source_keeps_rows(project, source):
+    index = ReferenceIndex.build(str(project), workers=1)
+    before = index.references('pkg.core.helper')
+    index.update_file(str(project / 'pkg' / 'app.py'), source)
+    assert index.references('pkg.core.helper') == before
+
+
+def test_refresh_and_cache(project, tmp_path_factory):
+    index = ReferenceIndex.build(str(project), workers=1)
+    cache = tmp_path_factory.mktemp('cache') / 'references.pickle'
+    index.save(str(cache))
+    write_project(project, {'pkg/app.py': "from pkg.core import helper\nhelper(2)\n"})
+    loaded = ReferenceIndex.load(str(cache))
+    assert loaded.refresh() == 1
+    assert loaded.references('pkg.core.helper') == ReferenceIndex.build(str(project), workers=1).references('pkg.core.helper')
@@ -0,0 +1,57 @@
+from search import SymbolIndex
+
+NAMES = ['get_value_handler', 'debug_view_path_line', 'GetValueHandler', 'value', 'values_get',
+         'heavy_gravity_hatch', 'unrelated', 'set_value']
+
+
+def make_index(names=NAMES):
+    index = SymbolIndex()
+    index.add_file('pkg/mod.py', [(name, 'Function', 'Global', line, 0) for line, name in enumerate(names, 1)])
+    index.finalize()
+    return index
+
+
+def found(index, query, limit=50, **filters):
+    return [name for name, typ, scope, path, line in index.search(query, limit, **filters)]
+
+
+def test_prefix_then_substring_then_fuzzy():
+    # Substring hits come shortest first
+    assert found(make_index(), 'value') == ['value', 'values_get', 'set_value', 'GetValueHandler',
+                                            'get_value_handler']
+
+
+def test_fuzzy_ranks_word_starts_first():
+    results = found(make_index(), 'gvh')
+    assert set(results[:2]) == {'get_value_handler', 'GetValueHandler'}
+    assert set(results) == {'get_value_handler', 'GetValueHandler', 'heavy_gravity_hatch', 'debug_view_path_line'}
+
+
+def test_fuzzy_needs_the_characters_in_order():
+    index = make_index()
+    # Every name with h, l and v has them in another order
+    assert found(index, 'hlv') == []
+    assert found(index, 'zzq') == []
+
+
+def test_fuzzy_ranks_every_page():
+    # Many short poor matches before the good one; ranking within the page still puts it first
+    names = [f"g{'x' * i}v{'x' * i}h" for i in range(1, 8)] + ['gv_hub']
+    results = found(make_index(names), 'gvh', limit=len(names))
+    assert results[0] == 'gv_hub'
+    assert len(results) == len(names)
+
+
+def test_limit_and_filters():
+    index = SymbolIndex()
+    index.add_file('a.py', [('helper', 'Function', 'Global', 1, 0), ('helper', 'Variable', 'Widget', 5, 0)])
+    index.add_file('b.py', [('helpers', 'Class', 'Global', 2, 0)])
+    assert len(index.search('help', limit=2)) == 2
+    assert index.search('help', typ='Variable') == [('helper', 'Variable', 'Widget', 'a.py', 5)]
+    assert found(index, 'help', scope='glob') == ['helper', 'helpers']
+    assert index.search('help', typ='Import') == []
+
+
+def test_non_ascii_names():
+    index = make_index(['größe_berechnen', 'grosse'])
+    assert found(index, 'gößb') == ['größe_berechnen']
@@ -0,0 +1,74 @@
+import ast
+import pickle
+
+from analysis import ModuleAnalyzer
+from symbols import SymbolStore, symbol_id
+
+ROWS = [('first', 'Function', 'Global', 1), ('x', 'Variable', 'first', 2), ('x', 'Variable', 'first', 3),
+        ('Widget', 'Class', 'Global', 5)]
+
+
+def make_store(rows=ROWS):
+    store = SymbolStore()
+    for row in rows:
+        store.append(*row)
+    return store
+
+
+def symbols(content):
+    return ModuleAnalyzer().analyze(ast.parse(content)).symbol_table
+
+
+def test_ids_count_identical_symbols():
+    store = make_store()
+    assert store.ids[1] == symbol_id('x', 'Variable', 'first', 0)
+    assert store.ids[2] == symbol_id('x', 'Variable', 'first', 1)
+    assert len(set(store.ids)) == len(store)
+
+
+def test_ids_survive_edits_that_only_move_lines():
+    before = symbols('def first():\n    x = 1\n\nclass Widget:\n    pass\n')
+    after = symbols('# header\n\ndef first():\n    x = 1\n\n\nclass Widget:\n    pass\n')
+    assert list(before.ids) == list(after.ids)
+    assert list(before.lines) != list(after.lines)
+
+
+def test_concat_matches_appending_everything():
+    whole = make_store()
+    parts = [make_store(ROWS[:2]), make_store(ROWS[2:])]
+    # The second part counts its own x from zero; concat renumbers across parts
+    assert parts[1].ids[0] != whole.ids[2]
+    assert SymbolStore.concat(parts) == whole
+
+
+def test_shifted_moves_lines_only():
+    store = make_store()
+    shifted = store.shifted(10)
+    assert list(shifted.lines) == [line + 10 for line in store.lines]
+    assert list(shifted.ids) == list(store.ids)
+    assert shifted.name(3) == 'Widget'
+    assert store.shifted(0) is store
+
+
+def test_slices_and_items():
+    store = make_store()
+    part = store[1:3]
+    assert len(part) == 2
+    assert list(part) == list(store)[1:3]
+    assert store[3] == ('Widget', 'Class', 'Global', 5, store.ids[3])
+    assert store.symbol(0).name == 'first'
+    assert [list(chunk) for chunk in store.chunks(3)] == [list(store)[:3], list(store)[3:]]
+
+
+def test_pickle_round_trip():
+    store = make_store()
+    copy = pickle.loads(pickle.dumps(store))
+    assert copy == store
+    assert list(copy.ids) == list(store.ids)
+    copy.append('x', 'Variable', 'first', 9)
+    assert copy.ids[-1] == symbol_id('x', 'Variable', 'first', 2)
+
+
+def test_from_rows_keeps_ids():
+    store = make_store()
+    assert SymbolStore.from_rows(list(store)) == store
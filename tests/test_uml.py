@@ -0,0 +1,73 @@
+import os
+import sys
+
+import pytest
+
+from uml import PIPE_DELIMITER, PlantUMLRenderer
+
+# Answers each diagram with bytes that include newlines, CRs and NULs, and no newline before
+# the delimiter, as a PNG would; a diagram titled "hang" gets no answer at all.
+FAKE_PLANTUML = f'''#!{sys.executable}
+import sys, time
+delimiter = sys.argv[sys.argv.index('-pipedelimitor') + 1].encode()
+lines = []
+for line in sys.stdin:
+    lines.append(line)
+    if line.startswith('@enduml'):
+        if any('hang' in line for line in lines):
+            time.sleep(30)
+        sys.stdout.buffer.write(b'\\x89PNG\\r\\n\\x1a\\n\\x00' + str(len(lines)).encode() + delimiter + b'\\n')
+        sys.stdout.buffer.flush()
+        lines = []
+'''
+
+IMAGE = b'\x89PNG\r\n\x1a\n\x00'
+
+
+@pytest.fixture
+def plantuml(tmp_path):
+    if os.name != 'posix':
+        pytest.skip('needs an executable script')
+    path = tmp_path / 'plantuml'
+    path.write_text(FAKE_PLANTUML)
+    path.chmod(0o755)
+    return str(path)
+
+
+def diagram(lines=1, title='diagram'):
+    return f"@startuml\ntitle {title}\n" + 'class A\n' * lines + "@enduml\n"
+
+
+def test_render_splits_binary_output(plantuml):
+    with PlantUMLRenderer(plantuml, 'png') as renderer:
+        assert renderer.render(diagram()) == IMAGE + b'4'
+        assert renderer.render(diagram(3)) == IMAGE + b'6'
+        process = renderer.process
+        # Several diagrams in one write come back one per call from the same process
+        renderer.process.stdin.write((diagram(2) + diagram(5)).encode())
+        renderer.process.stdin.flush()
+        assert renderer.render(diagram()) == IMAGE + b'5'
+        assert renderer.render('') == IMAGE + b'8'
+        assert renderer.render('') == IMAGE + b'4'
+        assert renderer.process is process
+    assert PIPE_DELIMITER.encode() not in IMAGE
+
+
+def test_render_times_out_and_restarts(plantuml):
+    with PlantUMLRenderer(plantuml, 'png', timeout=0.5) as renderer:
+        with pytest.raises(RuntimeError, match='within 0.5s'):
+            renderer.render(diagram(title='hang'))
+        assert renderer.process is None
+        assert renderer.render(diagram()) == IMAGE + b'4'
+
+
+def test_render_reports_exit(tmp_path):
+    if os.name != 'posix':
+        pytest.skip('needs an executable script')
+    path = tmp_path / 'plantuml'
+    path.write_text(f"#!{sys.executable}\nimport sys\nsys.stdin.readline()\n")
+    path.chmod(0o755)
+    renderer = PlantUMLRenderer(str(path), 'png', timeout=5)
+    with pytest.raises(RuntimeError, match='exited'):
+        renderer.render(diagram())
+    assert renderer.process is None
@@ -0,0 +1,595 @@
+import os
+import sys
+import ast
+import json
+import time
+import hashlib
+import pickle
+import argparse
+import threading
+import multiprocessing
+from xml.sax.saxutils import escape
+
+from indexer import iter_python_files
+from depgraph import module_name, resolve_import
+
+MODEL_VERSION = 2
+MANIFEST = '.uml-manifest.json'
+PIPE_DELIMITER = '@@uml-end@@'
+
+
+class ClassInfo:
+    __slots__ = ('qualname', 'module', 'name', 'line', 'bases', 'attributes', 'methods')
+
+    def __init__(self, qualname, module, name, line, bases, attributes, methods):
+        self.qualname = qualname
+        self.module = module
+        self.name = name
+        self.line = line
+        self.bases = bases
+        self.attributes = attributes
+        self.methods = methods
+
+    def __reduce__(self):
+        return ClassInfo, (self.qualname, self.module, self.name, self.line, self.bases, self.attributes, self.methods)
+
+
+def _dotted(node):
+    if isinstance(node, ast.Subscript):
+        node = node.value
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return '.'.join(reversed(parts))
+
+
+def module_aliases(tree, module, is_package=False):
+    """Top-level import bindings of a module: local name -> qualified name it refers to."""
+    package = module if is_package else module.rpartition('.')[0]
+    aliases = {}
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    aliases[alias.asname] = alias.name
+                else:
+                    head = alias.name.partition('.')[0]
+                    aliases[head] = head
+        elif isinstance(node, ast.ImportFrom):
+            imported = resolve_import(package, node.module or '', node.level)
+            if imported is None:
+                continue
+            for alias in node.names:
+                if alias.name != '*':
+                    aliases[alias.asname or alias.name] = f"{imported}.{alias.name}" if imported else alias.name
+    return aliases
+
+
+def _signature(node):
+    args = node.args
+    names = [arg.arg for arg in args.posonlyargs + args.args]
+    if args.vararg:
+        names.append('*' + args.vararg.arg)
+    names.extend(arg.arg for arg in args.kwonlyargs)
+    if args.kwarg:
+        names.append('**' + args.kwarg.arg)
+    if names and names[0] in ('self', 'cls'):
+        names.pop(0)
+    return f"{node.name}({', '.join(names)})"
+
+
+def iter_classes(tree, module, aliases=None):
+    """Yield a ClassInfo for every class in a module, nested classes included."""
+    if aliases is None:
+        aliases = module_aliases(tree, module)
+    top_level = {node.name for node in tree.body if isinstance(node, ast.ClassDef)}
+    stack = [(node, module) for node in reversed(tree.body)]
+    while stack:
+        node, prefix = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        if not isinstance(node, ast.ClassDef):
+            for field in ('body', 'orelse', 'finalbody', 'handlers'):
+                block = getattr(node, field, None)
+                if block:
+                    stack.extend((child, prefix) for child in reversed(block))
+            continue
+        qualname = f"{prefix}.{node.name}"
+        bases = []
+        for base in node.bases:
+            name = _dotted(base)
+            if name is None or name == 'object':
+                continue
+            head, _, rest = name.partition('.')
+            if head in aliases:
+                name = aliases[head] + ('.' + rest if rest else '')
+            elif head in top_level:
+                name = f"{module}.{name}"
+            bases.append(name)
+        attributes = []
+        methods = []
+        for item in node.body:
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                methods.append(_signature(item))
+            elif isinstance(item, ast.Assign):
+                attributes.extend(target.id for target in item.targets if isinstance(target, ast.Name))
+            elif isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
+                attributes.append(f"{item.target.id}: {ast.unparse(item.annotation)}")
+        yield ClassInfo(qualname, module, node.name, node.lineno, bases, attributes, methods)
+        stack.extend((child, qualname) for child in reversed(node.body) if isinstance(child, ast.ClassDef))
+
+
+def read_classes(file_path, root):
+    try:
+        with open(file_path, 'rb') as file:
+            tree = ast.parse(file.read(), file_path)
+        mtime = os.stat(file_path).st_mtime_ns
+    except (SyntaxError, ValueError, OSError):
+        return file_path, None, None, None
+    module = module_name(file_path, root)
+    aliases = module_aliases(tree, module, os.path.basename(file_path) == '__init__.py')
+    return file_path, list(iter_classes(tree, module, aliases)), aliases, mtime
+
+
+def _read_in_root(args):
+    return read_classes(*args)
+
+
+class ProjectModel:
+    """Classes of a project with their inheritance, built from parsed trees.
+
+    Modules are added from trees the caller already has (``add_module``) or read in parallel
+    for a whole directory (``build``); ``refresh`` re-reads only files whose mtime changed.
+    Base names go through each module's imports, so re-exported bases resolve to the class
+    that defines them.
+    """
+
+    def __init__(self, root=None):
+        self.root = os.path.abspath(root) if root else None
+        self.classes = {}
+        self.modules = {}
+        self.aliases = {}
+        self.mtimes = {}
+
+    def __len__(self):
+        return len(self.classes)
+
+    @classmethod
+    def build(cls, root, workers=None, chunksize=16):
+        model = cls(root)
+        tasks = [(file_path, model.root) for file_path in iter_python_files(model.root)]
+        with multiprocessing.Pool(workers) as pool:
+            for result in pool.imap_unordered(_read_in_root, tasks, chunksize):
+                model._store(*result)
+        return model
+
+    def _store(self, file_path, classes, aliases, mtime):
+        if classes is None:
+            return
+        module = module_name(file_path, self.root)
+        self.remove_module(module)
+        self.modules[module] = [info.qualname for info in classes]
+        self.aliases[module] = aliases
+        self.mtimes[file_path] = mtime
+        for info in classes:
+            self.classes[info.qualname] = info
+
+    def add_module(self, module, tree, is_package=False):
+        aliases = module_aliases(tree, module, is_package)
+        self.remove_module(module)
+        classes = list(iter_classes(tree, module, aliases))
+        self.modules[module] = [info.qualname for info in classes]
+        self.aliases[module] = aliases
+        for info in classes:
+            self.classes[info.qualname] = info
+
+    def remove_module(self, module):
+        for qualname in self.modules.pop(module, ()):
+            self.classes.pop(qualname, None)
+        self.aliases.pop(module, None)
+
+    def refresh(self):
+        seen = set()
+        changed = 0
+        for file_path in iter_python_files(self.root):
+            seen.add(file_path)
+            try:
+                if os.stat(file_path).st_mtime_ns == self.mtimes.get(file_path):
+                    continue
+            except OSError:
+                continue
+            self._store(*read_classes(file_path, self.root))
+            changed += 1
+        for file_path in [file_path for file_path in self.mtimes if file_path not in seen]:
+            self.remove_module(module_name(file_path, self.root))
+            del self.mtimes[file_path]
+            changed += 1
+        return changed
+
+    def resolve(self, name):
+        """Follow re-exports (``from .core import Base`` in a package) to a known class name."""
+        for _ in range(10):
+            if name in self.classes:
+                return name
+            module, _, local = name.rpartition('.')
+            while module and module not in self.aliases:
+                module, _, head = module.rpartition('.')
+                local = f"{head}.{local}"
+            if not module:
+                return name
+            head, _, rest = local.partition('.')
+            target = self.aliases[module].get(head)
+            if target is None:
+                return name
+            name = target + ('.' + rest if rest else '')
+        return name
+
+    def diagram(self, qualnames=None, include_bases=True):
+        """``(classes, edges)`` for the given classes (all by default) plus, optionally, their bases.
+
+        Bases outside the project appear as ``(name, None)`` entries; edges are ``(subclass, base)``.
+        """
+        if qualnames is None:
+            qualnames = list(self.classes)
+        selected = {}
+        edges = []
+        pending = list(qualnames)
+        while pending:
+            qualname = pending.pop()
+            if qualname in selected:
+                continue
+            info = self.classes.get(qualname)
+            selected[qualname] = info
+            if info is None:
+                continue
+            for base in info.bases:
+                base = self.resolve(base)
+                edges.append((qualname, base))
+                if include_bases:
+                    pending.append(base)
+        for _, base in edges:
+            selected.setdefault(base, None)
+        classes = sorted(selected.items())
+        edges.sort()
+        return classes, edges
+
+    def diagrams(self, group='module'):
+        """Yield ``(name, classes, edges)`` per module, per top-level package or once for the project."""
+        if group == 'project':
+            yield 'project', *self.diagram()
+            return
+        groups = {}
+        for module, qualnames in self.modules.items():
+            key = module.partition('.')[0] if group == 'package' else module
+            groups.setdefault(key, []).extend(qualnames)
+        for key in sorted(groups):
+            if groups[key]:
+                yield key, *self.diagram(groups[key])
+
+    def save(self, file_path):
+        state = {'version': MODEL_VERSION, 'root': self.root, 'classes': self.classes,
+                 'modules': self.modules, 'aliases': self.aliases, 'mtimes': self.mtimes}
+        with open(file_path, 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, 'rb') as file:
+            state = pickle.load(file)
+        if state.get('version') != MODEL_VERSION:
+            raise ValueError('UML model cache was written by an incompatible version')
+        model = cls(state['root'])
+        model.classes, model.modules = state['classes'], state['modules']
+        model.aliases, model.mtimes = state['aliases'], state['mtimes']
+        return model
+
+
+def _alias(qualname):
+    return qualname.replace('.', '_').replace('<', '_').replace('>', '_')
+
+
+def to_plantuml(classes, edges, title=None):
+    lines = ['@startuml']
+    if title:
+        lines.append(f"title {title}")
+    for qualname, info in classes:
+        if info is None:
+            lines.append(f'class "{qualname}" as {_alias(qualname)} <<external>>')
+            continue
+        lines.append(f'class "{qualname}" as {_alias(qualname)} {{')
+        lines.extend(f"  {attribute}" for attribute in info.attributes)
+        lines.extend(f"  +{method}" for method in info.methods)
+        lines.append('}')
+    for subclass, base in edges:
+        lines.append(f"{_alias(base)} <|-- {_alias(subclass)}")
+    lines.append('@enduml')
+    return "\n".join(lines) + "\n"
+
+
+def _dot_label(text):
+    return text.replace('\\', '\\\\').replace('"', '\\"').replace('{', '\\{').replace('}', '\\}') \
+               .replace('<', '\\<').replace('>', '\\>').replace('|', '\\|')
+
+
+def to_dot(classes, edges, title=None):
+    lines = ['digraph classes {', '  rankdir=BT;', '  node [shape=record, fontname="Helvetica", fontsize=10];']
+    if title:
+        lines.append(f'  label="{_dot_label(title)}";')
+    for qualname, info in classes:
+        if info is None:
+            lines.append(f'  "{qualname}" [label="{_dot_label(qualname)}", style=dashed];')
+            continue
+        # Record fields are left-justified lines ending in \l
+        attributes = ''.join(_dot_label(attribute) + '\\l' for attribute in info.attributes)
+        methods = ''.join('+' + _dot_label(method) + '\\l' for method in info.methods)
+        lines.append(f'  "{qualname}" [label="{{{_dot_label(qualname)}|{attributes}|{methods}}}"];')
+    for subclass, base in edges:
+        lines.append(f'  "{subclass}" -> "{base}" [arrowhead=empty];')
+    lines.append('}')
+    return "\n".join(lines) + "\n"
+
+
+def to_svg(classes, edges, title=None):
+    """Render a class diagram to SVG in-process: bases are laid out in rows above their subclasses."""
+    char_width, line_height, padding, gap = 7, 16, 8, 40
+    depth = {}
+    bases_of = {}
+    for subclass, base in edges:
+        bases_of.setdefault(subclass, []).append(base)
+
+    def level(qualname):
+        # Iterative longest path to a root class; cycles (invalid code) are cut at the first repeat
+        stack = [qualname]
+        visiting = set()
+        while stack:
+            current = stack[-1]
+            if current in depth:
+                stack.pop()
+                continue
+            visiting.add(current)
+            missing = [base for base in bases_of.get(current, ()) if base not in depth and base not in visiting]
+            if missing:
+                stack.extend(missing)
+                continue
+            depth[current] = 1 + max((depth.get(base, 0) for base in bases_of.get(current, ())), default=-1)
+            stack.pop()
+        return depth[qualname]
+
+    boxes = {}
+    rows = {}
+    for qualname, info in classes:
+        body = [] if info is None else info.attributes + ['+' + method for method in info.methods]
+        width = char_width * max([len(qualname)] + [len(line) for line in body]) + 2 * padding
+        height = line_height * (1 + len(body)) + 2 * padding + (4 if body else 0)
+        boxes[qualname] = [0, 0, width, height, info, body]
+        rows.setdefault(level(qualname), []).append(qualname)
+
+    y = gap if title else padding
+    total_width = 0
+    for row in sorted(rows):
+        x = padding
+        row_height = 0
+        for qualname in rows[row]:
+            box = boxes[qualname]
+            box[0], box[1] = x, y
+            x += box[2] + gap
+            row_height = max(row_height, box[3])
+        total_width = max(total_width, x)
+        y += row_height + gap
+
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{total_width}" height="{y}" '
+             f'font-family="Helvetica, Arial, sans-serif" font-size="12">',
+             '<defs><marker id="inherits" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="12" markerHeight="12" '
+             'orient="auto"><path d="M0,0 L10,5 L0,10 z" fill="white" stroke="black"/></marker></defs>']
+    if title:
+        parts.append(f'<text x="{padding}" y="{gap // 2}" font-weight="bold">{escape(title)}</text>')
+    for subclass, base in edges:
+        child, parent = boxes[subclass], boxes[base]
+        parts.append(f'<line x1="{child[0] + child[2] // 2}" y1="{child[1]}" x2="{parent[0] + parent[2] // 2}" '
+                     f'y2="{parent[1] + parent[3]}" stroke="black" marker-end="url(#inherits)"/>')
+    for qualname, (x, y, width, height, info, body) in boxes.items():
+        dash = ' stroke-dasharray="4 3"' if info is None else ''
+        parts.append(f'<g><title>{escape(qualname)}</title>'
+                     f'<rect x="{x}" y="{y}" width="{width}" height="{height}" fill="#fefece" stroke="black"{dash}/>')
+        text_y = y + padding + line_height - 4
+        parts.append(f'<text x="{x + width // 2}" y="{text_y}" text-anchor="middle" font-weight="bold">{escape(qualname)}</text>')
+        if body:
+            parts.append(f'<line x1="{x}" y1="{text_y + 6}" x2="{x + width}" y2="{text_y + 6}" stroke="black"/>')
+            for line in body:
+                text_y += line_height
+                parts.append(f'<text x="{x + padding}" y="{text_y + 4}">{escape(line)}</text>')
+        parts.append('</g>')
+    parts.append('</svg>')
+    return "\n".join(parts) + "\n"
+
+
+class PlantUMLRenderer:
+    """One long-lived ``plantuml -pipe`` process that renders any number of diagrams.
+
+    Starting the JVM dominates the cost of a single diagram, so diagrams are written to the
+    same process one after another and each image is read back up to the pipe delimiter. A
+    PNG can hold any bytes, so output is read in raw chunks by a reader thread and split
+    wherever the delimiter occurs; a render that gets no delimiter within ``timeout``
+    seconds kills the process, and the next one starts a new one.
+    """
+
+    def __init__(self, command='plantuml', output_format='svg', timeout=60.0):
+        self.command = command
+        self.output_format = output_format
+        self.timeout = timeout
+        self.process = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        import queue
+        import subprocess
+        self.process = subprocess.Popen(
+            [self.command, '-pipe', f'-t{self.output_format}', '-pipedelimitor', PIPE_DELIMITER],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self._chunks = queue.Queue()
+        self._buffer = bytearray()
+        threading.Thread(target=self._pump, args=(self.process.stdout, self._chunks), daemon=True).start()
+
+    @staticmethod
+    def _pump(stream, chunks):
+        # Whatever bytes are available, as they arrive; an empty chunk marks the end of the output
+        while True:
+            data = stream.read1(65536)
+            chunks.put(data)
+            if not data:
+                return
+
+    def render(self, source):
+        import queue
+        with self._lock:
+            if self.process is None or self.process.poll() is not None:
+                self.start()
+            self.process.stdin.write(source.encode('utf-8'))
+            self.process.stdin.flush()
+            delimiter = PIPE_DELIMITER.encode('ascii')
+            buffer = self._buffer
+            deadline = time.monotonic() + self.timeout
+            searched = 0
+            while True:
+                position = buffer.find(delimiter, searched)
+                if position != -1:
+                    image = bytes(buffer[:position])
+                    end = position + len(delimiter)
+                    # The delimiter is printed on a line of its own
+                    for newline in (b'\r\n', b'\n'):
+                        if buffer.startswith(newline, end):
+                            end += len(newline)
+                            break
+                    del buffer[:end]
+                    return image
+                searched = max(0, len(buffer) - len(delimiter) + 1)
+                try:
+                    data = self._chunks.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    self.process.kill()
+                    self.process.wait()
+                    self.process = None
+                    raise RuntimeError(f"plantuml did not finish a diagram within {self.timeout:g}s") from None
+                if not data:
+                    self.process.wait()
+                    self.process = None
+                    raise RuntimeError('plantuml exited while rendering')
+                buffer += data
+
+    def close(self):
+        if self.process is not None:
+            self.process.stdin.close()
+            self.process.wait()
+            self.process = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DiagramWriter:
+    """Writes diagrams to a directory, skipping those whose source has not changed.
+
+    A manifest in the directory records the hash of each diagram's PlantUML text; a diagram is
+    regenerated only when its classes (or their bases) changed or one of its files is missing.
+    ``renderers`` are PlantUML processes, one per format they produce.
+    """
+
+    def __init__(self, output_dir, formats=('puml',), renderers=()):
+        self.output_dir = output_dir
+        self.formats = formats
+        self.renderers = {renderer.output_format: renderer for renderer in renderers}
+        self.manifest_path = os.path.join(output_dir, MANIFEST)
+        try:
+            with open(self.manifest_path) as file:
+                self.manifest = json.load(file)
+        except (OSError, ValueError):
+            self.manifest = {}
+        self.written = 0
+        self.skipped = 0
+
+    def paths(self, name):
+        return [os.path.join(self.output_dir, f"{name}.{output_format}") for output_format in self.formats]
+
+    def write(self, name, classes, edges):
+        source = to_plantuml(classes, edges, name)
+        digest = hashlib.blake2b(source.encode('utf-8'), digest_size=16).hexdigest()
+        paths = self.paths(name)
+        if self.manifest.get(name) == digest and all(os.path.exists(path) for path in paths):
+            self.skipped += 1
+            return paths
+        for output_format, path in zip(self.formats, paths):
+            if output_format == 'puml':
+                data = source.encode('utf-8')
+            elif output_format == 'dot':
+                data = to_dot(classes, edges, name).encode('utf-8')
+            elif output_format in self.renderers:
+                data = self.renderers[output_format].render(source)
+            elif output_format == 'svg':
+                data = to_svg(classes, edges, name).encode('utf-8')
+            else:
+                raise ValueError(f'{output_format} needs PlantUML')
+            with open(path, 'wb') as file:
+                file.write(data)
+        self.manifest[name] = digest
+        self.written += 1
+        return paths
+
+    def flush(self):
+        with open(self.manifest_path, 'w') as file:
+            json.dump(self.manifest, file, indent=1, sort_keys=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Class diagrams with inheritance for a Python project.')
+    parser.add_argument('root', help='project directory; module names are relative to it')
+    parser.add_argument('-o', '--output', default='uml', help='output directory (default: uml)')
+    parser.add_argument('--format', action='append', choices=['puml', 'dot', 'svg', 'png'],
+                        help='output formats (default: puml); svg is rendered in-process unless --plantuml is given')
+    parser.add_argument('--group', choices=['module', 'package', 'project'], default='module',
+                        help='one diagram per module, per top-level package or for the whole project')
+    parser.add_argument('--plantuml', nargs='?', const='plantuml', metavar='COMMAND',
+                        help='render svg/png through one long-lived PlantUML process')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--model-cache', help='pickle file to load, refresh and save the parsed classes')
+    args = parser.parse_args(argv)
+    formats = tuple(dict.fromkeys(args.format or ['puml']))
+
+    start = time.perf_counter()
+    if args.model_cache and os.path.exists(args.model_cache):
+        model = ProjectModel.load(args.model_cache)
+        model.refresh()
+    else:
+        model = ProjectModel.build(args.root, args.workers)
+    if args.model_cache:
+        model.save(args.model_cache)
+
+    renderers = []
+    if args.plantuml:
+        # A PlantUML pipe renders a single format, so each requested image format gets its own
+        renderers = [PlantUMLRenderer(args.plantuml, output_format)
+                     for output_format in formats if output_format in ('svg', 'png')]
+    elif 'png' in formats:
+        parser.error('png output needs --plantuml')
+    os.makedirs(args.output, exist_ok=True)
+    writer = DiagramWriter(args.output, formats, renderers)
+    try:
+        for name, classes, edges in model.diagrams(args.group):
+            writer.write(name, classes, edges)
+    finally:
+        writer.flush()
+        for renderer in renderers:
+            renderer.close()
+    print(f"{len(model)} classes: {writer.written} diagrams written, {writer.skipped} unchanged, "
+          f"in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())